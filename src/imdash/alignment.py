@@ -0,0 +1,190 @@
+"""
+Time alignment of asynchronous sources by message stamp.
+
+Samples are buffered per source with their stamps and joined by nearest
+or linearly interpolated stamp within a tolerance. Joins are vectorized
+with searchsorted, so they scale to high-rate sources.
+"""
+
+import numpy as np
+
+
+JOIN_MODES = ["off", "nearest", "interpolate"]
+
+
+class StampBuffer:
+    """
+    Bounded buffer of (stamp, value) samples with increasing stamps.
+
+    Samples are appended to preallocated arrays, which are compacted
+    once full, so pushing is amortized O(1).
+    """
+
+    def __init__(self, max_len=1000):
+
+        self.max_len = max(1, int(max_len))
+
+        self.stamp_buf = np.zeros(2 * self.max_len)
+        self.value_buf = np.zeros(2 * self.max_len)
+        self.start = 0
+        self.end = 0
+
+    def __len__(self):
+
+        return self.end - self.start
+
+    @property
+    def stamps(self):
+
+        return self.stamp_buf[self.start:self.end]
+
+    @property
+    def values(self):
+
+        return self.value_buf[self.start:self.end]
+
+    def clear(self):
+
+        self.start = 0
+        self.end = 0
+
+    def push(self, stamp, value):
+
+        # stamps jumping back, e.g. on bag loops, restart the buffer
+        if self.end > self.start and stamp < self.stamp_buf[self.end-1]:
+            self.clear()
+
+        if self.end == len(self.stamp_buf):
+            n = len(self)
+            self.stamp_buf[:n] = self.stamp_buf[self.start:self.end]
+            self.value_buf[:n] = self.value_buf[self.start:self.end]
+            self.start = 0
+            self.end = n
+
+        self.stamp_buf[self.end] = stamp
+        self.value_buf[self.end] = value
+        self.end += 1
+
+        if len(self) > self.max_len:
+            self.start += 1
+
+    def drop(self, n):
+        """
+        Drops the n oldest samples.
+        """
+
+        self.start = min(self.end, self.start + n)
+
+
+def join_nearest(ref_stamps, stamps, values, tolerance):
+    """
+    Returns the values with the nearest stamp for each reference stamp
+    and a mask, which is false where no stamp lies within the tolerance.
+    """
+
+    n = len(stamps)
+    if n == 0:
+        return (np.full(len(ref_stamps), np.nan),
+                np.zeros(len(ref_stamps), dtype=bool))
+
+    idx = np.searchsorted(stamps, ref_stamps)
+    left = np.clip(idx - 1, 0, n - 1)
+    right = np.clip(idx, 0, n - 1)
+
+    dl = np.abs(ref_stamps - stamps[left])
+    dr = np.abs(stamps[right] - ref_stamps)
+
+    pick = np.where(dr < dl, right, left)
+
+    return values[pick], np.minimum(dl, dr) <= tolerance
+
+
+def join_interpolate(ref_stamps, stamps, values, tolerance):
+    """
+    Returns the values linearly interpolated at the reference stamps and
+    a mask, which is false where a neighbor is further than the tolerance.
+    """
+
+    n = len(stamps)
+    if n == 0:
+        return (np.full(len(ref_stamps), np.nan),
+                np.zeros(len(ref_stamps), dtype=bool))
+
+    idx = np.searchsorted(stamps, ref_stamps, side="right")
+    left = idx - 1
+    right = np.minimum(idx, n - 1)
+
+    exact = (left >= 0) & (stamps[np.maximum(left, 0)] == ref_stamps)
+    inside = ((left >= 0)
+              & (idx < n)
+              & (ref_stamps - stamps[np.maximum(left, 0)] <= tolerance)
+              & (stamps[right] - ref_stamps <= tolerance))
+
+    return np.interp(ref_stamps, stamps, values), exact | inside
+
+
+class StampJoin:
+    """
+    Joins the samples of a reference source with those of a second source.
+
+    Reference samples are held back until the second source has a sample
+    at or after their stamp, so that later samples cannot be closer.
+    """
+
+    def __init__(self, mode="nearest", tolerance=0.05, max_len=1000):
+
+        self.mode = mode
+        self.tolerance = tolerance
+
+        self.ref = StampBuffer(max_len)
+        self.other = StampBuffer(max_len)
+
+    def push_ref(self, stamp, value):
+
+        self.ref.push(stamp, value)
+
+    def push_other(self, stamp, value):
+
+        if len(self.other) > 0 and stamp < self.other.stamps[-1]:
+            # the other source restarted, pending samples cannot be joined
+            self.ref.clear()
+
+        self.other.push(stamp, value)
+
+    def pop_joined(self):
+        """
+        Returns stamps, joined other values and reference values
+        of all reference samples, which can be decided now.
+        """
+
+        if len(self.ref) == 0 or len(self.other) == 0:
+            return np.zeros(0), np.zeros(0), np.zeros(0)
+
+        ref_stamps = self.ref.stamps
+        n_ready = np.searchsorted(ref_stamps, self.other.stamps[-1], side="right")
+
+        ready_stamps = ref_stamps[:n_ready]
+        ready_values = self.ref.values[:n_ready]
+
+        if self.mode == "interpolate":
+            joined, valid = join_interpolate(
+                    ready_stamps, self.other.stamps, self.other.values, self.tolerance)
+        else:
+            joined, valid = join_nearest(
+                    ready_stamps, self.other.stamps, self.other.values, self.tolerance)
+
+        res = (ready_stamps[valid].copy(),
+               joined[valid],
+               ready_values[valid].copy())
+
+        self.ref.drop(n_ready)
+
+        # keep one sample before the oldest pending stamp for interpolation
+        if len(self.ref) > 0:
+            keep_from = self.ref.stamps[0] - self.tolerance
+        else:
+            keep_from = self.other.stamps[-1] - self.tolerance
+        n_old = np.searchsorted(self.other.stamps, keep_from)
+        self.other.drop(max(0, n_old - 1))
+
+        return res
@@ -0,0 +1,267 @@
+"""
+Benchmarks the whole application by driving Main.update for a number of
+frames, with ros2 and structstore connectors replaced by synthetic sources.
+
+Run e.g. "imdash-bench ~/.config/imdash/config_store/default -n 1000".
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import resource
+import platform
+
+import numpy as np
+
+import imdash.main as imdash_main
+import imdash.utils as utils
+
+from imdash.bench.synthetic import (
+    SyntheticConnector,
+    SyntheticSettings,
+    SOURCE_KINDS
+)
+
+
+REPLACED_PREFIXES = ["/ros2", "/structstores"]
+
+
+def get_rss():
+    """
+    Returns the resident set size of this process in bytes.
+    """
+
+    try:
+        with open("/proc/self/statm") as fd:
+            return int(fd.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def summarize_times(samples):
+    """
+    Returns mean, percentiles and max of the given durations in ms.
+    """
+
+    samples = np.asarray(samples, dtype=float) * 1000.0
+
+    if len(samples) == 0:
+        return {}
+
+    p50, p90, p95, p99 = np.percentile(samples, (50, 90, 95, 99))
+
+    return {
+        "mean": float(samples.mean()),
+        "p50": float(p50),
+        "p90": float(p90),
+        "p95": float(p95),
+        "p99": float(p99),
+        "max": float(samples.max()),
+    }
+
+
+def summarize_profiler(profiler, top=10):
+    """
+    Returns the mean time per frame of each subsystem in ms,
+    together with its most expensive entries.
+    """
+
+    res = {}
+
+    for category in ["connectors", "views", "components", "sources"]:
+        entries = []
+        for cat, key in profiler.keys(category):
+            stats = profiler.stats(cat, key)
+            entries.append({
+                "name": profiler.name(cat, key),
+                "mean": stats[0] * 1000.0,
+                "p95": stats[2] * 1000.0,
+                "calls": stats[5],
+            })
+        entries.sort(key=lambda e: e["mean"], reverse=True)
+        res[category] = {
+            "mean": sum(e["mean"] for e in entries),
+            "entries": len(entries),
+            "top": entries[:top],
+        }
+
+    return res
+
+
+def install_synthetic_connectors(sources_manager, settings, prefixes):
+    """
+    Replaces all connectors with the given prefixes by synthetic ones.
+    Positions are kept, since some components look connectors up by index.
+    """
+
+    connectors = []
+    for con in sources_manager.connectors:
+        if con.prefix in prefixes:
+            con.cleanup()
+            con = SyntheticConnector(con.prefix, settings)
+        connectors.append(con)
+
+    sources_manager.connectors = connectors
+    sources_manager.sources = {}
+    sources_manager.is_alive = {}
+
+
+def run_benchmark(config_path,
+                  frames=1000,
+                  warmup=100,
+                  settings=None,
+                  replaced_prefixes=REPLACED_PREFIXES,
+                  memory_interval=10):
+
+    if settings is None:
+        settings = SyntheticSettings()
+
+    # never touch the global config or the benchmarked config of the user
+    tmp_dir = tempfile.mkdtemp(prefix="imdash_bench_")
+    imdash_main.GLOBAL_CONF_DIR = os.path.join(tmp_dir, "global")
+    imdash_main.DEFAULT_CONF_PATH = os.path.join(tmp_dir, "default")
+
+    if config_path is not None:
+        bench_config_path = os.path.join(tmp_dir, "config")
+        shutil.copytree(config_path, bench_config_path)
+    else:
+        bench_config_path = None
+
+    try:
+        main = imdash_main.Main(bench_config_path)
+        main.autosave = False
+        main.vsync = False
+        main.powersave = False
+        main.paused = False
+        main.profiling = True
+
+        install_synthetic_connectors(
+                main.sources_manager, settings, replaced_prefixes)
+
+        for _ in range(warmup):
+            main.update()
+
+        utils.PROFILER.reset()
+
+        frame_times = []
+        rss = [get_rss()]
+
+        start_time = time.perf_counter()
+
+        for i in range(frames):
+            t = time.perf_counter()
+            main.update()
+            frame_times.append(time.perf_counter() - t)
+            if (i + 1) % memory_interval == 0:
+                rss.append(get_rss())
+
+        wall_time = time.perf_counter() - start_time
+
+        rss.append(get_rss())
+
+        main.config_writer.flush()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    # a positive slope over the whole run hints at a leak
+    rss = np.array(rss, dtype=float)
+    slope = np.polyfit(np.arange(len(rss)) * memory_interval, rss, 1)[0]
+
+    return {
+        "config": config_path,
+        "frames": frames,
+        "warmup": warmup,
+        "wall_time": wall_time,
+        "fps": frames / wall_time,
+        "frame_time_ms": summarize_times(frame_times),
+        "subsystems_ms": summarize_profiler(utils.PROFILER),
+        "memory": {
+            "rss_start": int(rss[0]),
+            "rss_end": int(rss[-1]),
+            "rss_max": int(rss.max()),
+            "growth": int(rss[-1] - rss[0]),
+            "growth_per_frame": float(slope),
+        },
+        "synthetic": {
+            "rate": settings.rate,
+            "message_size": settings.message_size,
+            "image_size": [settings.image_width, settings.image_height],
+            "cloud_size": settings.cloud_size,
+            "kinds": settings.kinds,
+        },
+        "sources": len(main.sources_manager.sources),
+        "views": len(main.views),
+        "python": platform.python_version(),
+        "time": time.time(),
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+            description="Runs imdash headlessly on a config with synthetic "
+                        + "sources and reports frame timings as json.")
+    parser.add_argument("config", nargs="?", default=None,
+                        help="config directory to benchmark")
+    parser.add_argument("-n", "--frames", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=30.0,
+                        help="update rate of synthetic sources in Hz")
+    parser.add_argument("--message-size", type=int, default=1024,
+                        help="payload size of synthetic messages in bytes")
+    parser.add_argument("--image-size", type=int, nargs=2,
+                        default=[1280, 720], metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--cloud-size", type=int, default=100000,
+                        help="number of points of synthetic clouds")
+    parser.add_argument("--kind", action="append", default=[],
+                        metavar="PATTERN=KIND",
+                        help="kind of the sources matching a glob pattern, "
+                             + "one of scalar, message, image, cloud")
+    parser.add_argument("--headless", action="store_true",
+                        help="render offscreen through EGL, alternatively "
+                             + "run with xvfb-run")
+    parser.add_argument("-o", "--output", default=None,
+                        help="write the report to this file instead of stdout")
+
+    args = parser.parse_args()
+
+    # imviz already opened its window on import, so without a display
+    # the process is restarted, which lets imviz fall back to EGL
+    display_vars = ["DISPLAY", "WAYLAND_DISPLAY"]
+    if args.headless and any(v in os.environ for v in display_vars):
+        env = {k: v for k, v in os.environ.items() if k not in display_vars}
+        os.execve(sys.executable,
+                  [sys.executable, "-m", "imdash.bench.app", *sys.argv[1:]],
+                  env)
+
+    settings = SyntheticSettings()
+    settings.rate = args.rate
+    settings.message_size = args.message_size
+    settings.image_width, settings.image_height = args.image_size
+    settings.cloud_size = args.cloud_size
+
+    for k in args.kind:
+        pattern, _, kind = k.rpartition("=")
+        if kind not in SOURCE_KINDS:
+            parser.error(f"unknown source kind \"{kind}\"")
+        settings.kinds.append((pattern, kind))
+
+    if args.config is not None:
+        args.config = os.path.abspath(os.path.expanduser(args.config))
+
+    report = run_benchmark(args.config, args.frames, args.warmup, settings)
+    report_str = json.dumps(report, indent=2)
+
+    if args.output is None:
+        print(report_str)
+    else:
+        with open(args.output, "w") as fd:
+            fd.write(report_str)
+
+
+if __name__ == "__main__":
+    main()
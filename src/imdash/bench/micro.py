@@ -0,0 +1,331 @@
+"""
+Micro benchmarks of hot-path primitives, reported as json.
+
+Run e.g. "imdash-microbench -o results.json" or "imdash-microbench -k cloud".
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import platform
+
+import numpy as np
+import imviz as viz
+import objtoolbox as otb
+
+from PIL import Image
+
+from imdash.utils import DataSource
+from imdash.connectors.filesystem_connector import FileSystemConnector, FileSource
+from imdash.connectors import structstore_connector
+from imdash.components.view_2d.history import History2DComp
+from imdash.components.view_2d.point_cloud import transform_point_cloud
+from imdash.components.view_2d.point_cloud_proj import project_points_into_view
+
+from imdash.bench.synthetic import CLOUD_DTYPE
+
+
+CLOUD_SIZES = [100000, 1000000, 4000000]
+HISTORY_SIZES = [10000, 100000, 1000000]
+
+
+def measure(func, repeat=5, min_time=0.05):
+    """
+    Times func and returns per call statistics in seconds.
+    The number of calls per repeat is chosen, so that each
+    repeat takes at least min_time seconds.
+    """
+
+    t = time.perf_counter()
+    func()
+    once = time.perf_counter() - t
+
+    number = max(1, int(min_time / max(once, 1e-9)))
+
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - t) / number)
+
+    times = np.array(times)
+
+    return {
+        "mean": float(times.mean()),
+        "min": float(times.min()),
+        "p50": float(np.median(times)),
+        "std": float(times.std()),
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def make_cloud(n, rng):
+
+    cloud = np.empty(n, dtype=CLOUD_DTYPE)
+    for f in CLOUD_DTYPE.names:
+        cloud[f] = rng.uniform(-50.0, 50.0, n)
+
+    return cloud
+
+
+def run_in_plot(func):
+    """
+    Runs func inside a plot of a new frame, as components expect it.
+    """
+
+    viz.wait(vsync=False)
+    viz.begin_window("microbench")
+    if viz.begin_plot("microbench"):
+        func()
+    viz.end_plot()
+    viz.end_window()
+
+
+def bench_data_source(ctx):
+
+    value_src = FileSource()
+    value_src.data = 1.0
+
+    vector_src = FileSource()
+    vector_src.data = list(range(100))
+
+    DataSource.SOURCES = {
+        "/bench/value": value_src,
+        "/bench/vector": vector_src,
+    }
+
+    exprs = {
+        "simple": "{/bench/value}",
+        "complex": "np.linalg.norm(np.array({/bench/vector}) * 2.0) "
+                   + "+ math.sin(time.time())",
+    }
+
+    for name, expr in exprs.items():
+        ds = DataSource(path=expr)
+        yield f"data_source/{name}", {"expr": expr}, lambda: ds()
+
+
+def bench_history(ctx):
+
+    for n in HISTORY_SIZES:
+        comp = History2DComp()
+        comp.history_length = float(n) * 2.0
+        comp.history_step = 0.0
+
+        ys = ctx.rng.uniform(-1.0, 1.0, n)
+        comp.history.extend(zip(range(n), ys))
+
+        DataSource.SOURCES = {"/bench/value": FileSource()}
+        DataSource.SOURCES["/bench/value"].data = 1.0
+        comp.y_source.path = "{/bench/value}"
+
+        def update(comp=comp):
+            comp.update(comp.uuid, None)
+            # keep the size constant
+            comp.history.popleft()
+
+        def render(comp=comp):
+            run_in_plot(lambda: comp.render(comp.uuid, None))
+
+        yield f"history/update/{n}", {"entries": n}, update
+        yield f"history/render/{n}", {"entries": n}, render
+
+
+def bench_point_clouds(ctx):
+
+    view = np.eye(4)
+    proj = np.array([[500.0, 0.0, 640.0],
+                     [0.0, 500.0, 360.0],
+                     [0.0, 0.0, 1.0]])
+
+    for n in CLOUD_SIZES:
+        if n > ctx.max_points:
+            continue
+        cloud = make_cloud(n, ctx.rng)
+        yield (f"point_cloud/transform/{n}",
+               {"points": n},
+               lambda cloud=cloud: transform_point_cloud(view, cloud))
+        yield (f"point_cloud/project/{n}",
+               {"points": n},
+               lambda cloud=cloud: project_points_into_view(
+                   view, proj, cloud, 0.0, 100.0))
+
+
+def bench_structstore(ctx):
+
+    if not structstore_connector.structstore_available:
+        yield "structstore/data", {"skipped": "structstore not available"}, None
+        return
+
+    sts = structstore_connector.sts
+
+    shm_path = os.path.join(ctx.tmp_dir, "bench_store")
+
+    try:
+        store = sts.StructStoreShared(shm_path, 64 * 2**20, use_file=True)
+        with store.lock():
+            for i in range(100):
+                setattr(store, f"item_{i}", {
+                    "name": f"item {i}",
+                    "values": list(range(100)),
+                    "nested": {"a": float(i), "b": [1.0, 2.0, 3.0]},
+                })
+    except Exception as e:
+        yield "structstore/data", {"skipped": f"cannot create store: {e}"}, None
+        return
+
+    src = structstore_connector.StructStoreSource()
+    src.store = store
+    src.sub_path = []
+
+    yield "structstore/data", {"items": 100}, lambda: src.data
+
+
+def make_files(ctx):
+
+    rng = ctx.rng
+    d = ctx.tmp_dir
+
+    img = rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8)
+    files = {}
+    for ext in ["png", "jpg", "bmp", "tiff"]:
+        p = os.path.join(d, f"image.{ext}")
+        Image.fromarray(img).save(p)
+        files[ext] = p
+
+    p = os.path.join(d, "table.csv")
+    np.savetxt(p, rng.uniform(size=(10000, 8)), delimiter=",")
+    files["csv"] = p
+
+    p = os.path.join(d, "data.json")
+    with open(p, "w") as fd:
+        json.dump({"values": rng.uniform(size=10000).tolist()}, fd)
+    files["json"] = p
+
+    otb_dir = os.path.join(d, "otb")
+    otb.save({"values": rng.uniform(size=100000)}, otb_dir)
+    files["otb"] = os.path.join(otb_dir, "state.json")
+
+    p = os.path.join(d, "text.txt")
+    with open(p, "w") as fd:
+        fd.write("imdash\n" * 10000)
+    files["txt"] = p
+
+    return files
+
+
+def bench_filesystem(ctx):
+
+    con = FileSystemConnector()
+
+    for fmt, path in make_files(ctx).items():
+
+        key = con.prefix + path
+
+        def load(key=key):
+            sources = {key: None}
+            con.update_sources(sources)
+            return sources[key]
+
+        yield (f"filesystem/{fmt}",
+               {"size": os.path.getsize(path)},
+               load)
+
+
+BENCHMARKS = [
+    bench_data_source,
+    bench_history,
+    bench_point_clouds,
+    bench_structstore,
+    bench_filesystem,
+]
+
+
+class BenchContext:
+
+    def __init__(self, max_points, seed=0):
+
+        self.rng = np.random.default_rng(seed)
+        self.max_points = max_points
+        self.tmp_dir = tempfile.mkdtemp(prefix="imdash_microbench_")
+
+    def cleanup(self):
+
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+def run_benchmarks(name_filter="", repeat=5, max_points=max(CLOUD_SIZES)):
+
+    ctx = BenchContext(max_points)
+
+    results = []
+
+    try:
+        for bench in BENCHMARKS:
+            for name, params, func in bench(ctx):
+                if name_filter not in name:
+                    continue
+                res = {"name": name, "params": params}
+                if func is not None:
+                    try:
+                        res["time"] = measure(func, repeat)
+                    except Exception as e:
+                        res["error"] = f"{type(e).__name__}: {e}"
+                results.append(res)
+                print(f"{name}: {res.get('time', {}).get('p50', float('nan')) * 1000.0:.4f} ms",
+                      file=sys.stderr)
+    finally:
+        ctx.cleanup()
+
+    return {
+        "benchmarks": results,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "time": time.time(),
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+            description="Runs micro benchmarks of imdash primitives "
+                        + "and reports the results as json.")
+    parser.add_argument("-k", "--filter", default="",
+                        help="only run benchmarks containing this string")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("--max-points", type=int, default=max(CLOUD_SIZES),
+                        help="skip point cloud benchmarks above this size")
+    parser.add_argument("--headless", action="store_true",
+                        help="render offscreen through EGL")
+    parser.add_argument("-o", "--output", default=None,
+                        help="write the report to this file instead of stdout")
+
+    args = parser.parse_args()
+
+    # see imdash.bench.app
+    display_vars = ["DISPLAY", "WAYLAND_DISPLAY"]
+    if args.headless and any(v in os.environ for v in display_vars):
+        env = {k: v for k, v in os.environ.items() if k not in display_vars}
+        os.execve(sys.executable,
+                  [sys.executable, "-m", "imdash.bench.micro", *sys.argv[1:]],
+                  env)
+
+    report = run_benchmarks(args.filter, args.repeat, args.max_points)
+    report_str = json.dumps(report, indent=2)
+
+    if args.output is None:
+        print(report_str)
+    else:
+        with open(args.output, "w") as fd:
+            fd.write(report_str)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import time
+import fnmatch
+
+import numpy as np
+
+from imdash.connectors.connector_base import ConnectorBase
+from imdash.connectors.ros2_connector import Ros2Message
+
+
+SOURCE_KINDS = ["scalar", "message", "image", "cloud"]
+
+# the kind of a source is guessed from its path, if not given explicitly
+KIND_KEYWORDS = {
+    "image": ["image", "img", "camera", "cam"],
+    "cloud": ["points", "cloud", "lidar", "pc"],
+}
+
+# pregenerated buffers are handed out round robin, so that
+# consumers get fresh arrays without paying for data generation
+NUM_BUFFERS = 4
+
+CLOUD_DTYPE = np.dtype([
+    ("x", np.float32),
+    ("y", np.float32),
+    ("z", np.float32),
+    ("intensity", np.float32),
+])
+
+
+class SyntheticSettings:
+
+    def __init__(self):
+
+        self.rate = 30.0
+        self.message_size = 1024
+        self.image_width = 1280
+        self.image_height = 720
+        self.cloud_size = 100000
+        self.seed = 0
+
+        # list of (fnmatch pattern, kind), first match wins
+        self.kinds = []
+
+    def get_kind(self, key):
+
+        for pattern, kind in self.kinds:
+            if fnmatch.fnmatch(key, pattern):
+                return kind
+
+        parts = key.lower().split("/")
+        for kind, keywords in KIND_KEYWORDS.items():
+            if any(k in p for p in parts for k in keywords):
+                return kind
+
+        return "scalar"
+
+
+class SyntheticHeader:
+
+    def __init__(self, frame_id):
+
+        self.frame_id = frame_id
+        self.stamp = None
+
+
+class SyntheticHeaderMsg:
+
+    def __init__(self, key):
+
+        self.header = SyntheticHeader(key)
+
+
+class SyntheticSource:
+
+    def __init__(self, key, kind, settings, rng):
+
+        self.key = key
+        self.kind = kind
+        self.rate = settings.rate
+
+        self.buffers = make_buffers(kind, settings, rng)
+        self.buffer_idx = 0
+
+        self.last_msg = Ros2Message()
+        self.last_msg.msg = SyntheticHeaderMsg(key)
+
+        self.last_update = 0.0
+        self.updates = 0
+
+        self.data = None
+        self.mod = True
+
+    def update(self, now):
+
+        if now - self.last_update < 1.0 / self.rate:
+            return False
+
+        self.last_update = now
+        self.updates += 1
+
+        if self.kind == "scalar":
+            self.data = float(np.sin(now))
+        else:
+            self.data = self.buffers[self.buffer_idx]
+            self.buffer_idx = (self.buffer_idx + 1) % len(self.buffers)
+
+        self.last_msg.recv_time = now
+        self.last_msg.stamp_time = now
+        self.last_msg.delay = 0.0
+
+        return True
+
+
+def make_buffers(kind, settings, rng):
+
+    if kind == "image":
+        shape = (settings.image_height, settings.image_width, 3)
+        return [rng.integers(0, 256, shape, dtype=np.uint8)
+                for _ in range(NUM_BUFFERS)]
+
+    if kind == "cloud":
+        bufs = []
+        for _ in range(NUM_BUFFERS):
+            pc = np.empty(settings.cloud_size, dtype=CLOUD_DTYPE)
+            for f in CLOUD_DTYPE.names:
+                pc[f] = rng.uniform(-50.0, 50.0, settings.cloud_size)
+            bufs.append(pc)
+        return bufs
+
+    if kind == "message":
+        return [{"stamp": 0.0,
+                 "values": rng.uniform(-1.0, 1.0, 16),
+                 "payload": rng.integers(0, 256, settings.message_size,
+                                         dtype=np.uint8)}
+                for _ in range(NUM_BUFFERS)]
+
+    return []
+
+
+class SyntheticConnector(ConnectorBase):
+    """
+    Generates synthetic data for all sources with the given prefix.
+
+    The benchmark harness puts one instance in place of each real
+    connector, so that configs run unchanged without ros2 or structstore.
+    Without the harness, sources below /synthetic can be used directly.
+    """
+
+    def __init__(self, prefix="/synthetic", settings=None):
+
+        super().__init__(prefix)
+
+        if settings is None:
+            settings = SyntheticSettings()
+        self.settings = settings
+
+        self.rng = np.random.default_rng(settings.seed)
+
+    def __savestate__(self):
+
+        return {}
+
+    def get_tf_mat(self, from_frame, to_frame, t):
+
+        return np.eye(4)
+
+    def get_all_tf2_frames(self):
+
+        return [""]
+
+    def update_sources(self, sources):
+
+        now = time.time()
+
+        for key, s in sources.items():
+
+            if not key.startswith(self.prefix):
+                continue
+
+            if s is None:
+                s = SyntheticSource(
+                        key,
+                        self.settings.get_kind(key),
+                        self.settings,
+                        self.rng)
+                sources[key] = s
+
+            s.mod = s.update(now)
+
+            try:
+                s.mod = s.mod or s.mod_requested
+                s.mod_requested = False
+            except AttributeError:
+                pass
@@ -1,10 +1,13 @@
+import math
 import time
 import queue
 import numpy as np
 import imviz as viz
 
 from imdash.views.view_2d import View2DComponent
-from imdash.utils import DataSource, ColorEdit
+from imdash.utils import DataSource, ColorEdit, MEMORY, estimate_size
+from imdash.alignment import StampJoin, JOIN_MODES
+from imdash.timeline import TIMELINE
 
 
 class History2DComp(View2DComponent):
@@ -29,10 +32,19 @@ class History2DComp(View2DComponent):
 
         self.paused = False
 
+        # pairs x and y samples by message stamp instead of arrival
+        self.stamp_join = viz.Selection(JOIN_MODES)
+        self.join_tolerance = 0.05
+        self.joiner = None
+
+        # histories must not have gaps while the view is hidden
+        self.keep_warm = True
+
     def __savestate__(self):
 
         d = self.__dict__.copy()
         del d["history"]
+        del d["joiner"]
 
         return d
 
@@ -52,6 +64,97 @@ class History2DComp(View2DComponent):
                  marker_size=self.marker_size,
                  color=self.color())
 
+    def accumulate(self):
+        """
+        Samples the sources and appends to the history.
+        """
+
+        # while scrubbing, the recorded history is kept as is
+        if self.paused or not TIMELINE.live:
+            return
+
+        mode = self.stamp_join.selected()
+
+        if mode != "off" and self.x_source.path != "":
+            self.accumulate_joined(mode)
+            return
+
+        self.joiner = None
+
+        if not self.y_source.mod():
+            return
+
+        y_data = self.y_source()
+
+        if self.x_source.path == "":
+            if len(self.history) == 0:
+                x_data = 0
+            else:
+                x_data = self.history[-1][0] + 1
+        else:
+            x_data = float(self.x_source())
+
+        self.append(x_data, y_data)
+
+    def accumulate_joined(self, mode):
+
+        if (self.joiner is None
+                or self.joiner.mode != mode
+                or self.joiner.tolerance != self.join_tolerance):
+            self.joiner = StampJoin(mode, self.join_tolerance)
+
+        if self.x_source.mod():
+            self.joiner.push_ref(self.x_source.get_stamp(), float(self.x_source()))
+        if self.y_source.mod():
+            self.joiner.push_other(self.y_source.get_stamp(), float(self.y_source()))
+
+        _, ys, xs = self.joiner.pop_joined()
+        for x_data, y_data in zip(xs, ys):
+            self.append(x_data, y_data)
+
+    def append(self, x_data, y_data):
+
+        if len(self.history) == 0:
+            self.history.append((x_data, y_data))
+        elif x_data - self.history[-1][0] > self.history_step:
+            self.history.append((x_data, y_data))
+        elif self.history[-1][0] > x_data:
+            self.history.clear()
+
+        while len(self.history) > 0 and x_data - self.history[0][0] > self.history_length:
+            self.history.popleft()
+
+    def entry_size(self):
+
+        if len(self.history) == 0:
+            return 0
+
+        return estimate_size(self.history[-1])
+
+    def shrink(self, n_bytes):
+        """
+        Frees memory by halving the resolution of the oldest entries,
+        so the full time range stays visible.
+        """
+
+        entry_size = max(1, self.entry_size())
+        k = min(len(self.history) // 2, int(math.ceil(n_bytes / entry_size)))
+
+        old = [self.history.popleft() for _ in range(2 * k)]
+        self.history.extendleft(reversed(old[::2]))
+
+        return k * entry_size
+
+    def update(self, idx, view):
+
+        self.accumulate()
+
+        MEMORY.report("components",
+                      self.uuid,
+                      len(self.history) * self.entry_size(),
+                      self.label,
+                      self.shrink)
+
     def render(self, idx, view):
 
         for ke in viz.get_key_events():
@@ -66,26 +169,5 @@ class History2DComp(View2DComponent):
                         and ke.mod == viz.MOD_CONTROL):
                     self.paused = not self.paused
 
-        y_data = self.y_source()
-
-        if self.x_source.path == "":
-            if len(self.history) == 0:
-                x_data = 0
-            else:
-                x_data = self.history[-1][0] + 1
-        else:
-            x_data = float(self.x_source())
-
-        if self.y_source.mod() and not self.paused:
-            if len(self.history) == 0:
-                self.history.append((x_data, y_data))
-            elif x_data - self.history[-1][0] > self.history_step:
-                self.history.append((x_data, y_data))
-            elif self.history[-1][0] > x_data:
-                self.history.clear()
-
-            while len(self.history) > 0 and x_data - self.history[0][0] > self.history_length:
-                self.history.popleft()
-
         if len(self.history) > 0:
             self.plot_history(idx)
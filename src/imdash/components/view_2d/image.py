@@ -1,10 +1,124 @@
+import math
 import numpy as np
 import imviz as viz
 
+import matplotlib
+
 from imdash.views.view_2d import View2DComponent
 from imdash.utils import DataSource, ColorEdit
 
 
+# the visible region is aligned to multiples of this many texels,
+# so small pans do not require a new texture upload every frame
+ROI_TILE_SIZE = 64
+
+# value ranges are estimated from at most this many pixels
+RANGE_SAMPLES = 65536
+
+NORMALIZATIONS = ["none", "auto", "fixed", "percentile"]
+COLORMAPS = ["none", "gray", "viridis", "plasma", "inferno", "magma", "turbo", "jet"]
+
+LUT_CACHE = {}
+
+
+def select_pyramid_level(texels_per_pixel, max_level):
+    """
+    Returns the pyramid level at which one texel covers
+    approximately one screen pixel.
+    """
+
+    if not texels_per_pixel >= 2.0:
+        return 0
+
+    return min(max_level, int(math.log2(texels_per_pixel)))
+
+
+def visible_index_range(n, offset, scale, reverse, lim_min, lim_max, align):
+    """
+    Computes the range of image indices along one axis,
+    which is visible between the plot limits lim_min and lim_max.
+
+    If reverse is set, index 0 is drawn at the upper end of the axis.
+    """
+
+    a = (lim_min - offset) / scale
+    b = (lim_max - offset) / scale
+    if reverse:
+        a, b = n - b, n - a
+
+    lo = max(0, int(math.floor(min(a, b) / align)) * align)
+    hi = min(n, int(math.ceil(max(a, b) / align)) * align)
+
+    return lo, max(lo, hi)
+
+
+def index_range_origin(n, lo, hi, offset, scale, reverse):
+    """
+    Returns the plot coordinate, at which the index range [lo, hi)
+    starts, when it is drawn in place of the full axis of length n.
+    """
+
+    if reverse:
+        return offset + (n - hi) * scale
+
+    return offset + lo * scale
+
+
+def get_colormap_lut(name):
+    """
+    Returns a 256 entry uint8-RGBA lookup table for the given colormap.
+    """
+
+    try:
+        return LUT_CACHE[name]
+    except KeyError:
+        cmap = matplotlib.colormaps[name]
+        lut = (cmap(np.linspace(0.0, 1.0, 256)) * 255.0).astype(np.uint8)
+        LUT_CACHE[name] = lut
+        return lut
+
+
+def estimate_value_range(img, mode, percentiles=(1.0, 99.0)):
+    """
+    Estimates the displayed value range from a subsampled image.
+    """
+
+    step = max(1, int(math.sqrt(img.shape[0] * img.shape[1] / RANGE_SAMPLES)))
+    sample = np.asarray(img[::step, ::step], dtype=np.float32)
+    sample = sample[np.isfinite(sample)]
+
+    if sample.size == 0:
+        return 0.0, 1.0
+
+    if mode == "percentile":
+        lo, hi = np.percentile(sample, percentiles)
+    else:
+        lo, hi = sample.min(), sample.max()
+
+    return float(lo), float(hi)
+
+
+def normalize_image(img, lo, hi, tmp=None, out=None):
+    """
+    Maps values in [lo, hi] to uint8, writing into the given buffers.
+    """
+
+    if tmp is None or tmp.shape != img.shape:
+        tmp = np.empty(img.shape, dtype=np.float32)
+    if out is None or out.shape != img.shape:
+        out = np.empty(img.shape, dtype=np.uint8)
+
+    scale = 255.0 / (hi - lo) if hi > lo else 0.0
+
+    np.subtract(img, lo, out=tmp, casting="unsafe")
+    np.multiply(tmp, scale, out=tmp)
+    np.clip(tmp, 0.0, 255.0, out=tmp)
+    np.nan_to_num(tmp, copy=False, nan=0.0)
+    out[...] = tmp
+
+    return tmp, out
+
+
 class Image2DComp(View2DComponent):
 
     DISPLAY_NAME = "Image"
@@ -23,16 +137,122 @@ class Image2DComp(View2DComponent):
         self.y_scale = 1.0
         self.tint = ColorEdit()
 
+        self.auto_downsample = True
+        self.upload_visible_only = True
+
+        self.normalization = viz.Selection(NORMALIZATIONS)
+        self.range_min = 0.0
+        self.range_max = 1.0
+        self.percentile_low = 1.0
+        self.percentile_high = 99.0
+        self.colormap = viz.Selection(COLORMAPS)
+
+        self._img = None
+        self._upload_key = None
+        self._value_range = None
+        self._norm_tmp = None
+        self._norm_out = None
+        self._color_out = None
+
+    def __savestate__(self):
+
+        d = self.__dict__.copy()
+        for k in self.__dict__:
+            if k.startswith("_"):
+                del d[k]
+
+        return d
+
     def __autogui__(self, name, ctx, **kwargs):
 
+        s = self.__savestate__()
+
         viz.push_mod_any()
-        ctx.render(self.__dict__, name)
+        self.__dict__.update(ctx.render(s, name))
         if viz.pop_mod_any():
             self.source.set_mod()
+            self._upload_key = None
+            self._value_range = None
 
-    def render(self, idx, view):
+        return self
+
+    def get_upload_region(self, img, view):
+        """
+        Returns the pyramid level and the index ranges (rows, cols)
+        of the image region, which is actually visible in the plot.
+        """
+
+        h, w = img.shape[:2]
+
+        x_min, y_min, x_max, y_max = viz.get_plot_limits()
+        plot_w, plot_h = viz.get_plot_size()
+
+        ps = view.plot_settings
+        crop = (self.upload_visible_only
+                and not ps.auto_fit_x
+                and not ps.auto_fit_y)
+
+        level = 0
+        if self.auto_downsample and plot_w > 0 and plot_h > 0:
+            tpp_x = (x_max - x_min) / (abs(self.x_scale) * plot_w)
+            tpp_y = (y_max - y_min) / (abs(self.y_scale) * plot_h)
+            max_level = int(math.log2(max(1, min(w, h))))
+            level = select_pyramid_level(min(tpp_x, tpp_y), max_level)
+
+        if not crop:
+            return level, (0, h), (0, w)
+
+        align = ROI_TILE_SIZE * 2**level
+
+        cols = visible_index_range(
+                w, self.x_offset, self.x_scale, self.flip_horizontally,
+                x_min, x_max, align)
+        # implot draws the first row at the top, unless flipped
+        rows = visible_index_range(
+                h, self.y_offset, self.y_scale, not self.flip_vertically,
+                y_min, y_max, align)
+
+        return level, rows, cols
+
+    def map_colors(self, img):
+        """
+        Applies value normalization and the colormap to the given image.
+        """
 
-        img = self.source()
+        norm = self.normalization.selected()
+        cmap = self.colormap.selected()
+
+        if norm == "none" and cmap == "none":
+            return img
+
+        if img.ndim == 3 and img.shape[2] == 1:
+            img = img[:, :, 0]
+        if img.ndim == 3 and (img.shape[2] != 3 or cmap != "none"):
+            # only single channel images can be color mapped
+            return img
+
+        if norm == "none" and img.dtype == np.uint8:
+            out = img
+        else:
+            if norm == "fixed":
+                lo, hi = self.range_min, self.range_max
+            else:
+                lo, hi = self._value_range
+            self._norm_tmp, self._norm_out = normalize_image(
+                    img, lo, hi, self._norm_tmp, self._norm_out)
+            out = self._norm_out
+
+        if cmap == "none":
+            return out
+
+        lut = get_colormap_lut(cmap)
+        if self._color_out is None or self._color_out.shape[:2] != out.shape:
+            self._color_out = np.empty((*out.shape, 4), dtype=np.uint8)
+        np.take(lut, out, axis=0, out=self._color_out)
+
+        return self._color_out
+
+    def render(self, idx, view):
 
         if self.flip_vertically and self.flip_horizontally:
             uv0 = [1.0, 1.0]
@@ -47,7 +267,51 @@ class Image2DComp(View2DComponent):
             uv0 = [0.0, 0.0]
             uv1 = [1.0, 1.0]
 
-        skip_upload = not self.source.mod()
+        source_mod = self.source.mod()
+        if source_mod or self._img is None:
+            self._img = self.source()
+            self._value_range = None
+
+        if self._value_range is None:
+            norm = self.normalization.selected()
+            if norm in ("auto", "percentile") or (
+                    norm == "none" and self.colormap.selected() != "none"):
+                self._value_range = estimate_value_range(
+                        self._img,
+                        norm,
+                        (self.percentile_low, self.percentile_high))
+
+        img = self._img
+        h, w = img.shape[:2]
+
+        level, (r0, r1), (c0, c1) = self.get_upload_region(img, view)
+        step = 2**level
+
+        # the texture must be reuploaded, if the source data changed
+        # or if another part of the pyramid is required for display
+        upload_key = (level, r0, r1, c0, c1, img.shape)
+        skip_upload = not source_mod and upload_key == self._upload_key
+        self._upload_key = upload_key
+
+        if r1 - r0 == 0 or c1 - c0 == 0:
+            # not visible at all, nothing to upload
+            self._upload_key = None
+            return
+
+        if skip_upload:
+            tex = img
+        elif level == 0 and (r1 - r0, c1 - c0) == (h, w):
+            tex = self.map_colors(img)
+        else:
+            # strided subsampling is much cheaper than filtering and
+            # the gpu still generates smooth mipmaps from the result
+            tex = self.map_colors(img[r0:r1:step, c0:c1:step])
+            tex = np.ascontiguousarray(tex)
+
+        x = index_range_origin(
+                w, c0, c1, self.x_offset, self.x_scale, self.flip_horizontally)
+        y = index_range_origin(
+                h, r0, r1, self.y_offset, self.y_scale, not self.flip_vertically)
 
         flags = viz.PlotImageFlags.NONE
         if self.no_fit:
@@ -58,11 +322,11 @@ class Image2DComp(View2DComponent):
         viz.plot_dummy(item_id)
         viz.plot_image(
             item_id,
-            img,
-            self.x_offset,
-            self.y_offset,
-            img.shape[1] * self.x_scale,
-            img.shape[0] * self.y_scale,
+            tex,
+            x,
+            y,
+            (c1 - c0) * self.x_scale,
+            (r1 - r0) * self.y_scale,
             tint=self.tint(),
             uv0=uv0,
             uv1=uv1,
@@ -2,3 +2,5 @@ from imdash.connectors.connector_base import ConnectorBase
 from imdash.connectors.filesystem_connector import FileSystemConnector, FileSource
 from imdash.connectors.ros2_connector import Ros2Connector, Ros2TopicSource, Ros2Message
 from imdash.connectors.structstore_connector import StructStoreConnector, StructStoreSource
+from imdash.connectors.latency_connector import LatencyConnector, LatencySource
+from imdash.connectors.computed_connector import ComputedConnector, ComputedSource, COMPUTED
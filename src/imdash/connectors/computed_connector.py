@@ -0,0 +1,204 @@
+import traceback
+
+import imviz as viz
+
+from imdash.connectors.connector_base import ConnectorBase
+
+from imdash.utils import DataSource, SelectHook
+
+
+class ComputedSourceRegistry:
+    """
+    Definitions of computed sources by name.
+
+    Python callables are registered once, e.g. by extensions. Expressions
+    are published by the computed sources views in every update phase,
+    so definitions of deleted views disappear by themselves.
+    """
+
+    def __init__(self):
+
+        self.funcs = {}
+        self.exprs = {}
+        self.next_exprs = {}
+
+    def register(self, name, func, inputs=[]):
+        """
+        Registers func as computed source, which is called with the
+        values of the given input source paths, e.g.:
+
+        COMPUTED.register("speed_kmh", lambda v: v * 3.6, ["/ros2/odom/speed"])
+        """
+
+        self.funcs[name] = (func, [DataSource(path="{" + p + "}") for p in inputs])
+
+    def unregister(self, name):
+
+        self.funcs.pop(name, None)
+
+    def publish(self, name, expr):
+
+        self.next_exprs[name] = (None, [expr])
+
+    def swap(self):
+
+        self.exprs = self.next_exprs
+        self.next_exprs = {}
+
+    def get(self, name):
+
+        try:
+            return self.exprs[name]
+        except KeyError:
+            return self.funcs.get(name)
+
+    def names(self):
+
+        return sorted(set(self.exprs) | set(self.funcs))
+
+
+COMPUTED = ComputedSourceRegistry()
+
+
+class ComputedSource:
+
+    def __init__(self, name):
+
+        self.name = name
+
+        # used to detect changes of the definition
+        self.definition = None
+
+        self.data = None
+        self.error = None
+        self.mod = True
+
+
+class ComputedConnector(ConnectorBase):
+    """
+    Provides sources derived from other sources, e.g. {/computed/speed_kmh}.
+
+    Each computed source is evaluated once per change of its inputs and
+    its value is shared by all views. Computed sources may depend on other
+    computed sources, which are evaluated first.
+    """
+
+    # reads the current state of other sources
+    main_thread = True
+
+    def __init__(self):
+
+        super().__init__("/computed")
+
+    def render(self, views, sources_manager):
+
+        if viz.tree_node("computed"):
+
+            names = COMPUTED.names()
+            if len(names) == 0:
+                viz.text("create a computed sources view to define some")
+
+            for name in names:
+                source_path = self.prefix + "/" + name
+
+                viz.tree_node(name, flags=viz.TreeNodeFlags.LEAF
+                                          | viz.TreeNodeFlags.NO_TREE_PUSH_ON_OPEN)
+
+                select_hook = SelectHook(sources_manager, source_path)
+                select_hook.hook(None, name, None)
+
+            viz.tree_pop()
+
+    def get_dependencies(self, inputs):
+
+        deps = []
+        for ds in inputs:
+            for path in ds.get_source_paths():
+                if path.startswith(self.prefix + "/"):
+                    deps.append(path[len(self.prefix)+1:])
+
+        return deps
+
+    def evaluate(self, sources, key, s, done, visiting):
+        """
+        Evaluates the computed source after its dependencies.
+        Returns false if it is part of a dependency cycle.
+        """
+
+        if key in done:
+            return done[key]
+
+        if s is None:
+            s = ComputedSource(key[len(self.prefix)+1:])
+            sources[key] = s
+
+        if key in visiting:
+            return False
+
+        visiting.add(key)
+
+        acyclic = True
+
+        try:
+            mod_requested = s.mod_requested
+            s.mod_requested = False
+        except AttributeError:
+            mod_requested = False
+
+        s.mod = False
+
+        definition = COMPUTED.get(s.name)
+
+        if definition is None:
+            s.data = None
+            s.error = "not defined"
+            s.definition = None
+        else:
+            func, inputs = definition
+
+            for dep in self.get_dependencies(inputs):
+                # this also keeps dependencies alive
+                dep_key = self.prefix + "/" + dep
+                if not self.evaluate(sources, dep_key, sources[dep_key], done, visiting):
+                    acyclic = False
+
+            # missing inputs are created now and may be ready next frame
+            ready = all(s is not None
+                        for ds in inputs
+                        for s in ds.get_used_sources())
+
+            definition_key = (func, tuple(ds.path for ds in inputs))
+
+            if not acyclic:
+                s.data = None
+                s.error = "cyclic dependency"
+                s.definition = None
+            elif ready and (definition_key != s.definition
+                          or mod_requested
+                          or any(ds.mod() for ds in inputs)):
+                s.definition = definition_key
+                try:
+                    values = [ds() for ds in inputs]
+                    s.data = values[0] if func is None else func(*values)
+                    s.error = None
+                except Exception:
+                    s.data = None
+                    s.error = traceback.format_exc()
+                s.mod = True
+
+        visiting.discard(key)
+        done[key] = acyclic
+
+        return acyclic
+
+    def update_sources(self, sources):
+
+        COMPUTED.swap()
+
+        done = {}
+
+        computed = [(k, s) for k, s in sources.items()
+                    if k.startswith(self.prefix + "/")]
+
+        for key, s in computed:
+            self.evaluate(sources, key, s, done, set())
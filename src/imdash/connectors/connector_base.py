@@ -6,6 +6,11 @@ class ConnectorBase:
     Thus, child classes don't need to be instantiated explicity.
     """
 
+    # if set, the connector is always updated on the render loop,
+    # even if the other connectors run on the update thread,
+    # declared on the class, as not every connector calls __init__
+    main_thread = False
+
     def __init__(self, prefix):
         # this prefix must be added to the source paths of this connector
         # it is used to select the respective connector type
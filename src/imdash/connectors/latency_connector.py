@@ -0,0 +1,97 @@
+import imviz as viz
+import objtoolbox as otb
+
+from imdash.connectors.connector_base import ConnectorBase
+
+from imdash.utils import SelectHook, LATENCY
+
+
+class LatencySource:
+
+    def __init__(self, tracked_key, sub_path):
+
+        self.tracked_key = tracked_key
+        self.sub_path = sub_path
+
+        self.data = None
+
+        self.count = -1
+        self.mod = True
+
+
+class LatencyConnector(ConnectorBase):
+    """
+    Exposes the statistics of the latency tracker as sources,
+    e.g. {/latency/ros2/topics/points/total/mean}.
+    """
+
+    def __init__(self):
+
+        super().__init__("/latency")
+
+    def match_tracked_key(self, path):
+
+        matches = [k for k in LATENCY.keys()
+                   if path == k or path.startswith(k + "/")]
+        if len(matches) == 0:
+            return None
+
+        return max(matches, key=len)
+
+    def render(self, views, sources_manager):
+
+        if viz.tree_node("latency"):
+
+            if not LATENCY.enabled:
+                viz.text("enable Settings > Latency tracking")
+
+            for k in LATENCY.keys():
+                source_path = self.prefix + k
+                tree_open = viz.tree_node(k)
+
+                select_hook = SelectHook(sources_manager, source_path)
+                select_hook.hook(None, k, None)
+
+                if tree_open:
+                    agc = viz.AutoguiContext()
+                    agc.post_header_hooks.append(select_hook.hook)
+                    agc.render(LATENCY.stats(k))
+                    viz.tree_pop()
+
+            viz.tree_pop()
+
+    def update_sources(self, sources):
+
+        for key, s in sources.items():
+
+            if not key.startswith(self.prefix + "/"):
+                continue
+
+            if s is None:
+                path = key[len(self.prefix):]
+                tracked_key = self.match_tracked_key(path)
+                if tracked_key is None:
+                    continue
+                s = LatencySource(
+                        tracked_key,
+                        otb.to_path_list(path[len(tracked_key):]))
+                sources[key] = s
+
+            count = LATENCY.counts.get(s.tracked_key, 0)
+
+            try:
+                s.mod = count != s.count or s.mod_requested
+                s.mod_requested = False
+            except AttributeError:
+                s.mod = count != s.count
+
+            if not s.mod:
+                continue
+
+            s.count = count
+
+            try:
+                s.data = otb.get_value_by_path(
+                        LATENCY.stats(s.tracked_key), s.sub_path)
+            except (KeyError, IndexError, TypeError):
+                s.data = None
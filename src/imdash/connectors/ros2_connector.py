@@ -30,7 +30,8 @@ from pydoc import locate
 
 from imdash.connectors.connector_base import ConnectorBase
 
-from imdash.utils import SelectHook
+from imdash.utils import SelectHook, LATENCY, FRAME_PACER
+from imdash.object_browser import ObjectBrowserContext
 
 
 class Ros2Message:
@@ -39,6 +40,7 @@ class Ros2Message:
 
         self.recv_time = None
         self.stamp_time = None
+        self.decode_time = None
         self.delay = None
         self.msg = None
         self.numpy = None
@@ -86,7 +88,8 @@ class Ros2TopicSource:
         self.node.destroy_subscription(self.subscriber)
 
     def receive_msg(self, msg):
-        self.queue.append(msg)
+        self.queue.append((time.time(), msg))
+        FRAME_PACER.wake()
 
     @property
     def data(self):
@@ -105,7 +108,7 @@ class Ros2TopicSource:
     def render(self):
 
         if self.last_msg is not None:
-            viz.autogui(self.last_msg, "last_msg")
+            ObjectBrowserContext().render(self.last_msg, "last_msg")
 
 
 class Ros2Connector(Node, ConnectorBase):
@@ -284,7 +287,7 @@ class Ros2Connector(Node, ConnectorBase):
                         last_msg = {}
                     else:
                         last_msg = src.last_msg.msg
-                    agc = viz.AutoguiContext()
+                    agc = ObjectBrowserContext()
                     agc.post_header_hooks.append(select_hook.hook)
                     agc.render(last_msg)
                     viz.tree_pop()
@@ -347,13 +350,15 @@ class Ros2Connector(Node, ConnectorBase):
             topic_type = s.subscriber.msg_type
 
             try:
-                ros_msg = deserialize_message(s.queue.pop(), topic_type)
+                recv_time, raw_msg = s.queue.pop()
             except IndexError:
                 continue
 
+            ros_msg = deserialize_message(raw_msg, topic_type)
+
             msg = Ros2Message()
             msg.msg = ros_msg
-            msg.recv_time = time.time()
+            msg.recv_time = recv_time
 
             if hasattr(ros_msg, "header"):
                 msg.stamp_time = (ros_msg.header.stamp.sec
@@ -365,5 +370,8 @@ class Ros2Connector(Node, ConnectorBase):
             if topic_type == PointCloud2:
                 msg.numpy = ros2_numpy.numpify(ros_msg)
 
+            msg.decode_time = time.time()
+            LATENCY.mark_ingest(key, msg.stamp_time, msg.recv_time, msg.decode_time)
+
             s.last_msg = msg
             s.mod = True
@@ -16,6 +16,7 @@ except ImportError:
 from imdash.connectors.connector_base import ConnectorBase
 
 from imdash.utils import SelectHook
+from imdash.object_browser import ObjectBrowserContext
 
 
 @contextmanager
@@ -105,7 +106,7 @@ class StructStoreConnector(ConnectorBase):
 
                 select_hook = SelectHook(sources_manager, "")
 
-                agc = viz.AutoguiContext()
+                agc = ObjectBrowserContext()
                 agc.post_header_hooks.append(select_hook.hook)
 
                 for shm_path in os.listdir(self.shm_dir):
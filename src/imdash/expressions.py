@@ -0,0 +1,349 @@
+"""
+Compiler for source expressions.
+
+Expressions are parsed and compiled once into functions, which are cached
+by their text. In restricted mode the syntax tree is validated first, so
+that shared configs cannot run arbitrary code. Only arithmetic, comparisons,
+attribute access, indexing, comprehensions and calls of whitelisted
+functions and methods are allowed.
+"""
+
+import ast
+import math
+import time
+import builtins
+
+import numpy as np
+
+
+NP_FUNCS = [
+    "abs", "absolute", "sqrt", "square", "exp", "log", "log10", "log2",
+    "sin", "cos", "tan", "arcsin", "arccos", "arctan", "arctan2",
+    "sinh", "cosh", "tanh", "hypot", "deg2rad", "rad2deg", "degrees", "radians",
+    "floor", "ceil", "round", "rint", "clip", "sign", "mod", "fmod",
+    "minimum", "maximum", "min", "max", "amin", "amax",
+    "mean", "median", "std", "var", "sum", "prod", "cumsum", "cumprod",
+    "diff", "gradient", "dot", "cross", "outer", "matmul", "interp",
+    "histogram", "percentile", "quantile", "unwrap",
+    "array", "asarray", "zeros", "ones", "full", "zeros_like", "ones_like",
+    "full_like", "arange", "linspace", "eye", "stack", "hstack", "vstack",
+    "concatenate", "reshape", "transpose", "where", "argmin", "argmax",
+    "sort", "argsort", "isnan", "isfinite", "isinf", "nan_to_num",
+    "any", "all", "count_nonzero", "nonzero", "logical_and", "logical_or",
+    "logical_not", "float32", "float64", "int32", "int64", "uint8", "bool_",
+    "pi", "e", "inf", "nan", "newaxis",
+    "linalg.norm", "linalg.inv", "linalg.det", "linalg.eig", "linalg.svd",
+    "linalg.pinv", "fft.fft", "fft.rfft", "fft.fftfreq", "fft.rfftfreq",
+]
+
+STREAM_FUNCS = [
+    "ema", "rolling", "diff", "rate", "decimate", "resample", "histogram"
+]
+
+TIME_FUNCS = ["time", "monotonic", "perf_counter"]
+
+MATH_FUNCS = [
+    "sqrt", "exp", "log", "log10", "log2", "log1p", "expm1", "pow",
+    "sin", "cos", "tan", "asin", "acos", "atan", "atan2",
+    "sinh", "cosh", "tanh", "asinh", "acosh", "atanh",
+    "hypot", "degrees", "radians", "floor", "ceil", "trunc", "fabs", "fmod",
+    "copysign", "isnan", "isinf", "isfinite", "isclose", "fsum", "prod",
+    "factorial", "gcd", "dist", "pi", "e", "tau", "inf", "nan",
+]
+
+# allowed attributes of modules, only these names may refer to modules
+MODULE_ATTRS = {
+    "np": set(NP_FUNCS),
+    "math": set(MATH_FUNCS),
+    "time": set(TIME_FUNCS),
+    "stream": set(STREAM_FUNCS),
+}
+
+SAFE_BUILTINS = [
+    "abs", "min", "max", "len", "float", "int", "bool", "round", "sum",
+    "list", "tuple", "dict", "str", "range", "enumerate", "zip", "sorted",
+    "reversed", "any", "all", "True", "False", "None",
+]
+
+# methods, which can be called on data values
+DATA_METHODS = {
+    "astype", "reshape", "tolist", "copy", "flatten", "ravel", "transpose",
+    "item", "mean", "sum", "min", "max", "std", "var", "any", "all", "clip",
+    "round", "argmax", "argmin", "cumsum", "dot", "squeeze", "conj",
+    "keys", "values", "items", "get", "index", "count",
+    "split", "strip", "lower", "upper", "startswith", "endswith",
+}
+
+ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare,
+    ast.IfExp, ast.Constant, ast.Name, ast.Load, ast.Store, ast.Attribute,
+    ast.Subscript, ast.Slice, ast.Tuple, ast.List, ast.Dict, ast.Call,
+    ast.keyword, ast.ListComp, ast.GeneratorExp, ast.comprehension,
+    ast.JoinedStr, ast.FormattedValue,
+    ast.operator, ast.unaryop, ast.cmpop, ast.boolop,
+    # subscripts are wrapped in these before python 3.9
+    getattr(ast, "Index", ()), getattr(ast, "ExtSlice", ()),
+)
+
+
+class ExpressionError(Exception):
+    pass
+
+
+def get_dotted_path(node):
+    """
+    Returns e.g. "np.linalg.norm" for attribute chains on a name, else None.
+    """
+
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+
+    if not isinstance(node, ast.Name):
+        return None
+
+    parts.append(node.id)
+
+    return ".".join(reversed(parts))
+
+
+class Validator(ast.NodeVisitor):
+
+    def __init__(self, names):
+
+        self.names = set(names)
+
+    def check_module_attr(self, path, node):
+
+        root, _, attr = path.partition(".")
+
+        if attr not in MODULE_ATTRS[root]:
+            raise ExpressionError(f"\"{path}\" is not allowed (col {node.col_offset})")
+
+    def generic_visit(self, node):
+
+        if not isinstance(node, ALLOWED_NODES):
+            raise ExpressionError(
+                    f"{type(node).__name__} is not allowed"
+                    + f" (col {getattr(node, 'col_offset', 0)})")
+
+        super().generic_visit(node)
+
+    def visit_comprehension(self, node):
+
+        for n in ast.walk(node.target):
+            # e.g. "for x.y in ..." would assign attributes
+            if not isinstance(n, (ast.Name, ast.Tuple, ast.List, ast.Store)):
+                raise ExpressionError("only names can be assigned")
+            if isinstance(n, ast.Name):
+                # e.g. "for math in ..." would hide the module checks
+                if n.id in RESERVED_NAMES or n.id.startswith("_"):
+                    raise ExpressionError(f"\"{n.id}\" cannot be assigned")
+                self.names.add(n.id)
+
+        self.generic_visit(node)
+
+    def visit_ListComp(self, node):
+
+        # targets must be known before the element is checked
+        for gen in node.generators:
+            self.visit(gen)
+        self.visit(node.elt)
+
+    visit_GeneratorExp = visit_ListComp
+
+    def visit_Name(self, node):
+
+        # modules may only be used through their allowed attributes,
+        # otherwise they could be aliased, e.g. "[m for m in [np]]"
+        if node.id in MODULE_ATTRS:
+            raise ExpressionError(f"module \"{node.id}\" can only be used"
+                                  + " through its allowed attributes")
+
+        if node.id not in self.names:
+            raise ExpressionError(f"name \"{node.id}\" is not allowed")
+
+    def visit_Attribute(self, node):
+
+        if node.attr.startswith("_"):
+            raise ExpressionError(
+                    f"private attribute \"{node.attr}\" is not allowed")
+
+        path = get_dotted_path(node)
+        if path is not None and path.split(".")[0] in MODULE_ATTRS:
+            self.check_module_attr(path, node)
+        else:
+            self.visit(node.value)
+
+    def visit_Call(self, node):
+
+        func = node.func
+
+        if isinstance(func, ast.Name):
+            if func.id not in SAFE_BUILTINS:
+                raise ExpressionError(f"calling \"{func.id}\" is not allowed")
+        elif isinstance(func, ast.Attribute):
+            path = get_dotted_path(func)
+            if path is not None and path.split(".")[0] in MODULE_ATTRS:
+                self.visit(func)
+            elif func.attr not in DATA_METHODS:
+                raise ExpressionError(f"calling \"{func.attr}\" is not allowed")
+            else:
+                self.visit(func.value)
+        else:
+            raise ExpressionError("only functions and methods can be called")
+
+        for a in node.args:
+            self.visit(a)
+        for k in node.keywords:
+            self.visit(k.value)
+
+
+def get_field(obj, name):
+    """
+    Attribute access outside of calls in restricted expressions.
+
+    Methods cannot be taken as values, otherwise whitelisted functions
+    could call them, e.g. "max(x, key=__alt__.append)".
+    """
+
+    value = getattr(obj, name)
+
+    if callable(value):
+        raise ExpressionError(f"\"{name}\" can only be called directly")
+
+    return value
+
+
+class FieldAccess(ast.NodeTransformer):
+    """
+    Replaces attribute loads, which are not called directly and
+    not module attributes, by calls of get_field.
+    """
+
+    def visit_Call(self, node):
+
+        if isinstance(node.func, ast.Attribute):
+            node.func.value = self.visit(node.func.value)
+        else:
+            node.func = self.visit(node.func)
+
+        node.args = [self.visit(a) for a in node.args]
+        node.keywords = [self.visit(k) for k in node.keywords]
+
+        return node
+
+    def visit_Attribute(self, node):
+
+        path = get_dotted_path(node)
+        if path is not None and path.split(".")[0] in MODULE_ATTRS:
+            return node
+
+        node.value = self.visit(node.value)
+
+        if not isinstance(node.ctx, ast.Load):
+            return node
+
+        return ast.copy_location(ast.Call(
+            func=ast.Name(id="__field__", ctx=ast.Load()),
+            args=[node.value, ast.Constant(value=node.attr)],
+            keywords=[]), node)
+
+
+def import_numpy(name, *args, **kwargs):
+    """
+    Numpy methods import their internals lazily through the builtins
+    of the calling expression, so only numpy modules can be imported.
+    """
+
+    if name != "numpy" and not name.startswith("numpy."):
+        raise ImportError(f"importing \"{name}\" is not allowed")
+
+    return builtins.__import__(name, *args, **kwargs)
+
+
+# names, which must not be rebound in expressions
+RESERVED_NAMES = set(MODULE_ATTRS) | set(SAFE_BUILTINS)
+
+RESTRICTED_GLOBALS = {
+    "np": np,
+    "math": math,
+    "time": time,
+    "__field__": get_field,
+    "__builtins__": {
+        **{k: getattr(builtins, k) for k in SAFE_BUILTINS},
+        "__import__": import_numpy,
+    },
+}
+
+
+class CompiledExpression:
+
+    def __init__(self, func=None, error=None):
+
+        self.func = func
+        self.error = error
+
+        # source paths in order of the function arguments
+        self.paths = []
+
+
+def compile_expression(expr, args, global_vars, restricted=True):
+    """
+    Compiles expr into a function of the given argument names.
+    Errors are returned as part of the result instead of being raised.
+    """
+
+    try:
+        tree = ast.parse(expr.strip(), mode="eval")
+    except SyntaxError as e:
+        return CompiledExpression(error=f"syntax error: {e.msg} (col {e.offset})")
+
+    if restricted:
+        try:
+            Validator(list(args) + SAFE_BUILTINS).visit(tree)
+        except ExpressionError as e:
+            return CompiledExpression(error=str(e))
+        global_vars = {**global_vars, **RESTRICTED_GLOBALS}
+
+    # the expression is known to be a single expression at this point
+    lambda_code = f"lambda {', '.join(args)}: ({expr.strip()}\n)"
+
+    try:
+        if restricted:
+            code = ast.fix_missing_locations(
+                    FieldAccess().visit(ast.parse(lambda_code, mode="eval")))
+        else:
+            code = lambda_code
+        func = eval(compile(code, "<expression>", "eval"), global_vars)
+    except SyntaxError as e:
+        return CompiledExpression(error=f"syntax error: {e.msg}")
+
+    return CompiledExpression(func=func)
+
+
+class ExpressionCache:
+    """
+    Bounded cache of compiled expressions.
+    """
+
+    def __init__(self, max_size=4096):
+
+        self.max_size = max_size
+        self.entries = {}
+
+    def get(self, key, compile_func):
+
+        try:
+            return self.entries[key]
+        except KeyError:
+            pass
+
+        if len(self.entries) >= self.max_size:
+            self.entries.clear()
+
+        res = compile_func()
+        self.entries[key] = res
+
+        return res
@@ -1,9 +1,11 @@
 import os
 import sys
+import json
 import time
 import copy
 import glob
 import shutil
+import threading
 
 import numpy as np
 import imviz as viz
@@ -11,6 +13,7 @@ import objtoolbox as otb
 
 import imdash.utils as utils
 from imdash.connectors import ConnectorBase
+from imdash.timeline import TIMELINE
 
 from PIL import Image
 
@@ -27,14 +30,54 @@ class GlobalConfig:
         self.menu_file_path = "./"
         self.last_config_path = None
 
+        # stored here, so that shared configs cannot disable it
+        self.restricted_expressions = True
+
 
 class SourcesManager:
+    """
+    Holds all sources and updates them through the connectors.
+
+    In threaded mode the connectors update a separate set of sources on
+    an own thread. After each round, changed sources are published as
+    shallow copies. The render loop picks up the latest published state
+    at the start of each frame, with the mod flags of all rounds since
+    the last frame combined. New, dead and mod requested sources are
+    handed to the update thread in the other direction.
+    """
 
     def __init__(self, *args, **kwargs):
 
         self.sources = {}
         self.is_alive = {}
 
+        self.paused = False
+        self.update_rate = 100.0
+
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+
+        # only accessed by the update thread
+        self.back_sources = {}
+
+        # exchanged under lock
+        self.published = {}
+        self.published_mods = set()
+        self.version = 0
+        self.key_ops = {}
+        self.requested_mods = set()
+
+        # only accessed by the render loop
+        self.front_version = 0
+        self.front_key_ops = {}
+
+        # recorded sources, which are shown instead of the live ones
+        self.overlay = None
+
+        # key -> (estimated size, time of estimation)
+        self.source_sizes = {}
+
         self.last_selected = ""
 
         self.dialog_requested = False
@@ -52,6 +95,8 @@ class SourcesManager:
 
     def reinit(self):
 
+        self.stop_thread()
+
         self.sources = {}
         self.is_alive = {}
 
@@ -70,10 +115,217 @@ class SourcesManager:
         self.selection_callback(selection)
         viz.set_mod(True)
 
-    def update(self):
+    def set_threaded(self, threaded, update_rate):
+
+        self.update_rate = max(1.0, update_rate)
+
+        if threaded and self.thread is None:
+            self.start_thread()
+        elif not threaded and self.thread is not None:
+            self.stop_thread()
+
+    def start_thread(self):
+
+        # the update thread takes ownership of the sources of its connectors,
+        # the render loop continues on copies and never touches these
+        main_prefixes = tuple(c.prefix + "/" for c in self.connectors
+                              if c.main_thread)
+        self.back_sources = {}
+        self.published = {}
+        for k, v in self.sources.items():
+            if v is None or k.startswith(main_prefixes):
+                self.back_sources[k] = None
+                continue
+            self.back_sources[k] = v
+            self.published[k] = copy.copy(v)
+            self.sources[k] = self.published[k]
+        self.published_mods = set()
+        self.key_ops = {}
+        self.requested_mods = set()
+        self.front_key_ops = {}
+
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.update_task, daemon=True)
+        self.thread.start()
+
+    def stop_thread(self):
+
+        if self.thread is None:
+            return
+
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+
+        # hand the original sources back to the render loop
+        for k, v in self.back_sources.items():
+            if v is None:
+                continue
+            if k in self.sources:
+                self.sources[k] = v
+            else:
+                try:
+                    v.cleanup()
+                except AttributeError:
+                    pass
+
+        self.back_sources = {}
+        self.published = {}
+
+    def update_connectors(self, sources, main_thread=False):
+
+        prof = utils.PROFILER
 
         for con in self.connectors:
-            con.update_sources(self)
+            if con.main_thread != main_thread:
+                continue
+            if prof.enabled:
+                t = time.perf_counter()
+                con.update_sources(sources)
+                prof.add("connectors", con.prefix,
+                         time.perf_counter() - t)
+            else:
+                con.update_sources(sources)
+
+    def update_task(self):
+
+        back = self.back_sources
+
+        while not self.stop_event.is_set():
+
+            start_time = time.perf_counter()
+
+            with self.lock:
+                key_ops = self.key_ops
+                self.key_ops = {}
+                requested_mods = self.requested_mods
+                self.requested_mods = set()
+                paused = self.paused
+
+            for k, add in key_ops.items():
+                if add:
+                    back.setdefault(k, None)
+                else:
+                    s = back.pop(k, None)
+                    try:
+                        s.cleanup()
+                    except AttributeError:
+                        pass
+
+            for k in requested_mods:
+                s = back.get(k)
+                if s is not None:
+                    s.mod_requested = True
+
+            if not paused:
+                self.update_connectors(back)
+
+            with self.lock:
+                for k in key_ops:
+                    if k not in back:
+                        self.published.pop(k, None)
+                num_mods = len(self.published_mods)
+                for k, s in back.items():
+                    if s is None:
+                        continue
+                    if getattr(s, "mod", True) or k not in self.published:
+                        self.published[k] = copy.copy(s)
+                        self.published_mods.add(k)
+                new_data = len(self.published_mods) > num_mods
+                self.version += 1
+
+            if new_data:
+                utils.FRAME_PACER.wake()
+
+            self.stop_event.wait(max(0.0,
+                1.0 / self.update_rate - (time.perf_counter() - start_time)))
+
+    def swap(self):
+
+        # mod requests on the published copies must reach the originals
+        requested_mods = []
+        for k, s in self.sources.items():
+            if getattr(s, "mod_requested", False):
+                s.mod_requested = False
+                requested_mods.append(k)
+
+        with self.lock:
+            self.key_ops.update(self.front_key_ops)
+            self.requested_mods.update(requested_mods)
+            if self.version == self.front_version:
+                published = None
+            else:
+                published = dict(self.published)
+                published_mods = self.published_mods
+                self.published_mods = set()
+                self.front_version = self.version
+
+        self.front_key_ops = {}
+
+        for s in self.sources.values():
+            if s is not None:
+                s.mod = False
+
+        if published is None:
+            return
+
+        for k in self.sources:
+            try:
+                s = published[k]
+            except KeyError:
+                continue
+            s.mod = k in published_mods
+            self.sources[k] = s
+
+    def update(self):
+
+        if self.thread is not None:
+            self.swap()
+        elif not self.paused:
+            self.update_connectors(self)
+
+        if not self.paused:
+            self.update_connectors(self, main_thread=True)
+
+    def update_views(self, views):
+        """
+        Runs the update phase of all views on the current sources.
+        """
+
+        for v in views.values():
+            if not v.destroyed:
+                v.update(self)
+
+    def account_memory(self):
+        """
+        Reports the sizes of all sources, which are estimated again
+        after modifications, but at most once per second.
+        """
+
+        now = time.time()
+        sizes = {}
+
+        for k, s in self.sources.items():
+            if s is None:
+                continue
+            size, t = self.source_sizes.get(k, (None, 0.0))
+            if size is None or (getattr(s, "mod", False) and now - t > 1.0):
+                try:
+                    size = utils.estimate_size(getattr(s, "data", None))
+                except Exception:
+                    size = 0
+                t = now
+            sizes[k] = (size, t)
+            utils.MEMORY.report("sources", k, size)
+
+        self.source_sizes = sizes
+
+    def any_mod(self):
+
+        # sources without mod flag cannot tell, so they do not count
+        return any(getattr(s, "mod", False)
+                   for s in self.sources.values()
+                   if s is not None)
 
     def render_selection_dialog(self):
 
@@ -105,6 +357,9 @@ class SourcesManager:
         for k, v in self.sources.items():
             if self.is_alive[k]:
                 new_sources[k] = v
+            elif self.thread is not None:
+                # cleanup happens on the update thread
+                self.front_key_ops[k] = False
             else:
                 try:
                     v.cleanup()
@@ -132,9 +387,17 @@ class SourcesManager:
         except KeyError:
             self.sources[key] = default_init()
             val = self.sources[key]
+            if self.thread is not None:
+                self.front_key_ops[key] = True
 
         self.is_alive[key] = True
 
+        if self.overlay is not None:
+            try:
+                return self.overlay[key]
+            except KeyError:
+                pass
+
         return val
 
     def __delitem__(self, key):
@@ -147,9 +410,139 @@ class SourcesManager:
         return key in self.sources
 
 
+class UndoHistory:
+    """
+    Stores undo snapshots of all views as serialized records.
+
+    Consecutive snapshots share the strings of all unchanged views and
+    components, so each snapshot only costs the memory of what changed.
+    Only views known to be changed are serialized again. The number of
+    snapshots is bounded by memory instead of by count.
+    """
+
+    def __init__(self, views, memory_budget=64.0 * 2**20):
+
+        self.memory_budget = memory_budget
+
+        self.snapshots = []
+        self.position = -1
+
+        # id of each stored string -> number of references,
+        # the strings themselves are kept alive by the snapshots
+        self.refs = {}
+        self.usage = 0
+
+        self.push(views)
+
+    def make_snapshot(self, views, changed=None):
+        """
+        Serializes views into a snapshot. If the keys of the changed views
+        are given, all other views are taken over from the current snapshot.
+        """
+
+        if self.position >= 0:
+            prev = self.snapshots[self.position]
+        else:
+            prev = {}
+
+        snap = {}
+
+        for k, v in views.items():
+            if changed is not None and k not in changed and k in prev:
+                snap[k] = prev[k]
+                continue
+
+            view_str, comp_strs = utils.serialize_view(v)
+            try:
+                prev_view_str, prev_comp_strs = prev[k]
+            except KeyError:
+                snap[k] = (view_str, comp_strs)
+                continue
+
+            # reuse identical strings of the previous snapshot
+            if view_str == prev_view_str:
+                view_str = prev_view_str
+            if comp_strs is not None and prev_comp_strs is not None:
+                prev_comps = dict(prev_comp_strs)
+                comp_strs = tuple(
+                        (c_uuid, prev_comps[c_uuid]
+                         if prev_comps.get(c_uuid) == c_str else c_str)
+                        for c_uuid, c_str in comp_strs)
+
+            snap[k] = (view_str, comp_strs)
+
+        return snap
+
+    def count_refs(self, snap, inc):
+
+        for view_str, comp_strs in snap.values():
+            for s in [view_str] + [c_str for _, c_str in comp_strs or ()]:
+                n = self.refs.get(id(s), 0)
+                if n == 0:
+                    self.usage += len(s)
+                n += inc
+                if n == 0:
+                    del self.refs[id(s)]
+                    self.usage -= len(s)
+                else:
+                    self.refs[id(s)] = n
+
+    def memory_usage(self):
+
+        return self.usage
+
+    def push(self, views, changed=None):
+
+        snap = self.make_snapshot(views, changed)
+
+        for dropped in self.snapshots[self.position+1:]:
+            self.count_refs(dropped, -1)
+        self.snapshots = self.snapshots[:self.position+1]
+
+        self.snapshots.append(snap)
+        self.count_refs(snap, 1)
+        self.position = len(self.snapshots) - 1
+
+        while (len(self.snapshots) > 2
+                and self.usage > self.memory_budget):
+            self.count_refs(self.snapshots.pop(0), -1)
+            self.position -= 1
+
+    def current(self):
+
+        return self.snapshots[self.position]
+
+    def can_undo(self):
+
+        return self.position > 0
+
+    def can_redo(self):
+
+        return self.position < len(self.snapshots) - 1
+
+    def restore(self, views, position):
+
+        position = max(0, min(len(self.snapshots) - 1, position))
+
+        current = self.snapshots[self.position]
+        target = self.snapshots[position]
+        self.position = position
+
+        return {k: utils.deserialize_view(rec, views.get(k), current.get(k))
+                for k, rec in target.items()}
+
+    def undo(self, views):
+
+        return self.restore(views, self.position - 1)
+
+    def redo(self, views):
+
+        return self.restore(views, self.position + 1)
+
+
 class Main:
 
-    def __init__(self):
+    def __init__(self, config_path=None):
 
         res_path = os.path.join(os.path.dirname(
             os.path.realpath(__file__)), "resources")
@@ -175,9 +568,22 @@ class Main:
         # of the original config that was imported
         self.imported_config_hash = None
 
+        # config files are written in the background and
+        # only views which changed since the last write are rewritten
+        self.config_writer = utils.ConfigWriter()
+        self.written_config_path = None
+        self.written_main_str = None
+        self.written_global_config_str = None
+        self.written_records = {}
+
         # tools
         self.screenshot_countdown = -1
+        self.last_frame_time = None
         self.video_recorder = None
+        self.video_codec = "mpeg4"
+        self.video_framerate = 24.0
+        self.video_width = 0
+        self.video_height = 0
 
         # local settings
         self.paused = False
@@ -186,6 +592,19 @@ class Main:
         self.autosave = True
         self.use_light_theme = False
         self.font_size = 20.0
+        self.undo_memory_mb = 64.0
+        self.profiling = False
+        self.latency_tracking = False
+        self.threaded_updates = False
+        self.source_update_rate = 100.0
+        self.adaptive_pacing = False
+        self.idle_frame_rate = 2.0
+        self.max_frame_rate = 60.0
+        self.idle_timeout = 1.0
+        self.timeline_recording = False
+        self.timeline_memory_mb = 256.0
+        self.memory_budget_mb = 2048.0
+        self.undo_history = UndoHistory({})
 
         # initialize global configuration
         self.global_config = GlobalConfig()
@@ -193,7 +612,9 @@ class Main:
         os.makedirs(GLOBAL_CONF_DIR, exist_ok=True)
 
         gc = self.global_config
-        if gc.last_config_path is not None:
+        if config_path is not None:
+            self.open_config(config_path)
+        elif gc.last_config_path is not None:
             self.open_config(gc.last_config_path)
         else:
             self.open_config(DEFAULT_CONF_PATH, True)
@@ -202,8 +623,9 @@ class Main:
         self.last_mod_time = time.time()
         self.save_needed = False
         self.undo_save_needed = False
-        self.undo_stack = [copy.deepcopy(self.views)]
-        self.undo_position = 0
+        self.undo_history = UndoHistory(self.views, self.undo_memory_mb * 2**20)
+        # keys of the views modified since the last undo snapshot
+        self.changed_views = set()
 
     def __savestate__(self):
 
@@ -220,9 +642,15 @@ class Main:
             "last_mod_time",
             "auto_save_needed",
             "undo_save_needed",
-            "undo_stack",
-            "undo_position",
+            "undo_history",
+            "changed_views",
+            "config_writer",
+            "written_config_path",
+            "written_main_str",
+            "written_global_config_str",
+            "written_records",
             "video_recorder",
+            "last_frame_time",
         ]
         for e in exclude:
             try:
@@ -237,16 +665,22 @@ class Main:
         if hasattr(self, "sources_manager"):
             self.sources_manager.reinit()
 
+        for k in list(utils.VIEW_RECORDERS.keys()):
+            utils.stop_view_recording(k)
+
+        TIMELINE.clear()
+
         self.sources_manager = SourcesManager()
         self.views = {}
 
     def open_config(self, path, create_if_not_exists=False):
 
+        self.config_writer.flush()
         self.reinit_views_and_sources()
 
         if not os.path.exists(path) or not os.path.isdir(path):
             if create_if_not_exists:
-                self.save_config(path)
+                self.save_config(path, blocking=True)
             else:
                 self.config_path = None
                 return False
@@ -254,20 +688,77 @@ class Main:
         os.chdir(path)
 
         otb.load(self, path)
+        self.views.update(utils.load_view_files(os.path.join(path, "views")))
         self.config_path = os.path.realpath(path)
         viz.load_ini_from_str(self.window_config)
 
         self.global_config.last_config_path = self.config_path
-        otb.save(self.global_config, GLOBAL_CONF_DIR)
+        self.save_global_config()
 
         viz.set_main_window_pos(self.window_pos)
         viz.set_main_window_size(self.window_size)
 
-        self.undo_stack = [copy.deepcopy(self.views)]
+        self.undo_history = UndoHistory(self.views, self.undo_memory_mb * 2**20)
+        self.changed_views = set()
 
         return True
 
-    def save_config(self, path=None):
+    def write_config(self, path, records):
+        """
+        Queues the config for writing on the background thread.
+        Only views whose records changed since the last write are rewritten.
+        """
+
+        views_dir = os.path.join(path, "views")
+        ext_dir = os.path.join(views_dir, "extern")
+
+        if path != self.written_config_path:
+            self.written_config_path = path
+            self.written_main_str = None
+            # files of unknown state are always rewritten or removed
+            self.written_records = {}
+            if os.path.isdir(views_dir):
+                for f in os.listdir(views_dir):
+                    if f.endswith(".json"):
+                        self.written_records[f[:-len(".json")]] = None
+
+        for k, rec in records.items():
+            if k in self.written_records and self.written_records[k] == rec:
+                continue
+            self.config_writer.write(
+                    os.path.join(views_dir, f"{k}.json"),
+                    lambda rec=rec, k=k: utils.view_record_to_json(
+                        rec, ext_dir, k))
+
+        # clean_extern_arrays returns None, so the view file is removed too
+        for k in self.written_records.keys() - records.keys():
+            self.config_writer.write(
+                    os.path.join(views_dir, f"{k}.json"),
+                    lambda k=k: utils.clean_extern_arrays(ext_dir, k))
+
+        self.written_records = dict(records)
+
+        d = self.__savestate__()
+        del d["views"]
+        main_str = otb.saves(d)
+
+        if main_str != self.written_main_str:
+            self.config_writer.write(
+                    os.path.join(path, "state.json"),
+                    lambda: json.dumps(json.loads(main_str), indent=2))
+            self.written_main_str = main_str
+
+    def save_global_config(self):
+
+        gc_str = otb.saves(self.global_config)
+
+        if gc_str != self.written_global_config_str:
+            self.config_writer.write(
+                    os.path.join(GLOBAL_CONF_DIR, "state.json"),
+                    lambda: json.dumps(json.loads(gc_str), indent=2))
+            self.written_global_config_str = gc_str
+
+    def save_config(self, path=None, records=None, blocking=False):
 
         if path is not None:
             self.config_path = os.path.realpath(path)
@@ -282,18 +773,24 @@ class Main:
         os.chdir(self.config_path)
 
         self.window_config = viz.save_ini_to_str()
-        otb.save(self, self.config_path)
+
+        if records is None:
+            records = self.undo_history.make_snapshot(self.views)
+        self.write_config(self.config_path, records)
 
         self.global_config.last_config_path = self.config_path
-        otb.save(self.global_config, GLOBAL_CONF_DIR)
-        
+        self.save_global_config()
+
+        if blocking:
+            self.config_writer.flush()
+
         self.save_needed = False
 
         return True
 
     def import_config(self, path, overwrite=True):
 
-        import_hash = utils.compute_file_hash(os.path.join(path, "state.json"))
+        import_hash = utils.compute_config_hash(path)
         import_config_path = os.path.join(GLOBAL_CONF_DIR, "config_store", os.path.basename(path))
         config_exists = self.open_config(import_config_path)
 
@@ -312,19 +809,33 @@ class Main:
         os.chdir(path)
 
         self.window_config = viz.save_ini_to_str()
-        otb.save(self, path)
 
-        otb.save(self.global_config, GLOBAL_CONF_DIR)
+        self.write_config(path, self.undo_history.make_snapshot(self.views))
+        self.save_global_config()
+        self.config_writer.flush()
 
         return True
 
     def update_main_window(self):
 
-        if not viz.wait(vsync=self.vsync, powersave=self.powersave):
+        pacer = utils.FRAME_PACER
+        pacer.enabled = self.adaptive_pacing
+        pacer.idle_rate = self.idle_frame_rate
+        pacer.max_rate = self.max_frame_rate
+        pacer.idle_timeout = self.idle_timeout
+
+        if not pacer.wait(self.vsync, self.powersave):
             if self.autosave and self.config_path is not None:
-                self.save_config()
+                self.save_config(blocking=True)
+            self.config_writer.flush()
+            for k in list(utils.VIEW_RECORDERS.keys()):
+                utils.stop_view_recording(k)
             sys.exit(0)
 
+        # the frame rendered in the last update was swapped by viz.wait()
+        utils.LATENCY.mark_swap()
+        utils.LATENCY.set_enabled(self.latency_tracking)
+
         if self.use_light_theme:
             viz.style_colors_light()
         else:
@@ -338,8 +849,10 @@ class Main:
         viz.set_main_window_title(
                 f"{APPLICATION_NAME} - {config_name}"
                 + ("*" if self.save_needed else "")
-                + (" - [RECORDING]" if self.video_recorder is not None else "")
-                + (" - [PAUSED]" if self.paused else ""))
+                + (" - [RECORDING]" if (self.video_recorder is not None
+                                        or len(utils.VIEW_RECORDERS) > 0) else "")
+                + (" - [PAUSED]" if self.paused else "")
+                + (f" - {pacer.rate:.0f} Hz" if pacer.enabled else ""))
 
     def update_tools(self):
 
@@ -355,29 +868,67 @@ class Main:
             frame = viz.get_pixels(0, 0, *viz.get_main_window_size())
             self.video_recorder.record(frame)
 
+        utils.capture_view_recordings()
+
     def update_views_and_sources(self):
 
         utils.DataSource.SOURCES = self.sources_manager
+        utils.DataSource.RESTRICTED = self.global_config.restricted_expressions
+        utils.DataSource.FRAME += 1
 
-        if not self.paused:
-            self.sources_manager.update()
+        self.sources_manager.paused = self.paused
+        self.sources_manager.set_threaded(
+                self.threaded_updates, self.source_update_rate)
+        self.sources_manager.update()
+
+        TIMELINE.memory_budget = self.timeline_memory_mb * 2**20
+        TIMELINE.set_enabled(self.timeline_recording)
+        TIMELINE.record(self.sources_manager)
+        self.sources_manager.overlay = TIMELINE.get_overlay()
 
+        utils.MEMORY.budget = int(self.memory_budget_mb * 2**20)
+        self.sources_manager.account_memory()
+        TIMELINE.account_memory()
+
+        if self.sources_manager.any_mod() or TIMELINE.playing:
+            utils.FRAME_PACER.notify_activity()
+
+        self.sources_manager.update_views(self.views)
         self.sources_manager.reset_liveness()
 
         viz.push_mod_any()
 
         remove_views = []
 
+        prof = utils.PROFILER
+
         for k, v in self.views.items():
             if v.destroyed:
                 remove_views.append(k)
+                continue
+
+            show = v.show
+            viz.push_mod_any()
+
+            if prof.enabled:
+                t = time.perf_counter()
+                v.render(self.sources_manager)
+                prof.add("views", k, time.perf_counter() - t,
+                         getattr(v, "title", type(v).__name__))
             else:
                 v.render(self.sources_manager)
 
+            # closing a window does not count as modification
+            if viz.pop_mod_any() or v.show != show:
+                self.changed_views.add(k)
+
         for k in remove_views:
             viz.set_mod(True)
+            utils.stop_view_recording(k)
             del self.views[k]
 
+        utils.MEMORY.end_frame()
+
     def update_main_menu(self):
 
         if viz.begin_main_menu_bar():
@@ -415,11 +966,11 @@ class Main:
             if viz.begin_menu("Edit"):
                 if viz.menu_item("Undo",
                         shortcut="Ctrl+Z",
-                        enabled=self.undo_position > 0):
+                        enabled=self.undo_history.can_undo()):
                     self.undo_edit()
                 if viz.menu_item("Redo",
                         shortcut="Ctrl+Y",
-                        enabled=self.undo_position < len(self.undo_stack)-1):
+                        enabled=self.undo_history.can_redo()):
                     self.redo_edit()
                 viz.end_menu()
             if viz.begin_menu("Views"):
@@ -436,6 +987,7 @@ class Main:
                     for v in sorted(self.views.values(), key=lambda x: x.title):
                         if viz.menu_item(v.title, selected=v.show):
                             v.show = not v.show
+                            self.changed_views.add(v.uuid)
                     viz.end_menu()
                 viz.end_menu()
             if viz.begin_menu("Tools"):
@@ -457,6 +1009,38 @@ class Main:
                     self.vsync = not self.vsync
                 if viz.menu_item("Powersave", selected=self.powersave):
                     self.powersave = not self.powersave
+                if viz.menu_item("Profiling", selected=self.profiling):
+                    self.profiling = not self.profiling
+                if viz.menu_item("Latency tracking",
+                                 selected=self.latency_tracking):
+                    self.latency_tracking = not self.latency_tracking
+                gc = self.global_config
+                if viz.menu_item("Restricted expressions",
+                                 selected=gc.restricted_expressions):
+                    gc.restricted_expressions = not gc.restricted_expressions
+                    self.save_global_config()
+                if viz.menu_item("Threaded source updates",
+                                 selected=self.threaded_updates):
+                    self.threaded_updates = not self.threaded_updates
+                if self.threaded_updates:
+                    self.source_update_rate = max(1.0, viz.drag(
+                        "Source update rate (Hz)", self.source_update_rate))
+                if viz.menu_item("Timeline recording",
+                                 selected=self.timeline_recording):
+                    self.timeline_recording = not self.timeline_recording
+                if self.timeline_recording:
+                    self.timeline_memory_mb = max(1.0, viz.drag(
+                        "Timeline memory (MB)", self.timeline_memory_mb))
+                if viz.menu_item("Adaptive frame pacing",
+                                 selected=self.adaptive_pacing):
+                    self.adaptive_pacing = not self.adaptive_pacing
+                if self.adaptive_pacing:
+                    self.idle_frame_rate = max(0.1, viz.drag(
+                        "Idle rate (Hz)", self.idle_frame_rate, 0.1))
+                    self.max_frame_rate = max(0.0, viz.drag(
+                        "Max rate (Hz, 0 = unlimited)", self.max_frame_rate))
+                    self.idle_timeout = max(0.0, viz.drag(
+                        "Idle after (s)", self.idle_timeout, 0.1))
                 if viz.menu_item("Autosave",
                                  selected=self.autosave,
                                  enabled=self.config_path is not None):
@@ -464,6 +1048,22 @@ class Main:
                 if viz.menu_item("Use light theme", selected=self.use_light_theme):
                     self.use_light_theme = not self.use_light_theme
                 self.font_size = max(10.0, viz.drag("Font size", self.font_size))
+                self.undo_memory_mb = max(1.0, viz.drag(
+                    "Undo memory (MB)", self.undo_memory_mb))
+                self.memory_budget_mb = max(1.0, viz.drag(
+                    "Memory budget (MB)", self.memory_budget_mb))
+                if viz.begin_menu("Video recording"):
+                    codecs = utils.FfmpegRecorder.CODECS
+                    try:
+                        codec_idx = codecs.index(self.video_codec)
+                    except ValueError:
+                        codec_idx = 0
+                    self.video_codec = codecs[viz.combo("Codec", codecs, codec_idx)]
+                    self.video_framerate = max(1.0, viz.drag(
+                        "Frame rate", self.video_framerate))
+                    self.video_width = max(0, viz.drag("Width (0 = auto)", self.video_width))
+                    self.video_height = max(0, viz.drag("Height (0 = auto)", self.video_height))
+                    viz.end_menu()
                 viz.end_menu()
         viz.end_main_menu_bar()
 
@@ -499,43 +1099,46 @@ class Main:
         now_time = time.time()
 
         if viz.pop_mod_any():
+            utils.FRAME_PACER.notify_activity()
             self.last_mod_time = now_time
             self.undo_save_needed = True
             self.save_needed = True
 
         if now_time - self.last_mod_time > 0.5:
+            if self.undo_save_needed:
+                self.undo_history.memory_budget = self.undo_memory_mb * 2**20
+                self.undo_history.push(self.views, self.changed_views)
+                self.changed_views = set()
+                self.undo_save_needed = False
             if (self.save_needed
                     and self.autosave
                     and self.config_path is not None):
-                self.save_config()
-            if self.undo_save_needed:
-                self.undo_stack = self.undo_stack[:self.undo_position+1]
-                self.undo_stack.append(copy.deepcopy(self.views))
-                self.undo_position += 1
-                self.undo_save_needed = False
-
-        while len(self.undo_stack) > 100:
-            self.undo_stack.pop(0)
+                # the undo snapshot already contains the serialized views
+                self.save_config(records=self.undo_history.current())
 
     def undo_edit(self):
 
-        self.undo_position -= 1
-        self.undo_position = max(0, min(
-            len(self.undo_stack) - 1, self.undo_position))
-        self.views = copy.deepcopy(self.undo_stack[self.undo_position])
+        # edits which are not yet in the history must not get lost on redo
+        if self.undo_save_needed:
+            self.undo_history.push(self.views, self.changed_views)
+            self.changed_views = set()
+            self.undo_save_needed = False
+
+        self.views = self.undo_history.undo(self.views)
 
     def redo_edit(self):
 
-        self.undo_position += 1
-        self.undo_position = max(0, min(
-            len(self.undo_stack) - 1, self.undo_position))
-        self.views = copy.deepcopy(self.undo_stack[self.undo_position])
+        self.views = self.undo_history.redo(self.views)
 
     def start_video_recording(self):
 
         self.video_recorder = utils.FfmpegRecorder(
                 '/tmp/imdash_tmp_recording.mp4',
-                *viz.get_main_window_size()
+                *viz.get_main_window_size(),
+                framerate=self.video_framerate,
+                codec=self.video_codec,
+                out_width=self.video_width,
+                out_height=self.video_height
             )
 
     def finish_video_recording(self):
@@ -619,8 +1222,10 @@ class Main:
             viz.end_popup()
 
         if delete:
+            self.config_writer.flush()
             shutil.rmtree(self.config_path)
             self.config_path = None
+            self.written_config_path = None
             self.global_config.last_config_path = None
             self.reinit_views_and_sources()
 
@@ -633,6 +1238,17 @@ class Main:
 
     def update(self):
 
+        prof = utils.PROFILER
+        if prof.enabled:
+            now = time.perf_counter()
+            if self.last_frame_time is not None:
+                prof.add("frame", "total", now - self.last_frame_time, "Frame")
+            self.last_frame_time = now
+            prof.end_frame()
+        else:
+            self.last_frame_time = None
+        prof.enabled = self.profiling
+
         self.update_main_window()
         self.update_tools()
         self.update_views_and_sources()
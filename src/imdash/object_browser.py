@@ -0,0 +1,337 @@
+"""
+Lazy object browser for large messages.
+
+The autogui only descends into expanded tree nodes, but renders every
+element of an expanded array or sequence. The browser context below keeps
+that behavior for small objects and instead shows a vectorized summary
+(shape, dtype, min, max, mean) for large arrays and raw buffers, e.g. the
+data of images or point clouds, and pages long sequences and dicts.
+
+Summaries and page indices are cached per tree node and dropped once
+their node was not rendered for a frame.
+"""
+
+import copy
+import time
+import array
+import itertools
+
+import numpy as np
+import imviz as viz
+
+from imviz.autogui import list_item_context
+
+from imdash.utils import DataSource
+
+
+# arrays with more elements are summarized instead of rendered elementwise
+SUMMARY_SIZE = 256
+
+# number of elements shown per page
+PAGE_SIZE = 50
+
+# seconds, summaries of a tree node are recomputed at most this often
+SUMMARY_INTERVAL = 1.0
+
+BUFFER_TYPES = (bytes, bytearray, memoryview, array.array)
+
+# tree node id -> (frame, page index)
+PAGES = {}
+
+# tree node id -> (frame, time, shape, summary)
+SUMMARIES = {}
+
+# frame, in which the caches were last pruned
+PRUNE_FRAME = -1
+
+
+def as_array(buf):
+    """
+    Returns a numpy view of a raw buffer without copying.
+    """
+
+    if isinstance(buf, array.array):
+        return np.frombuffer(buf, dtype=buf.typecode)
+    if isinstance(buf, memoryview):
+        return np.asarray(buf)
+
+    return np.frombuffer(buf, dtype=np.uint8)
+
+
+def summarize(arr):
+    """
+    Returns a one line description of arr with vectorized statistics.
+    """
+
+    arr = np.asarray(arr)
+    text = f"shape {list(arr.shape)}, {arr.dtype}"
+
+    if arr.size == 0 or not (np.issubdtype(arr.dtype, np.number)
+                             or arr.dtype == np.bool_):
+        return text
+
+    if arr.dtype == np.bool_:
+        arr = arr.view(np.uint8)
+    elif np.issubdtype(arr.dtype, np.complexfloating):
+        arr = np.abs(arr)
+
+    if np.issubdtype(arr.dtype, np.floating):
+        finite = np.isfinite(arr)
+        n_invalid = arr.size - np.count_nonzero(finite)
+        if n_invalid > 0:
+            text += f", {n_invalid} non-finite"
+            arr = arr[finite]
+            if arr.size == 0:
+                return text
+
+    text += f", min {arr.min():.6g}, max {arr.max():.6g}"
+    text += f", mean {arr.mean(dtype=np.float64):.6g}"
+
+    return text
+
+
+def prune_caches():
+    """
+    Removes the entries of all tree nodes, which were not rendered
+    in the last frame, and returns the current frame.
+    """
+
+    global PRUNE_FRAME
+
+    frame = DataSource.FRAME
+    if frame == PRUNE_FRAME:
+        return frame
+
+    for cache in (PAGES, SUMMARIES):
+        for k in [k for k, v in cache.items() if v[0] < PRUNE_FRAME]:
+            del cache[k]
+
+    PRUNE_FRAME = frame
+
+    return frame
+
+
+def get_summary(node_id, view):
+    """
+    Returns the cached summary of the tree node, which is recomputed
+    if the shape changed or the summary is older than SUMMARY_INTERVAL.
+    """
+
+    frame = prune_caches()
+    now = time.time()
+
+    try:
+        _, t, shape, text = SUMMARIES[node_id]
+        if shape == view.shape and now - t < SUMMARY_INTERVAL:
+            SUMMARIES[node_id] = (frame, t, shape, text)
+            return text
+    except KeyError:
+        pass
+
+    text = summarize(view)
+    SUMMARIES[node_id] = (frame, now, view.shape, text)
+
+    return text
+
+
+class ObjectBrowserContext(viz.AutoguiContext):
+    """
+    Autogui context, which summarizes large arrays and pages long sequences.
+    """
+
+    def get_indices(self, obj):
+
+        # same as the autogui, nested arrays are rendered with their parent
+        # and the indices into it collected in the path
+        indices = tuple(itertools.takewhile(
+                lambda x: isinstance(x[0], int) and type(x[1]) == type(obj),
+                    zip(self.path[::-1], self.parents[::-1])))[::-1]
+
+        return tuple(i[0] for i in indices)
+
+    def begin_node(self, obj, name, shape_label):
+
+        if len(name) == 0:
+            return True
+
+        tree_open = viz.tree_node(f"{name} {shape_label}###{name}")
+        self.call_post_header_hooks(obj, name)
+
+        return tree_open
+
+    def end_node(self, name, tree_open):
+
+        if len(name) > 0 and tree_open:
+            viz.tree_pop()
+
+    def render_pager(self, n):
+        """
+        Renders page controls if needed and returns the range to show.
+        """
+
+        frame = prune_caches()
+
+        node_id = viz.get_id("pages")
+        n_pages = (n - 1) // PAGE_SIZE + 1
+        page = min(PAGES.get(node_id, (frame, 0))[1], n_pages - 1)
+
+        if n_pages > 1:
+            # paging is not a modification of the browsed object
+            viz.push_mod_any()
+            if viz.button("<###prev_page"):
+                page = max(0, page - 1)
+            viz.same_line()
+            if viz.button(">###next_page"):
+                page = min(n_pages - 1, page + 1)
+            viz.same_line()
+            viz.set_next_item_width(viz.get_global_font_size() * 6)
+            page = viz.drag(f"of {n_pages} pages, {n} items###page",
+                            page + 1, 0.1, 1, n_pages) - 1
+            viz.clear_mod_any()
+            viz.pop_mod_any()
+
+        page = max(0, page)
+        PAGES[node_id] = (frame, page)
+
+        return range(page * PAGE_SIZE, min(n, (page + 1) * PAGE_SIZE))
+
+    def render_array(self, obj, name, indices, source=None):
+
+        view = obj[indices] if len(indices) > 0 else obj
+        shape = view.shape
+        dtype = getattr(view, "dtype", "")
+
+        tree_open = self.begin_node(
+                obj if source is None else source, name, f"{list(shape)} {dtype}")
+
+        if tree_open:
+            node_id = viz.get_id("summary")
+            viz.text(get_summary(node_id, view))
+
+            for i in self.render_pager(shape[0]):
+
+                self.path.append(i)
+                self.parents.append(obj)
+
+                if len(shape) == 1:
+                    res = self.render(view[i], str(i))
+                    if viz.mod():
+                        try:
+                            obj[indices + (i,)] = res
+                        except ValueError:
+                            # e.g. views of immutable bytes
+                            pass
+                        if self.path_of_mod_item == []:
+                            self.path_of_mod_item = copy.deepcopy(self.path)
+                else:
+                    # rendered with the parent, like the autogui does
+                    self.render(obj, str(i))
+
+                self.parents.pop()
+                self.path.pop()
+
+        self.end_node(name, tree_open)
+
+        return obj if source is None else source
+
+    def render_sequence(self, obj, name):
+
+        tree_open = self.begin_node(obj, name, f"[{len(obj)}]")
+
+        if tree_open:
+            for i in self.render_pager(len(obj)):
+
+                self.post_header_hooks.append(list_item_context)
+
+                self.path.append(i)
+                self.parents.append(obj)
+
+                viz.push_mod_any()
+                res = self.render(obj[i], str(i))
+
+                if viz.pop_mod_any() and res is not obj[i]:
+                    try:
+                        obj.__setitem__(i, res)
+                    except (AttributeError, TypeError):
+                        pass
+                    if self.path_of_mod_item == []:
+                        self.path_of_mod_item = copy.deepcopy(self.path)
+
+                self.parents.pop()
+                self.path.pop()
+
+            if self.duplicate_item is not None:
+                obj.insert(self.duplicate_item, copy.deepcopy(obj[self.duplicate_item]))
+                viz.set_mod(True)
+                self.duplicate_item = None
+
+            if self.remove_item is not None:
+                del obj[self.remove_item]
+                viz.set_mod(True)
+                self.remove_item = None
+
+        self.end_node(name, tree_open)
+
+        return obj
+
+    def render_dict(self, obj, name):
+
+        tree_open = self.begin_node(obj, name, f"[{len(obj)}]")
+
+        if tree_open:
+            rows = self.render_pager(len(obj))
+            keys = list(itertools.islice(obj.keys(), rows.start, rows.stop))
+
+            for k in keys:
+
+                self.path.append(k)
+                self.parents.append(obj)
+
+                viz.push_mod_any()
+                v = obj[k]
+                new_v = self.render(v, str(k))
+
+                if viz.pop_mod_any() and new_v is not v:
+                    obj[k] = new_v
+                    if self.path_of_mod_item == []:
+                        self.path_of_mod_item = copy.deepcopy(self.path)
+
+                self.parents.pop()
+                self.path.pop()
+
+        self.end_node(name, tree_open)
+
+        return obj
+
+    def render(self, obj, name=""):
+
+        if hasattr(obj, "__autogui__") and not self.ignore_custom:
+            return super().render(obj, name)
+
+        if isinstance(obj, BUFFER_TYPES):
+            if len(obj) > SUMMARY_SIZE:
+                return self.render_array(as_array(obj), name, (), source=obj)
+            return super().render(obj, name)
+
+        if hasattr(obj, "shape") and hasattr(obj, "__getitem__") \
+                and type(obj.shape) == tuple:
+            indices = self.get_indices(obj)
+            shape = obj.shape[len(indices):]
+            if len(shape) > 0 and np.prod(shape) > SUMMARY_SIZE:
+                return self.render_array(obj, name, indices)
+            return super().render(obj, name)
+
+        if isinstance(obj, dict):
+            if len(obj) > PAGE_SIZE:
+                return self.render_dict(obj, name)
+            return super().render(obj, name)
+
+        if isinstance(obj, (str, set)) or hasattr(obj, "__dict__") \
+                or hasattr(obj, "__slots__"):
+            return super().render(obj, name)
+
+        if hasattr(obj, "__len__") and hasattr(obj, "__getitem__") \
+                and len(obj) > PAGE_SIZE:
+            return self.render_sequence(obj, name)
+
+        return super().render(obj, name)
@@ -0,0 +1,554 @@
+"""
+Incremental streaming operators for source expressions and computed sources.
+
+In expressions the operators are available through "stream", e.g.
+"stream.ema({/ros2/odom/speed}, 0.2)" or "stream.rolling({/x}, 100).std".
+The state of each operator call is kept per expression and only advanced
+if the used source was modified, at most once per frame, so repeated
+evaluations do not count twice.
+
+All operators keep a bounded state, update in O(1) (amortized) per sample
+and provide a vectorized push_batch for arrays of samples.
+"""
+
+import time
+
+import numpy as np
+
+
+def as_time(t):
+
+    return time.time() if t is None else float(t)
+
+
+def expand_dims(a, ndim):
+    """
+    Appends axes to a, so that it broadcasts against arrays with ndim axes.
+    """
+
+    return a.reshape(a.shape + (1,) * (ndim - a.ndim))
+
+
+class Ema:
+    """
+    Exponential moving average, y += alpha * (x - y).
+    """
+
+    def __init__(self, alpha=0.1):
+
+        self.alpha = alpha
+        self.value = None
+
+    def push(self, x, t=None):
+
+        x = np.asarray(x, dtype=float)
+
+        if self.value is None:
+            self.value = x
+        else:
+            self.value = self.value + self.alpha * (x - self.value)
+
+        return self.value
+
+    def push_batch(self, xs, ts=None):
+
+        xs = np.asarray(xs, dtype=float)
+        if len(xs) == 0:
+            return xs
+
+        a = self.alpha
+        w = 1.0 - a
+
+        if self.value is None:
+            self.value = xs[0]
+
+        if a >= 1.0:
+            self.value = xs[-1]
+            return xs.copy()
+        if a <= 0.0:
+            return np.broadcast_to(self.value, xs.shape).copy()
+
+        # y_k = w^k * (y_0 + a * sum_j x_j * w^-j), where w^-j grows
+        # quickly, so the closed form is applied in bounded chunks
+        chunk = max(1, int(150.0 / -np.log10(w)))
+
+        out = np.empty_like(xs)
+        y = self.value
+
+        for start in range(0, len(xs), chunk):
+            c = xs[start:start+chunk]
+            k = expand_dims(np.arange(1, len(c) + 1, dtype=float), c.ndim)
+            out[start:start+chunk] = w**k * (y + a * np.cumsum(c * w**-k, axis=0))
+            y = out[start + len(c) - 1]
+
+        self.value = y
+
+        return out
+
+
+class Rolling:
+    """
+    Statistics over the last size samples.
+
+    Sum and sum of squares are updated in O(1) per sample and resummed
+    once per window to bound rounding drift. Minimum and maximum are
+    computed vectorized on access and cached until the next push.
+    """
+
+    def __init__(self, size=100):
+
+        self.size = max(1, int(size))
+
+        self.buffer = None
+        self.idx = 0
+        self.count = 0
+
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.pushes_since_resum = 0
+
+        self.cached_min = None
+        self.cached_max = None
+
+    @property
+    def value(self):
+
+        return self
+
+    def resum(self):
+
+        w = self.window
+        self.sum = w.sum(axis=0)
+        self.sum_sq = (w * w).sum(axis=0)
+        self.pushes_since_resum = 0
+
+    def push(self, x, t=None):
+
+        x = np.asarray(x, dtype=float)
+
+        if self.buffer is None or self.buffer.shape[1:] != x.shape:
+            self.buffer = np.zeros((self.size,) + x.shape)
+            self.idx = 0
+            self.count = 0
+            self.sum = 0.0
+            self.sum_sq = 0.0
+
+        if self.count == self.size:
+            old = self.buffer[self.idx]
+            self.sum = self.sum - old
+            self.sum_sq = self.sum_sq - old * old
+        else:
+            self.count += 1
+
+        self.buffer[self.idx] = x
+        self.sum = self.sum + x
+        self.sum_sq = self.sum_sq + x * x
+        self.idx = (self.idx + 1) % self.size
+
+        self.pushes_since_resum += 1
+        if self.pushes_since_resum >= self.size:
+            self.resum()
+
+        self.cached_min = None
+        self.cached_max = None
+
+        return self
+
+    def push_batch(self, xs, ts=None):
+
+        xs = np.asarray(xs, dtype=float)
+        if len(xs) == 0:
+            return self
+
+        if self.buffer is None or self.buffer.shape[1:] != xs.shape[1:]:
+            self.buffer = np.zeros((self.size,) + xs.shape[1:])
+            self.idx = 0
+            self.count = 0
+
+        xs = xs[-self.size:]
+        n = len(xs)
+
+        self.buffer[(self.idx + np.arange(n)) % self.size] = xs
+        self.idx = (self.idx + n) % self.size
+        self.count = min(self.size, self.count + n)
+
+        self.resum()
+
+        self.cached_min = None
+        self.cached_max = None
+
+        return self
+
+    @property
+    def window(self):
+        """
+        The samples in the window, oldest first.
+        """
+
+        if self.buffer is None:
+            return np.zeros(0)
+        if self.count < self.size:
+            return self.buffer[:self.count]
+
+        return np.roll(self.buffer, -self.idx, axis=0)
+
+    @property
+    def mean(self):
+
+        return self.sum / max(1, self.count)
+
+    @property
+    def var(self):
+
+        mean = self.mean
+        return np.maximum(self.sum_sq / max(1, self.count) - mean * mean, 0.0)
+
+    @property
+    def std(self):
+
+        return np.sqrt(self.var)
+
+    @property
+    def min(self):
+
+        if self.cached_min is None:
+            self.cached_min = self.window.min(axis=0)
+        return self.cached_min
+
+    @property
+    def max(self):
+
+        if self.cached_max is None:
+            self.cached_max = self.window.max(axis=0)
+        return self.cached_max
+
+
+class Diff:
+    """
+    Derivative with respect to time by finite differences.
+    """
+
+    def __init__(self):
+
+        self.last_x = None
+        self.last_t = None
+        self.value = 0.0
+
+    def push(self, x, t=None):
+
+        x = np.asarray(x, dtype=float)
+        t = as_time(t)
+
+        if self.last_x is None:
+            self.value = np.zeros_like(x)
+        elif t > self.last_t:
+            self.value = (x - self.last_x) / (t - self.last_t)
+
+        self.last_x = x
+        self.last_t = t
+
+        return self.value
+
+    def push_batch(self, xs, ts):
+
+        xs = np.asarray(xs, dtype=float)
+        ts = np.asarray(ts, dtype=float)
+        if len(xs) == 0:
+            return xs
+
+        if self.last_x is None:
+            prev_x = xs[:1]
+            prev_t = ts[:1]
+        else:
+            prev_x = self.last_x[np.newaxis]
+            prev_t = np.array([self.last_t])
+
+        dx = np.diff(np.concatenate([prev_x, xs]), axis=0)
+        dt = expand_dims(np.diff(np.concatenate([prev_t, ts])), xs.ndim)
+        dt = np.broadcast_to(dt, dx.shape)
+
+        out = np.divide(dx, dt, out=np.zeros_like(dx), where=dt > 0.0)
+
+        self.last_x = xs[-1]
+        self.last_t = ts[-1]
+        self.value = out[-1]
+
+        return out
+
+
+class Rate:
+    """
+    Estimates the sample rate in Hz from smoothed time differences.
+    """
+
+    def __init__(self, alpha=0.1):
+
+        self.dt = Ema(alpha)
+        self.last_t = None
+        self.value = 0.0
+
+    def push(self, x=None, t=None):
+
+        t = as_time(t)
+
+        if self.last_t is not None and t > self.last_t:
+            self.value = 1.0 / max(float(self.dt.push(t - self.last_t)), 1e-9)
+
+        self.last_t = t
+
+        return self.value
+
+    def push_batch(self, xs, ts):
+
+        ts = np.asarray(ts, dtype=float)
+        if len(ts) == 0:
+            return ts
+
+        if self.last_t is None:
+            self.last_t = ts[0]
+
+        dts = np.diff(np.concatenate([[self.last_t], ts]))
+        dts = dts[dts > 0.0]
+
+        self.last_t = ts[-1]
+
+        if len(dts) == 0:
+            return np.full(len(ts), self.value)
+
+        rates = 1.0 / np.maximum(self.dt.push_batch(dts), 1e-9)
+        self.value = float(rates[-1])
+
+        return rates
+
+
+class Decimate:
+    """
+    Keeps every n-th sample.
+    """
+
+    def __init__(self, n=10):
+
+        self.n = max(1, int(n))
+        self.counter = 0
+        self.value = None
+
+    def push(self, x, t=None):
+
+        if self.counter % self.n == 0:
+            self.value = x
+        self.counter += 1
+
+        return self.value
+
+    def push_batch(self, xs, ts=None):
+
+        first = (-self.counter) % self.n
+        out = xs[first::self.n]
+
+        self.counter += len(xs)
+        if len(out) > 0:
+            self.value = out[-1]
+
+        return out
+
+
+class Resample:
+    """
+    Linearly interpolates the samples onto a fixed time grid.
+
+    After each push, times and values hold the grid points,
+    which were completed by the pushed samples.
+    """
+
+    def __init__(self, period=0.1):
+
+        self.period = max(1e-9, float(period))
+
+        self.last_x = None
+        self.last_t = None
+        self.next_t = None
+
+        self.times = np.zeros(0)
+        self.values = np.zeros(0)
+        self.value = None
+
+    def push(self, x, t=None):
+
+        self.push_batch(np.asarray(x, dtype=float)[np.newaxis],
+                        np.array([as_time(t)]))
+
+        return self.value
+
+    def push_batch(self, xs, ts):
+
+        xs = np.asarray(xs, dtype=float)
+        ts = np.asarray(ts, dtype=float)
+        if len(xs) == 0:
+            return self.times[:0], self.values[:0]
+
+        if self.last_x is None:
+            self.next_t = np.ceil(ts[0] / self.period) * self.period
+        else:
+            xs = np.concatenate([self.last_x[np.newaxis], xs])
+            ts = np.concatenate([[self.last_t], ts])
+
+        grid = np.arange(self.next_t, ts[-1] + self.period * 1e-6, self.period)
+
+        flat = xs.reshape(len(xs), -1)
+        values = np.stack([np.interp(grid, ts, flat[:, i])
+                           for i in range(flat.shape[1])], axis=-1)
+        values = values.reshape((len(grid),) + xs.shape[1:])
+
+        self.last_x = xs[-1]
+        self.last_t = ts[-1]
+        if len(grid) > 0:
+            self.next_t = grid[-1] + self.period
+            self.value = values[-1]
+
+        self.times = grid
+        self.values = values
+
+        return grid, values
+
+
+class Histogram:
+    """
+    Accumulates counts over fixed bins, optionally with exponential decay.
+    """
+
+    def __init__(self, bins=50, range=(0.0, 1.0), decay=1.0):
+
+        self.edges = np.linspace(range[0], range[1], max(1, int(bins)) + 1)
+        self.counts = np.zeros(len(self.edges) - 1)
+        self.decay = decay
+
+    @property
+    def value(self):
+
+        return self.counts
+
+    @property
+    def centers(self):
+
+        return (self.edges[:-1] + self.edges[1:]) / 2.0
+
+    def push(self, x, t=None):
+
+        if self.decay < 1.0:
+            self.counts *= self.decay
+        self.counts += np.histogram(np.ravel(x), self.edges)[0]
+
+        return self.counts
+
+    def push_batch(self, xs, ts=None):
+
+        xs = np.asarray(xs)
+        if self.decay < 1.0:
+            self.counts *= self.decay ** len(xs)
+        self.counts += np.histogram(np.ravel(xs), self.edges)[0]
+
+        return self.counts
+
+
+class Streams:
+    """
+    Gives source expressions access to streaming operators.
+
+    Operator states are stored in a list owned by the evaluated expression
+    and matched by call order. If the parameters of a call change, its state
+    is reset. Each state also records the frame, in which it was advanced
+    last, so evaluating an expression again in the same frame does not push
+    the same sample twice.
+    """
+
+    def __init__(self):
+
+        self.source = None
+        self.states = None
+        self.idx = 0
+        self.advance = None
+        self.frame = None
+
+    def begin(self, source, states, frame=None):
+
+        prev = (self.source, self.states, self.idx, self.advance, self.frame)
+
+        self.source = source
+        self.states = states
+        self.idx = 0
+        self.advance = None
+        self.frame = frame
+
+        return prev
+
+    def end(self, prev):
+
+        self.source, self.states, self.idx, self.advance, self.frame = prev
+
+    def get(self, cls, *params):
+
+        if self.states is None:
+            raise RuntimeError(
+                    "streaming operators can only be used in source expressions")
+
+        key = (cls, params)
+
+        if self.idx < len(self.states) and self.states[self.idx][0] == key:
+            state = self.states[self.idx]
+            new = False
+        else:
+            # key, operator, frame of the last push
+            state = [key, cls(*params), None]
+            self.states[self.idx:self.idx+1] = [state]
+            new = True
+
+        self.idx += 1
+
+        if self.advance is None:
+            self.advance = self.source.mod()
+
+        # new operators always take the current value
+        push = new or (self.advance
+                       and (self.frame is None or state[2] != self.frame))
+        if push:
+            state[2] = self.frame
+
+        return state[1], push
+
+    def apply(self, op, push, x, t=None):
+
+        if push:
+            return op.push(x, t)
+
+        return op.value
+
+    def ema(self, x, alpha=0.1):
+
+        return self.apply(*self.get(Ema, alpha), x)
+
+    def rolling(self, x, size=100):
+
+        return self.apply(*self.get(Rolling, size), x)
+
+    def diff(self, x, t=None):
+
+        return self.apply(*self.get(Diff), x, t)
+
+    def rate(self, x=None, t=None, alpha=0.1):
+
+        return self.apply(*self.get(Rate, alpha), x, t)
+
+    def decimate(self, x, n=10):
+
+        return self.apply(*self.get(Decimate, n), x)
+
+    def resample(self, x, period=0.1, t=None):
+
+        return self.apply(*self.get(Resample, period), x, t)
+
+    def histogram(self, x, bins=50, range=(0.0, 1.0), decay=1.0):
+
+        return self.apply(*self.get(Histogram, bins, tuple(range), decay), x)
+
+
+STREAMS = Streams()
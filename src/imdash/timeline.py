@@ -0,0 +1,291 @@
+import copy
+import time
+import bisect
+import numbers
+import collections
+
+import numpy as np
+
+from imdash.utils import estimate_size, get_source_stamp, MEMORY
+
+
+def freeze(obj):
+    """
+    Returns a copy of obj, which is not changed by later updates of the source.
+    """
+
+    if obj is None or isinstance(obj, (numbers.Number, str, bytes)):
+        return obj
+    if isinstance(obj, np.ndarray):
+        return obj.copy()
+
+    try:
+        return copy.deepcopy(obj)
+    except Exception:
+        # e.g. objects holding locks or handles
+        return obj
+
+
+class TimelineSample:
+    """
+    Frozen state of a source, which stands in for it while scrubbing.
+    """
+
+    def __init__(self, stamp, source):
+
+        self.stamp = stamp
+        self.mod = True
+
+        last_msg = getattr(source, "last_msg", None)
+
+        if last_msg is not None and isinstance(
+                getattr(type(source), "data", None), property):
+            # e.g. ros2 topics, data is a part of the message,
+            # so it is taken from the frozen message instead of copied again
+            self.last_msg = freeze(last_msg)
+            frozen = copy.copy(source)
+            frozen.last_msg = self.last_msg
+            self.data = frozen.data
+            self.size = estimate_size(self.last_msg)
+        else:
+            self.data = freeze(source.data)
+            self.last_msg = freeze(last_msg)
+            self.size = estimate_size(self.data) + estimate_size(self.last_msg)
+
+
+class SourceTrack:
+
+    def __init__(self):
+
+        # evicted samples are skipped by start and compacted lazily
+        self.stamps = []
+        self.samples = []
+        self.start = 0
+
+    def __len__(self):
+
+        return len(self.stamps) - self.start
+
+    def pop_oldest(self):
+
+        sample = self.samples[self.start]
+        self.samples[self.start] = None
+        self.start += 1
+
+        if self.start > 64 and self.start > len(self.stamps) // 2:
+            del self.stamps[:self.start]
+            del self.samples[:self.start]
+            self.start = 0
+
+        return sample
+
+    def find(self, t):
+        """
+        Returns the latest sample at or before t.
+        """
+
+        idx = bisect.bisect_right(self.stamps, t, lo=self.start) - 1
+        if idx < self.start:
+            return None
+
+        return self.samples[idx]
+
+
+class Timeline:
+    """
+    Records the changes of all live sources into a memory bounded buffer.
+
+    While the cursor is set, views see the recorded state of each source
+    at the cursor time instead of the live one, synchronized by message
+    stamp. Sources without stamps are placed on the same clock by the
+    offset between the newest message stamp and the time of recording.
+    Recording continues in the background, so returning to live loses
+    nothing. When over budget, the oldest samples are dropped first.
+    """
+
+    # derived sources are recomputed from the recorded inputs instead
+    SKIPPED_PREFIXES = ("/computed/", "/latency/")
+
+    def __init__(self):
+
+        self.enabled = False
+        self.memory_budget = 256 * 2**20
+        self.memory_usage = 0
+
+        self.tracks = {}
+        self.order = collections.deque()
+
+        # message stamp minus local time of the latest stamped sample
+        self.clock_offset = 0.0
+
+        # None follows the live sources
+        self.cursor = None
+        self.playing = False
+        self.speed = 1.0
+        self.last_play_time = None
+
+        self.selected = {}
+
+    @property
+    def live(self):
+
+        return self.cursor is None
+
+    def set_enabled(self, enabled):
+
+        if self.enabled and not enabled:
+            self.clear()
+        self.enabled = enabled
+
+    def clear(self):
+
+        self.tracks = {}
+        self.order = collections.deque()
+        self.memory_usage = 0
+        self.clock_offset = 0.0
+        self.cursor = None
+        self.playing = False
+        self.selected = {}
+
+    def time_range(self):
+
+        oldest = None
+        newest = None
+
+        for track in self.tracks.values():
+            if len(track) == 0:
+                continue
+            t0 = track.stamps[track.start]
+            t1 = track.stamps[-1]
+            oldest = t0 if oldest is None else min(oldest, t0)
+            newest = t1 if newest is None else max(newest, t1)
+
+        return oldest, newest
+
+    def record(self, sources):
+
+        if not self.enabled:
+            return
+
+        now = time.time()
+
+        # the newest stamp of the frame, so that unstamped sources do not
+        # jump between the clocks of sources with different latencies
+        stamps = [get_source_stamp(s) for k, s in sources.items()
+                  if s is not None and not k.startswith(self.SKIPPED_PREFIXES)]
+        stamps = [t for t in stamps if t is not None]
+        if len(stamps) > 0:
+            self.clock_offset = max(stamps) - now
+
+        for key, s in sources.items():
+
+            if s is None or key.startswith(self.SKIPPED_PREFIXES):
+                continue
+
+            track = self.tracks.get(key)
+
+            # sources without mod flag are only recorded once
+            if track is not None and len(track) > 0 and not getattr(s, "mod", False):
+                continue
+
+            if track is None:
+                track = SourceTrack()
+                self.tracks[key] = track
+
+            stamp = get_source_stamp(s)
+            stamped = stamp is not None
+            if not stamped:
+                stamp = now + self.clock_offset
+                if len(track) > 0:
+                    stamp = max(stamp, track.stamps[-1])
+            sample = TimelineSample(stamp, s)
+
+            # e.g. restarted bags, older samples would break the ordering
+            if stamped and len(track) > 0 and sample.stamp < track.stamps[-1]:
+                while len(track) > 0:
+                    self.memory_usage -= track.pop_oldest().size
+                self.order = collections.deque(
+                        k for k in self.order if k != key)
+
+            track.stamps.append(sample.stamp)
+            track.samples.append(sample)
+            self.order.append(key)
+            self.memory_usage += sample.size
+
+        self.evict()
+
+    def account_memory(self):
+
+        if self.memory_usage > 0:
+            MEMORY.report("timeline", "timeline", self.memory_usage,
+                          shrink=self.shrink)
+
+    def shrink(self, n_bytes):
+
+        usage = self.memory_usage
+        self.evict(usage - n_bytes)
+
+        return usage - self.memory_usage
+
+    def evict(self, budget=None):
+
+        if budget is None:
+            budget = self.memory_budget
+
+        while self.memory_usage > budget and len(self.order) > 0:
+            key = self.order.popleft()
+            track = self.tracks[key]
+            self.memory_usage -= track.pop_oldest().size
+            if len(track) == 0:
+                del self.tracks[key]
+
+    def go_live(self):
+
+        self.cursor = None
+        self.playing = False
+        self.selected = {}
+
+    def advance(self):
+        """
+        Moves the cursor forward while playing, returns to live at the end.
+        """
+
+        now = time.time()
+
+        if self.playing and self.cursor is not None:
+            self.cursor += (now - self.last_play_time) * self.speed
+            newest = self.time_range()[1]
+            if newest is None or self.cursor >= newest:
+                self.go_live()
+
+        self.last_play_time = now
+
+    def get_overlay(self):
+        """
+        Returns the recorded samples at the cursor by source key,
+        or None if live. Only samples, which changed, are marked modified.
+        Sources without a sample at the cursor are left out and stay live.
+        """
+
+        self.advance()
+
+        if self.cursor is None:
+            return None
+
+        overlay = {}
+        selected = {}
+
+        for key, track in self.tracks.items():
+            sample = track.find(self.cursor)
+            if sample is None:
+                continue
+            sample.mod = self.selected.get(key) is not sample
+            selected[key] = sample
+            overlay[key] = sample
+
+        self.selected = selected
+
+        return overlay
+
+
+TIMELINE = Timeline()
@@ -1,11 +1,17 @@
 import re
 import os
+import sys
 import time
 import math
 import uuid
 import json
+import itertools
+import collections
+import atexit
 import numbers
+import fcntl
 import hashlib
+import threading
 import traceback
 import subprocess
 
@@ -16,6 +22,13 @@ from PIL import Image
 
 import objtoolbox as otb
 
+from imdash.streaming import STREAMS
+from imdash.expressions import (
+    ExpressionError,
+    ExpressionCache,
+    compile_expression
+)
+
 
 def speak(text):
 
@@ -29,6 +42,507 @@ def speak(text):
         os.close(fd)
 
 
+class Profiler:
+    """
+    Collects rolling per-frame timing statistics of named sections.
+
+    Sections are identified by (category, key) and timings of repeated
+    calls within one frame are summed up. When disabled, add() is never
+    called, so the instrumentation costs only a single attribute check.
+
+    add() may be called from any thread, all other methods are only
+    called from the render loop.
+    """
+
+    def __init__(self, window=240):
+
+        self.enabled = False
+        self.window = window
+
+        self.frame = 0
+
+        # written by add() under lock
+        self.lock = threading.Lock()
+        self.frame_times = {}
+        self.frame_calls = {}
+
+        self.names = {}
+        self.samples = {}
+        self.calls = {}
+        self.last_seen = {}
+
+    def add(self, category, key, dt, name=None):
+
+        k = (category, key)
+
+        with self.lock:
+            self.frame_times[k] = self.frame_times.get(k, 0.0) + dt
+            self.frame_calls[k] = self.frame_calls.get(k, 0) + 1
+            if name is not None:
+                self.names[k] = name
+
+    def end_frame(self):
+
+        self.frame += 1
+
+        with self.lock:
+            frame_times = self.frame_times
+            frame_calls = self.frame_calls
+            self.frame_times = {}
+            self.frame_calls = {}
+
+        for k, dt in frame_times.items():
+            try:
+                samples = self.samples[k]
+            except KeyError:
+                samples = collections.deque(maxlen=self.window)
+                self.samples[k] = samples
+            samples.append(dt)
+            self.calls[k] = frame_calls[k]
+            self.last_seen[k] = self.frame
+
+        # forget sections which vanished, e.g. deleted components
+        if self.frame % self.window == 0:
+            for k, f in list(self.last_seen.items()):
+                if self.frame - f > self.window:
+                    del self.samples[k]
+                    del self.calls[k]
+                    del self.last_seen[k]
+                    with self.lock:
+                        self.names.pop(k, None)
+
+    def reset(self):
+
+        self.samples = {}
+        self.calls = {}
+        self.last_seen = {}
+        with self.lock:
+            self.names = {}
+
+    def name(self, category, key):
+
+        return self.names.get((category, key), str(key))
+
+    def keys(self, category=None):
+
+        return [k for k in self.samples
+                if category is None or k[0] == category]
+
+    def stats(self, category, key):
+        """
+        Returns (mean, p50, p95, p99, max, calls) in seconds.
+        """
+
+        try:
+            samples = np.fromiter(self.samples[(category, key)], float)
+        except KeyError:
+            return None
+
+        p50, p95, p99 = np.percentile(samples, (50, 95, 99))
+
+        return (samples.mean(),
+                p50, p95, p99,
+                samples.max(),
+                self.calls[(category, key)])
+
+    def last(self, category, key):
+
+        try:
+            return self.samples[(category, key)][-1]
+        except (KeyError, IndexError):
+            return None
+
+
+PROFILER = Profiler()
+
+
+LATENCY_STAGES = [
+    "transport",
+    "deserialize",
+    "wait for render",
+    "render to swap",
+    "total"
+]
+
+
+class LatencyTracker:
+    """
+    Tracks the latency of source updates through the whole pipeline.
+
+    Connectors report the publish stamp, the receive time and the time
+    after deserialization. The first evaluation of the data by a view
+    marks the render time and the following buffer swap completes the
+    sample. Updates which are replaced before being rendered are counted
+    as dropped. All times are wall clock times in seconds.
+
+    mark_ingest() may be called from connector threads, the pending
+    updates and drop counts are therefore guarded by a lock.
+    """
+
+    def __init__(self, window=1000):
+
+        self.enabled = False
+        self.window = window
+
+        self.lock = threading.Lock()
+        self.ingested = {}
+        self.rendered = {}
+
+        self.samples = {}
+        self.counts = {}
+        self.dropped = {}
+
+    def set_enabled(self, enabled):
+
+        if not enabled:
+            with self.lock:
+                self.ingested = {}
+            self.rendered = {}
+
+        self.enabled = enabled
+
+    def mark_ingest(self, key, stamp_time, recv_time, decode_time):
+
+        if not self.enabled:
+            return
+
+        with self.lock:
+            if key in self.ingested:
+                self.dropped[key] = self.dropped.get(key, 0) + 1
+            self.ingested[key] = (stamp_time, recv_time, decode_time)
+
+    def mark_render(self, key):
+
+        with self.lock:
+            rec = self.ingested.pop(key, None)
+
+        if rec is None:
+            return
+
+        self.rendered[key] = (*rec, time.time())
+
+    def mark_swap(self):
+
+        if len(self.rendered) == 0:
+            return
+
+        swap_time = time.time()
+
+        for key, times in self.rendered.items():
+            self.add_sample(key, *times, swap_time)
+
+        self.rendered = {}
+
+    def add_sample(self, key, stamp, recv, decode, render, swap):
+
+        try:
+            samples = self.samples[key]
+        except KeyError:
+            samples = {st: collections.deque(maxlen=self.window)
+                       for st in LATENCY_STAGES}
+            self.samples[key] = samples
+
+        if stamp is not None:
+            samples["transport"].append(recv - stamp)
+        samples["deserialize"].append(decode - recv)
+        samples["wait for render"].append(render - decode)
+        samples["render to swap"].append(swap - render)
+        samples["total"].append(swap - (recv if stamp is None else stamp))
+
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def reset(self):
+
+        with self.lock:
+            self.ingested = {}
+            self.dropped = {}
+        self.rendered = {}
+        self.samples = {}
+        self.counts = {}
+
+    def keys(self):
+
+        return sorted(self.samples.keys())
+
+    def stage_samples(self, key, stage):
+
+        try:
+            return np.fromiter(self.samples[key][stage], float)
+        except KeyError:
+            return np.zeros(0)
+
+    def stats(self, key):
+        """
+        Returns a dict with last, mean, p50, p95, p99 and max per stage.
+        """
+
+        res = {}
+
+        for stage in LATENCY_STAGES:
+            samples = self.stage_samples(key, stage)
+            if len(samples) == 0:
+                continue
+            p50, p95, p99 = np.percentile(samples, (50, 95, 99))
+            res[stage] = {
+                "last": float(samples[-1]),
+                "mean": float(samples.mean()),
+                "p50": float(p50),
+                "p95": float(p95),
+                "p99": float(p99),
+                "max": float(samples.max()),
+            }
+
+        res["count"] = self.counts.get(key, 0)
+        with self.lock:
+            res["dropped"] = self.dropped.get(key, 0)
+
+        return res
+
+
+LATENCY = LatencyTracker()
+
+
+def render_timing_stats(stats):
+
+    if stats is None:
+        viz.text("no samples yet")
+        return
+
+    mean, p50, p95, p99, max_dt, calls = stats
+
+    viz.text(f"mean: {mean*1000.0:.3f} ms")
+    viz.text(f"p50:  {p50*1000.0:.3f} ms")
+    viz.text(f"p95:  {p95*1000.0:.3f} ms")
+    viz.text(f"p99:  {p99*1000.0:.3f} ms")
+    viz.text(f"max:  {max_dt*1000.0:.3f} ms")
+    viz.text(f"calls per frame: {calls}")
+
+
+class FramePacer:
+    """
+    Paces the render loop adaptively.
+
+    The loop renders at full rate (capped at max_rate) while there is
+    activity, i.e. new data, input or edits. After idle_timeout seconds
+    without activity it drops to idle_rate and sleeps until the next
+    idle frame, new input, or a wake() call from a data thread.
+    """
+
+    def __init__(self):
+
+        self.enabled = False
+        self.idle_rate = 2.0
+        self.max_rate = 60.0
+        self.idle_timeout = 1.0
+
+        self.idle = False
+        self.last_activity = time.time()
+        self.last_frame = time.perf_counter()
+        self.last_mouse_pos = None
+
+        # set by wake() to end an idle sleep early
+        self.wake_event = threading.Event()
+
+        # smoothed achieved frame rate
+        self.rate = 0.0
+
+    def notify_activity(self):
+
+        self.last_activity = time.time()
+
+    def wake(self):
+        """
+        Can be called from any thread to render the next frame immediately.
+        """
+
+        self.last_activity = time.time()
+        if self.idle:
+            self.wake_event.set()
+            viz.trigger()
+
+    def check_input(self):
+        """
+        Returns true and notes the activity if there was input.
+        """
+
+        mouse_pos = tuple(viz.get_mouse_pos())
+
+        active = (mouse_pos != self.last_mouse_pos
+                  or len(viz.get_key_events()) > 0
+                  or len(viz.get_char_events()) > 0
+                  or len(viz.get_scroll_events()) > 0
+                  or len(viz.get_mouse_button_events()) > 0)
+
+        self.last_mouse_pos = mouse_pos
+
+        if active:
+            self.notify_activity()
+
+        return active
+
+    def wait(self, vsync, powersave):
+        """
+        Replaces viz.wait() in the render loop.
+        """
+
+        if not self.enabled:
+            res = viz.wait(vsync=vsync, powersave=powersave)
+        else:
+            if self.max_rate > 0.0:
+                remaining = (1.0 / self.max_rate
+                             - (time.perf_counter() - self.last_frame))
+                if remaining > 0.0:
+                    time.sleep(remaining)
+
+            self.idle = time.time() - self.last_activity > self.idle_timeout
+
+            if self.idle:
+                timeout = 1.0 / max(0.01, self.idle_rate)
+                t = time.perf_counter()
+                self.wake_event.clear()
+                res = viz.wait(vsync=vsync, powersave=True, timeout=timeout)
+                # imviz only blocks every few powersave frames, so returning
+                # early does not imply input, the rest is slept explicitly
+                if not self.check_input():
+                    remaining = timeout - (time.perf_counter() - t)
+                    if remaining > 0.0:
+                        self.wake_event.wait(remaining)
+                self.idle = False
+            else:
+                res = viz.wait(vsync=vsync, powersave=powersave)
+                self.check_input()
+
+        now = time.perf_counter()
+        dt = now - self.last_frame
+        self.last_frame = now
+
+        if dt > 0.0:
+            self.rate += 0.1 * (1.0 / dt - self.rate)
+
+        return res
+
+
+FRAME_PACER = FramePacer()
+
+
+def estimate_size(obj, depth=4, max_items=32):
+    """
+    Roughly estimates the memory used by obj and its members in bytes.
+    The size of long containers is extrapolated from their first items.
+    """
+
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes + 112
+
+    size = sys.getsizeof(obj)
+
+    if depth <= 0 or isinstance(obj, (str, bytes, bytearray, numbers.Number)):
+        return size
+
+    if isinstance(obj, dict):
+        n = len(obj)
+        items = [e for kv in itertools.islice(obj.items(), max_items) for e in kv]
+        n_sampled = len(items) // 2
+    elif isinstance(obj, (list, tuple, set, frozenset, collections.deque)):
+        n = len(obj)
+        items = list(itertools.islice(obj, max_items))
+        n_sampled = len(items)
+    elif hasattr(obj, "__dict__"):
+        items = list(obj.__dict__.values())
+        n = n_sampled = len(items)
+    elif hasattr(obj, "__slots__"):
+        items = [getattr(obj, k, None) for k in obj.__slots__]
+        n = n_sampled = len(items)
+    else:
+        return size
+
+    if n_sampled == 0:
+        return size
+
+    items_size = sum(estimate_size(e, depth-1, max_items) for e in items)
+
+    return size + int(items_size * n / n_sampled)
+
+
+class MemoryAccountant:
+    """
+    Accounts the memory of sources and buffers against a global budget.
+
+    Owners report their current size once per frame. Buffers also pass
+    a shrink function, which frees about the requested number of bytes,
+    e.g. by dropping or downsampling their oldest data, and returns the
+    number of bytes freed. If the total exceeds the budget at the end of
+    a frame, the largest shrinkable buffers are shrunk first.
+    """
+
+    def __init__(self):
+
+        self.budget = 2048 * 2**20
+        self.total = 0
+
+        # (category, key) -> [name, size, shrink]
+        self.entries = {}
+        self.reported = set()
+
+    def report(self, category, key, size, name=None, shrink=None):
+
+        k = (category, key)
+        self.entries[k] = [key if name is None else name, size, shrink]
+        self.reported.add(k)
+
+    def end_frame(self):
+
+        for k in list(self.entries.keys()):
+            if k not in self.reported:
+                del self.entries[k]
+        self.reported = set()
+
+        self.total = sum(e[1] for e in self.entries.values())
+
+        excess = self.total - self.budget
+        if excess <= 0:
+            return
+
+        shrinkable = [e for e in self.entries.values() if e[2] is not None]
+        shrinkable.sort(key=lambda e: e[1], reverse=True)
+
+        for e in shrinkable:
+            freed = e[2](excess)
+            e[1] -= freed
+            self.total -= freed
+            excess -= freed
+            if excess <= 0:
+                break
+
+    def usage(self):
+        """
+        Returns (category, name, size) of all entries, largest first.
+        """
+
+        res = [(k[0], e[0], e[1]) for k, e in self.entries.items()]
+        res.sort(key=lambda r: r[2], reverse=True)
+
+        return res
+
+
+MEMORY = MemoryAccountant()
+
+
+def get_source_stamp(source):
+    """
+    Returns the message stamp of the source, else its receive time or None.
+    """
+
+    msg = getattr(source, "last_msg", None)
+    if msg is None:
+        return None
+
+    if getattr(msg, "stamp_time", None) is not None:
+        return msg.stamp_time
+
+    return getattr(msg, "recv_time", None)
+
+
 def begin_context_drag_item(id_str, x, y, button=1, tol=10):
 
     if viz.is_item_clicked(button):
@@ -52,13 +566,26 @@ class DataSource:
     SRC_GLOBALS = {
             "np": np,
             "time": time,
-            "math": math
+            "math": math,
+            "stream": STREAMS
         }
 
     FILE_SRC_PATTERN = re.compile("\{/files/(.+?)\}")
 
     SOURCES = None
 
+    # if set, expressions are validated before they are compiled
+    RESTRICTED = True
+    COMPILED = ExpressionCache()
+
+    # advanced by the main loop once per frame
+    FRAME = 0
+
+    # when expressions over multiple sources are modified:
+    # any: if any source changed, all: once every source changed since
+    # the last modification, first: only if the first source changed
+    ALIGN_MODES = ["any", "all", "first"]
+
     def __init__(self, default=None, use_expr=True, allow_expr=True, path=""):
 
         self.path = path
@@ -68,6 +595,14 @@ class DataSource:
         self.alt_val = default
         self.allow_expr = allow_expr
 
+        self.align = "any"
+
+        # states of the streaming operators used in the expression
+        self.stream_states = []
+
+        # frame, result and changed sources of the last mod check
+        self.align_state = (-1, True, frozenset())
+
         if default is None:
             allow_expr = True
 
@@ -86,6 +621,9 @@ class DataSource:
         if self.use_expr:
             del s["alt_val"]
 
+        del s["stream_states"]
+        del s["align_state"]
+
         return s
 
     def __loadstate__(self, s):
@@ -149,6 +687,18 @@ class DataSource:
             if self.new_path is not None:
                 self.path = self.new_path
                 self.new_path = None
+            if self.path.strip() != "":
+                expr = self.compile()
+                if expr.error is not None:
+                    viz.text(expr.error, color=(1.0, 0.0, 0.0))
+                elif len(expr.paths) > 1:
+                    modes = DataSource.ALIGN_MODES
+                    try:
+                        align_idx = modes.index(self.align)
+                    except ValueError:
+                        align_idx = 0
+                    self.align = modes[viz.combo(
+                        f"update on###{name}align", modes, align_idx)]
         else:
             self.render_alt_value(name, ctx)
 
@@ -185,6 +735,10 @@ class DataSource:
 
         return matches[0].group(1)
 
+    def get_source_paths(self):
+
+        return self.compile().paths
+
     def get_used_source(self):
 
         path = self.get_source_path()
@@ -193,45 +747,110 @@ class DataSource:
 
         return DataSource.SOURCES[path]
 
+    def get_stamp(self):
+        """
+        Returns the message stamp of the first used source, which has one,
+        else its receive time or the current time.
+        """
+
+        for s in self.get_used_sources():
+            stamp = get_source_stamp(s)
+            if stamp is not None:
+                return stamp
+
+        return time.time()
+
+    def get_used_sources(self):
+
+        return [DataSource.SOURCES[p] for p in self.get_source_paths()]
+
     def mod(self):
-        
-        s = self.get_used_source()
-        if s is None:
-            return True
 
-        try:
-            return s.mod
-        except AttributeError:
+        srcs = self.get_used_sources()
+        if len(srcs) == 0:
             return True
 
-    def set_mod(self):
+        mods = [getattr(s, "mod", True) if s is not None else True
+                for s in srcs]
 
-        s = self.get_used_source()
-        if s is None:
-            return
+        if len(mods) == 1 or self.align == "any":
+            return any(mods)
+        if self.align == "first":
+            return mods[0]
 
-        s.mod_requested = True
+        frame, res, changed = self.align_state
+        if frame == DataSource.FRAME:
+            return res
+
+        changed = changed | {i for i, m in enumerate(mods) if m}
+        res = len(changed) == len(mods)
+        if res:
+            changed = frozenset()
+        self.align_state = (DataSource.FRAME, res, changed)
+
+        return res
+
+    def set_mod(self):
+
+        # all sources are flagged, so that aligned expressions update too
+        for s in self.get_used_sources():
+            if s is not None:
+                s.mod_requested = True
+
+    def compile(self):
+
+        key = (self.path, DataSource.RESTRICTED)
+
+        def compile_path():
+            paths = []
+            def replace(m):
+                p = m.group(1)
+                if p not in paths:
+                    paths.append(p)
+                return f"(__src{paths.index(p)}__.data)"
+            expr = DataSource.SRC_PATTERN.sub(replace, self.path)
+            res = compile_expression(
+                    expr,
+                    ["__alt__"] + [f"__src{i}__" for i in range(len(paths))],
+                    DataSource.SRC_GLOBALS,
+                    DataSource.RESTRICTED)
+            res.paths = paths
+            return res
+
+        return DataSource.COMPILED.get(key, compile_path)
 
     def __call__(self):
 
+        if not PROFILER.enabled:
+            return self.evaluate()
+
+        t = time.perf_counter()
+        try:
+            return self.evaluate()
+        finally:
+            PROFILER.add("sources", self.path, time.perf_counter() - t)
+
+    def evaluate(self):
+
         if self.use_expr:
 
-            s = self.get_used_source()
+            expr = self.compile()
 
-            if s is not None:
-                locs = {
-                    "__src__": s,
-                    "__alt__": self.alt_val
-                }
-            else:
-                locs = {
-                    "__alt__": self.alt_val
-                }
-
-            res_expr = self.path
-            res_expr = DataSource.SRC_PATTERN.sub(
-                    f'(__src__.data)', res_expr, 1)
-            res_val = eval(res_expr, DataSource.SRC_GLOBALS, locs)
+            if LATENCY.ingested:
+                for p in expr.paths:
+                    LATENCY.mark_render(p)
+
+            if expr.error is not None:
+                raise ExpressionError(expr.error)
+
+            srcs = [DataSource.SOURCES[p] for p in expr.paths]
+
+            prev_streams = STREAMS.begin(
+                    self, self.stream_states, DataSource.FRAME)
+            try:
+                res_val = expr.func(self.alt_val, *srcs)
+            finally:
+                STREAMS.end(prev_streams)
         else:
             res_val = self.alt_val
 
@@ -312,6 +931,68 @@ class ViewBase:
         self.show = True
         self.destroyed = False
 
+        # set on each render, false if closed, collapsed or in a hidden tab,
+        # views must not evaluate their sources while not visible
+        self.visible = False
+
+        self.record_path = os.path.abspath(os.path.expanduser("~/"))
+        self.record_format = "video"
+        self.record_scale = 1.0
+
+    def __savestate__(self):
+
+        d = self.__dict__.copy()
+        del d["visible"]
+
+        return d
+
+    def update(self, sources):
+        """
+        Called every frame before rendering, also while hidden.
+        Must not use imgui/implot.
+        """
+
+        pass
+
+    def render_record_menu(self):
+
+        rec = VIEW_RECORDERS.get(self.uuid)
+
+        if viz.begin_menu("Record"):
+            if rec is None:
+                self.record_path = viz.input("path", self.record_path)
+                fmts = ViewRecorder.FORMATS
+                try:
+                    fmt_idx = fmts.index(self.record_format)
+                except ValueError:
+                    fmt_idx = 0
+                self.record_format = fmts[viz.combo("format", fmts, fmt_idx)]
+                self.record_scale = min(1.0, max(0.05, viz.drag(
+                    "scale", self.record_scale, 0.01)))
+                if viz.menu_item("Start recording"):
+                    path = self.record_path
+                    if self.record_format == "video" and os.path.isdir(path):
+                        path = os.path.join(path, f"{self.uuid}.mp4")
+                    elif self.record_format == "frames":
+                        # frames of each recording go into their own directory
+                        stamp = int(time.time() * 10**9)
+                        path = os.path.join(path, f"{self.uuid}_{stamp}")
+                    VIEW_RECORDERS[self.uuid] = ViewRecorder(
+                            path, self.record_format, self.record_scale)
+            else:
+                if viz.menu_item("Stop recording"):
+                    stop_view_recording(self.uuid)
+            viz.end_menu()
+
+    def update_record_region(self):
+        """
+        Must be called inside the view window to record its screen region.
+        """
+
+        rec = VIEW_RECORDERS.get(self.uuid)
+        if rec is not None:
+            rec.rect = (*viz.get_window_pos(), *viz.get_window_size())
+
 
 MENU_NAME_REGEX = re.compile(r"(?<=\w)([A-Z])")
 
@@ -322,6 +1003,16 @@ def to_menu_name(name):
 
     
 class FfmpegRecorder:
+    """
+    Encodes frames to a video file with ffmpeg.
+
+    Frames are handed over to an encoder thread through a bounded queue,
+    so a slow encoder drops frames instead of stalling the render loop.
+    The output has a constant frame rate, independent of the render rate.
+    """
+
+    CODECS = ["mpeg4", "libx264", "libx265", "libvpx-vp9", "mjpeg"]
+    DROP_POLICIES = ["drop oldest", "drop newest"]
 
     def __init__(self,
                  path,
@@ -329,20 +1020,40 @@ class FfmpegRecorder:
                  height,
                  framerate=24,
                  bitrate='10M',
-                 fmt='rgb24'):
+                 codec='mpeg4',
+                 out_width=0,
+                 out_height=0,
+                 max_queue=8,
+                 drop_policy="drop oldest"):
+
+        self.width = int(width)
+        self.height = int(height)
+        self.framerate = framerate
+        self.max_queue = max_queue
+        self.drop_policy = drop_policy
+
+        # most codecs require even frame sizes, -2 keeps the aspect ratio
+        out_w = f"{2 * (int(out_width) // 2)}" if out_width > 0 else "-2"
+        out_h = f"{2 * (int(out_height) // 2)}" if out_height > 0 else "-2"
+        if out_width <= 0 and out_height <= 0:
+            out_w = "trunc(iw/2)*2"
+            out_h = "trunc(ih/2)*2"
 
         cmd = [
             '/usr/bin/ffmpeg',
             '-y',
             '-f', 'rawvideo',
-            '-s', f'{int(width)}x{int(height)}', 
-            '-pix_fmt', 'rgb24',
+            '-s', f'{self.width}x{self.height}', 
+            '-pix_fmt', 'rgba',
             '-r', str(framerate), 
             '-i', '-', 
-            '-vcodec', 'mpeg4',
+            '-vf', f'scale={out_w}:{out_h}',
+            '-vcodec', codec,
             '-b:v', bitrate,
-            f'{path}'
         ]
+        if codec != "mjpeg":
+            cmd += ['-pix_fmt', 'yuv420p']
+        cmd.append(f'{path}')
 
         self.proc = subprocess.Popen(
                 cmd,
@@ -350,16 +1061,312 @@ class FfmpegRecorder:
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL)
 
-    def record(self, frame):
+        self.frames = collections.deque()
+        self.cond = threading.Condition()
+        self.finished = False
+        self.dropped = 0
+
+        self.encode_thread = threading.Thread(target=self.encode, daemon=True)
+        self.encode_thread.start()
+
+    def record(self, frame, stamp=None):
+
+        if stamp is None:
+            stamp = time.time()
+
+        with self.cond:
+            if len(self.frames) >= self.max_queue:
+                self.dropped += 1
+                if self.drop_policy == "drop newest":
+                    return
+                self.frames.popleft()
+            self.frames.append((stamp, frame))
+            self.cond.notify()
+
+    def fit_frame(self, frame):
+
+        if frame.shape[:2] == (self.height, self.width):
+            return np.ascontiguousarray(frame)
+
+        # the recorded region changed size, crop or pad to the video size
+        res = np.zeros((self.height, self.width, 4), dtype=np.uint8)
+        h = min(self.height, frame.shape[0])
+        w = min(self.width, frame.shape[1])
+        res[:h, :w] = frame[:h, :w]
+
+        return res
+
+    def write(self, frame):
+
+        try:
+            self.proc.stdin.write(memoryview(frame))
+        except (BrokenPipeError, ValueError):
+            # ffmpeg exited, nothing more to do
+            with self.cond:
+                self.finished = True
+                self.frames.clear()
 
-        if self.proc.returncode is None:
-            self.proc.stdin.write(frame[:, :, :3].tobytes())
+    def encode(self):
+
+        dt = 1.0 / self.framerate
+        next_t = None
+        last_frame = None
+
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: len(self.frames) > 0 or self.finished)
+                if len(self.frames) == 0:
+                    break
+                stamp, frame = self.frames.popleft()
+
+            if next_t is None:
+                next_t = stamp
+
+            # each output slot shows the latest frame captured before it
+            while last_frame is not None and next_t < stamp:
+                self.write(last_frame)
+                next_t += dt
+
+            last_frame = self.fit_frame(frame)
+
+        if last_frame is not None:
+            self.write(last_frame)
 
     def finish(self):
 
+        with self.cond:
+            self.finished = True
+            self.cond.notify()
+
+        self.encode_thread.join()
         self.proc.communicate()
 
 
+VIEW_RECORDERS = {}
+
+
+class ViewRecorder:
+    """
+    Records the window region of a single view,
+    either as video or as a sequence of image files.
+    """
+
+    FORMATS = ["video", "frames"]
+
+    def __init__(self, path, fmt="video", scale=1.0, framerate=24.0, codec="mpeg4"):
+
+        self.path = path
+        self.fmt = fmt
+        self.scale = scale
+        self.framerate = framerate
+        self.codec = codec
+
+        # window region (x, y, width, height) rendered in the last frame
+        self.rect = None
+
+        self.frame_count = 0
+        self.video_recorder = None
+        self.writer_pool = None
+
+    def capture(self):
+
+        if self.rect is None:
+            return
+
+        x, y, w, h = self.rect
+        self.rect = None
+
+        mw, mh = viz.get_main_window_size()
+        x0 = max(0, int(x))
+        y0 = max(0, int(y))
+        x1 = min(int(mw), int(x + w))
+        y1 = min(int(mh), int(y + h))
+
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return
+
+        # only read back the pixels of the view region
+        frame = viz.get_pixels(x0, y0, x1 - x0, y1 - y0)
+
+        if self.fmt == "frames":
+            if self.writer_pool is None:
+                os.makedirs(self.path, exist_ok=True)
+                self.writer_pool = ImageWriterPool(2, 32)
+            step = max(1, int(round(1.0 / self.scale)))
+            frame = frame[::step, ::step, :3]
+            file_path = os.path.join(self.path, f"{self.frame_count:06d}.png")
+            # blocking would stall the render loop, dropped frames
+            # leave gaps in the numbering instead
+            self.writer_pool.submit(frame, file_path, "drop newest", fmt="png")
+        else:
+            if self.video_recorder is None:
+                self.video_recorder = FfmpegRecorder(
+                        self.path,
+                        x1 - x0,
+                        y1 - y0,
+                        framerate=self.framerate,
+                        codec=self.codec,
+                        out_width=int((x1 - x0) * self.scale),
+                        out_height=int((y1 - y0) * self.scale))
+            self.video_recorder.record(frame)
+
+        self.frame_count += 1
+
+    def finish(self):
+
+        if self.video_recorder is not None:
+            self.video_recorder.finish()
+        if self.writer_pool is not None:
+            self.writer_pool.close()
+            self.writer_pool = None
+
+
+def capture_view_recordings():
+
+    for rec in VIEW_RECORDERS.values():
+        rec.capture()
+
+
+def stop_view_recording(view_uuid):
+
+    try:
+        VIEW_RECORDERS.pop(view_uuid).finish()
+    except KeyError:
+        pass
+
+
+def write_image(img, path, fmt="png", png_compression=1, jpeg_quality=90):
+
+    if fmt == "npy":
+        np.save(path, img)
+    elif fmt == "jpeg":
+        Image.fromarray(img).convert("RGB").save(path, quality=jpeg_quality)
+    else:
+        Image.fromarray(img).save(path, compress_level=png_compression)
+
+
+class ImageWriterPool:
+    """
+    Encodes and writes images on background threads,
+    so that slow encoders do not stall the render loop.
+    """
+
+    DROP_POLICIES = ["drop newest", "drop oldest", "block"]
+
+    def __init__(self, num_workers=2, max_queue_depth=16):
+
+        self.jobs = collections.deque()
+        self.cond = threading.Condition()
+
+        self.workers = []
+        self.num_workers = 0
+        self.max_queue_depth = max_queue_depth
+
+        self.busy = 0
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.last_error = None
+
+        self.resize(num_workers)
+
+        atexit.register(self.flush)
+
+    def __deepcopy__(self, memo):
+
+        # the pool is a shared resource, copies use the same threads
+        return self
+
+    def resize(self, num_workers):
+
+        with self.cond:
+            self.num_workers = max(1, int(num_workers))
+            self.cond.notify_all()
+
+        for i in range(self.num_workers):
+            if i < len(self.workers) and self.workers[i].is_alive():
+                continue
+            t = threading.Thread(target=self.work, args=(i,), daemon=True)
+            if i < len(self.workers):
+                self.workers[i] = t
+            else:
+                self.workers.append(t)
+            t.start()
+
+    def submit(self, img, path, drop_policy="drop newest", **kwargs):
+
+        with self.cond:
+            if len(self.jobs) >= self.max_queue_depth:
+                if drop_policy == "drop oldest":
+                    self.jobs.popleft()
+                    self.dropped += 1
+                elif drop_policy == "block":
+                    self.cond.wait_for(
+                            lambda: len(self.jobs) < self.max_queue_depth)
+                else:
+                    self.dropped += 1
+                    return False
+            self.jobs.append((img, path, kwargs))
+            self.cond.notify_all()
+
+        return True
+
+    def pending(self):
+
+        with self.cond:
+            return len(self.jobs) + self.busy
+
+    def flush(self):
+
+        with self.cond:
+            self.cond.wait_for(lambda: len(self.jobs) + self.busy == 0)
+
+    def close(self):
+        """
+        Writes all pending images and stops the worker threads.
+        """
+
+        self.flush()
+
+        with self.cond:
+            self.num_workers = 0
+            self.cond.notify_all()
+
+        for t in self.workers:
+            t.join()
+        self.workers = []
+
+        atexit.unregister(self.flush)
+
+    def work(self, idx):
+
+        while True:
+            with self.cond:
+                self.cond.wait_for(
+                        lambda: len(self.jobs) > 0 or idx >= self.num_workers)
+                if idx >= self.num_workers:
+                    return
+                img, path, kwargs = self.jobs.popleft()
+                self.busy += 1
+                self.cond.notify_all()
+
+            try:
+                write_image(img, path, **kwargs)
+                ok = True
+                self.last_error = None
+            except Exception as e:
+                ok = False
+                self.last_error = str(e)
+
+            with self.cond:
+                self.busy -= 1
+                if ok:
+                    self.written += 1
+                else:
+                    self.failed += 1
+                self.cond.notify_all()
+
+
 OBJ_CLIPBOARD_PREFIX = "__imdashclip__"
 
 
@@ -413,6 +1420,73 @@ def set_obj_clipboard(obj, tag=""):
     viz.set_clipboard(clipstr)
 
 
+def load_obj_str(obj_str):
+
+    lod = otb.Loader("", mmap_arrays=False)
+    return lod.load(None, json.loads(obj_str))
+
+
+def serialize_view(view):
+    """
+    Serializes a view into a record (view_str, component_strs).
+
+    Components are serialized separately, so that records of consecutive
+    states can share the strings of all unchanged components.
+    """
+
+    comps = getattr(view, "components", None)
+    if comps is None:
+        return (otb.saves(view), None)
+
+    view.components = []
+    try:
+        view_str = otb.saves(view)
+    finally:
+        view.components = comps
+
+    return (view_str, tuple((c.uuid, otb.saves(c)) for c in comps))
+
+
+def deserialize_view(record, live_view=None, live_record=None):
+    """
+    Restores a view from a record created by serialize_view.
+
+    If the record of the live view is given, all parts which did not
+    change are taken over from the live view instead of being reloaded.
+    This keeps the runtime state (e.g. histories) of unchanged components.
+    """
+
+    view_str, comp_strs = record
+
+    if live_record is not None and live_record[0] == view_str:
+        view = live_view
+    else:
+        view = load_obj_str(view_str)
+
+    if comp_strs is None:
+        return view
+
+    live_comps = {}
+    if live_view is not None and live_record is not None:
+        live_strs = dict(live_record[1] or ())
+        for c in getattr(live_view, "components", []):
+            live_comps[c.uuid] = (c, live_strs.get(c.uuid))
+
+    comps = []
+    for comp_uuid, comp_str in comp_strs:
+        try:
+            c, live_str = live_comps[comp_uuid]
+        except KeyError:
+            c, live_str = None, None
+        if live_str != comp_str:
+            c = load_obj_str(comp_str)
+        comps.append(c)
+
+    view.components = comps
+
+    return view
+
+
 def compute_file_hash(path):
 
     with open(path,"rb") as fd:
@@ -422,3 +1496,224 @@ def compute_file_hash(path):
     hasher.update(f_data)
 
     return hasher.hexdigest()
+
+
+def compute_config_hash(path):
+    """
+    Hashes the main state file and all view files of a config directory.
+    """
+
+    hasher = hashlib.sha1()
+
+    paths = [os.path.join(path, "state.json")]
+    views_dir = os.path.join(path, "views")
+    if os.path.isdir(views_dir):
+        paths += [os.path.join(views_dir, f)
+                  for f in sorted(os.listdir(views_dir))
+                  if f.endswith(".json")]
+
+    for p in paths:
+        with open(p, "rb") as fd:
+            hasher.update(fd.read())
+
+    return hasher.hexdigest()
+
+
+# arrays with more elements are stored in separate files, like objtoolbox does
+EXTERN_ARRAY_SIZE = 25
+
+
+def externalize_arrays(json_obj, ext_dir, path, used):
+    """
+    Replaces large inlined arrays in a serialized object tree by references
+    to npy files in ext_dir, which objtoolbox loads transparently.
+    """
+
+    if isinstance(json_obj, dict):
+        if json_obj.get("__class__") == "numpy.ndarray":
+            arr = np.array(json_obj["data"], dtype=json_obj["dtype"])
+            if arr.size <= EXTERN_ARRAY_SIZE:
+                return json_obj
+            name = ".".join(str(p) for p in path)
+            os.makedirs(ext_dir, exist_ok=True)
+            np.save(os.path.join(ext_dir, name) + ".npy", arr)
+            used.add(name + ".npy")
+            return {"__class__": "__extern__", "path": name}
+        return {k: externalize_arrays(v, ext_dir, path + [k], used)
+                for k, v in json_obj.items()}
+
+    if isinstance(json_obj, list):
+        return [externalize_arrays(v, ext_dir, path + [i], used)
+                for i, v in enumerate(json_obj)]
+
+    return json_obj
+
+
+def clean_extern_arrays(ext_dir, prefix, used=()):
+    """
+    Removes the array files starting with prefix, which are not used.
+    """
+
+    if not os.path.isdir(ext_dir):
+        return
+
+    for f in os.listdir(ext_dir):
+        if f.startswith(prefix + ".") and f not in used:
+            os.remove(os.path.join(ext_dir, f))
+
+
+def view_record_to_json(record, ext_dir=None, name=None):
+    """
+    Combines a record created by serialize_view into the json string
+    of the whole view, as it would be written by objtoolbox.
+
+    If ext_dir is given, large arrays are stored there in files
+    prefixed with name instead of being inlined.
+    """
+
+    view_str, comp_strs = record
+
+    view_json = json.loads(view_str)
+    if comp_strs is not None:
+        view_json["components"] = [json.loads(c) for _, c in comp_strs]
+
+    if ext_dir is not None:
+        used = set()
+        view_json = externalize_arrays(view_json, ext_dir, [name], used)
+        clean_extern_arrays(ext_dir, name, used)
+
+    return json.dumps(view_json, indent=2)
+
+
+def load_view_files(views_dir):
+    """
+    Loads all views stored as separate files in the given directory.
+    """
+
+    views = {}
+
+    if not os.path.isdir(views_dir):
+        return views
+
+    lod = otb.Loader(views_dir, mmap_arrays=False)
+
+    for f in sorted(os.listdir(views_dir)):
+        if not f.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(views_dir, f)) as fd:
+                view = lod.load(None, json.load(fd))
+        except Exception:
+            traceback.print_exc()
+            continue
+        if isinstance(view, ViewBase):
+            views[f[:-len(".json")]] = view
+
+    return views
+
+
+def write_file_atomic(path, content):
+    """
+    Writes content to a temporary file and renames it to path,
+    so that readers never see a partially written file.
+
+    The existing file is locked like objtoolbox does while saving,
+    so other processes loading the config wait for the write.
+    """
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    try:
+        lock_fd = open(path, "r+")
+    except FileNotFoundError:
+        lock_fd = None
+
+    try:
+        if lock_fd is not None:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as fd:
+            fd.write(content)
+        os.replace(tmp_path, path)
+    finally:
+        if lock_fd is not None:
+            fcntl.flock(lock_fd, fcntl.LOCK_UN)
+            lock_fd.close()
+
+
+class ConfigWriter:
+    """
+    Writes config files on a background thread.
+
+    Contents may be given as strings or as functions returning strings,
+    which are then evaluated on the writer thread. A content of None
+    removes the file. Multiple pending writes to the same path are
+    coalesced, so only the latest content is written.
+    """
+
+    def __init__(self):
+
+        self.jobs = {}
+        self.cond = threading.Condition()
+
+        self.busy = False
+        self.written = 0
+        self.last_error = None
+
+        self.thread = threading.Thread(target=self.work, daemon=True)
+        self.thread.start()
+
+        atexit.register(self.flush)
+
+    def __deepcopy__(self, memo):
+
+        return self
+
+    def write(self, path, content):
+
+        with self.cond:
+            self.jobs[path] = content
+            self.cond.notify_all()
+
+    def remove(self, path):
+
+        self.write(path, None)
+
+    def pending(self):
+
+        with self.cond:
+            return len(self.jobs) + int(self.busy)
+
+    def flush(self):
+
+        with self.cond:
+            self.cond.wait_for(lambda: len(self.jobs) == 0 and not self.busy)
+
+    def work(self):
+
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: len(self.jobs) > 0)
+                jobs = self.jobs
+                self.jobs = {}
+                self.busy = True
+
+            for path, content in jobs.items():
+                try:
+                    if callable(content):
+                        content = content()
+                    if content is None:
+                        if os.path.exists(path):
+                            os.remove(path)
+                        continue
+                    write_file_atomic(path, content)
+                    self.written += 1
+                    self.last_error = None
+                except Exception as e:
+                    traceback.print_exc()
+                    self.last_error = str(e)
+
+            with self.cond:
+                self.busy = False
+                self.cond.notify_all()
@@ -2,3 +2,9 @@ from imdash.views.view_2d import View2D, View2DComponent
 from imdash.views.view_object import ViewObject
 from imdash.views.ros_bag_record_view import RosBagRecordView
 from imdash.views.image_saver_view import ImageSaverView
+from imdash.views.performance_view import PerformanceView
+from imdash.views.latency_view import LatencyView
+from imdash.views.computed_sources_view import ComputedSourcesView
+from imdash.views.timeline_view import TimelineView
+from imdash.views.memory_view import MemoryView
+from imdash.views.table_view import TableView
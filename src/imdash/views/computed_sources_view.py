@@ -0,0 +1,86 @@
+import imviz as viz
+
+from imdash.utils import ViewBase, DataSource
+from imdash.connectors.computed_connector import COMPUTED
+
+
+class ComputedSourceDefinition:
+
+    def __init__(self):
+
+        self.name = ""
+        self.expression = DataSource()
+
+
+class ComputedSourcesView(ViewBase):
+    """
+    Defines computed sources, which are available as {/computed/<name>}.
+    """
+
+    def __init__(self):
+
+        super().__init__()
+
+        self.title = "Computed sources"
+        self.definitions = []
+
+    def update(self, sources):
+
+        for d in self.definitions:
+            if d.name != "":
+                COMPUTED.publish(d.name, d.expression)
+
+    def render_status(self, sources, d):
+
+        if d.name == "":
+            return
+
+        s = sources["/computed/" + d.name]
+        if s is None:
+            viz.text("waiting for inputs")
+        elif s.error is not None:
+            viz.text(s.error.strip().split("\n")[-1], color=(1.0, 0.0, 0.0))
+        else:
+            viz.text(f"{type(s.data).__name__}: {str(s.data)[:100]}")
+
+    def render(self, sources):
+
+        if not self.show:
+            self.visible = False
+            return
+
+        window_open = viz.begin_window(f"{self.title}###{self.uuid}")
+        self.show = viz.get_window_open()
+        self.visible = window_open
+
+        if viz.begin_popup_context_item():
+            if viz.begin_menu("Edit"):
+                self.title = viz.autogui(self.title, "title")
+                viz.end_menu()
+            if viz.menu_item("Delete"):
+                self.destroyed = True
+            viz.end_popup()
+
+        if window_open:
+            remove_idx = None
+
+            for i, d in enumerate(self.definitions):
+                viz.push_id(str(i))
+                if viz.button(viz.Icon.TRASH):
+                    remove_idx = i
+                viz.same_line()
+                d.name = viz.input("name", d.name)
+                viz.autogui(d.expression, "expression", sources=sources)
+                self.render_status(sources, d)
+                viz.separator()
+                viz.pop_id()
+
+            if remove_idx is not None:
+                self.definitions.pop(remove_idx)
+                viz.set_mod(True)
+
+            if viz.button("Add"):
+                self.definitions.append(ComputedSourceDefinition())
+                viz.set_mod(True)
+
+        viz.end_window()
@@ -1,9 +1,13 @@
 import os
 import time
+import numpy as np
 import imviz as viz
 
-from imdash.utils import ViewBase, DataSource
-from PIL import Image
+from imdash.utils import ViewBase, DataSource, ImageWriterPool
+
+
+IMAGE_FORMATS = ["png", "jpeg", "npy"]
+FORMAT_EXTENSIONS = {"png": ".png", "jpeg": ".jpg", "npy": ".npy"}
 
 
 class ImageSaverView(ViewBase):
@@ -20,14 +24,27 @@ class ImageSaverView(ViewBase):
         self.error_msg = None
 
         self.save_every_second = False
+        self.burst_mode = False
         self.last_save_time = time.time()
 
+        self.image_format = viz.Selection(IMAGE_FORMATS)
+        self.png_compression = 1
+        self.jpeg_quality = 90
+
+        self.num_writers = 2
+        self.max_queue_depth = 16
+        self.drop_policy = viz.Selection(ImageWriterPool.DROP_POLICIES)
+
+        self.writer_pool = None
+
     def __savestate__(self):
 
-        d = self.__dict__.copy()
+        d = super().__savestate__()
         del d["error_msg"]
         del d["last_save_time"]
         del d["save_every_second"]
+        del d["burst_mode"]
+        del d["writer_pool"]
 
         return d
 
@@ -35,46 +52,86 @@ class ImageSaverView(ViewBase):
 
         self.title = ctx.render(self.title, "title")
 
+        viz.separator()
+        self.image_format = ctx.render(self.image_format, "format")
+        self.png_compression = max(0, min(9, ctx.render(
+            self.png_compression, "png compression")))
+        self.jpeg_quality = max(1, min(100, ctx.render(
+            self.jpeg_quality, "jpeg quality")))
+
+        viz.separator()
+        self.num_writers = max(1, ctx.render(self.num_writers, "writer threads"))
+        self.max_queue_depth = max(1, ctx.render(
+            self.max_queue_depth, "max queue depth"))
+        self.drop_policy = ctx.render(self.drop_policy, "on full queue")
+
+    def get_writer_pool(self):
+
+        if self.writer_pool is None:
+            self.writer_pool = ImageWriterPool(
+                    self.num_writers, self.max_queue_depth)
+        elif self.writer_pool.num_workers != self.num_writers:
+            self.writer_pool.resize(self.num_writers)
+
+        self.writer_pool.max_queue_depth = self.max_queue_depth
+
+        return self.writer_pool
+
     def save_image(self, img):
 
-        try:
-            if os.path.isdir(self.save_path):
-                pil_img = Image.fromarray(img)
-                stamp = str(int(time.time() * 10**9))
-                file_path = os.path.join(self.save_path, stamp) +  ".png"
-                pil_img.save(file_path)
+        if img is None:
+            return
+
+        if os.path.isdir(self.save_path):
+            fmt = self.image_format.selected()
+            stamp = str(int(time.time() * 10**9))
+            file_path = os.path.join(self.save_path, stamp) + FORMAT_EXTENSIONS[fmt]
+        else:
+            ext = os.path.splitext(self.save_path)[-1].lower()
+            if ext == ".npy":
+                fmt = "npy"
+            elif ext == ".png":
+                fmt = "png"
             else:
-                pil_img = Image.fromarray(img)
-                ext = os.path.splitext(self.save_path)[-1]
-                if ext != ".png":
-                    pil_img = pil_img.convert("RGB")
-                pil_img.save(self.save_path)
-            self.error_msg = None
-        except Exception as e:
-            self.error_msg = str(e)
+                fmt = "jpeg"
+            file_path = self.save_path
+
+        # sources may update the array in place while it is queued
+        self.get_writer_pool().submit(
+                np.array(img, copy=True),
+                file_path,
+                self.drop_policy.selected(),
+                fmt=fmt,
+                png_compression=self.png_compression,
+                jpeg_quality=self.jpeg_quality)
 
     def render(self, sources):
 
         if not self.show:
+            self.visible = False
             return
 
         window_open = viz.begin_window(f"{self.title}###{self.uuid}")
         self.show = viz.get_window_open()
+        self.visible = window_open
 
         if viz.begin_popup_context_item():
             if viz.begin_menu("Edit"):
                 viz.autogui(self, "", sources=sources)
                 viz.end_menu()
+            self.render_record_menu()
             if viz.menu_item("Delete"):
                 self.destroyed = True
             viz.end_popup()
 
-        try:
-            img = self.image_source()
-        except Exception:
-            img = None
-
         if window_open:
+            self.update_record_region()
+
+            try:
+                img = self.image_source()
+            except Exception:
+                img = None
+
             viz.autogui(self.image_source, "image", sources=sources)
 
             viz.separator()
@@ -95,6 +152,18 @@ class ImageSaverView(ViewBase):
                 if now - self.last_save_time > 1.0:
                     self.last_save_time = now
                     self.save_image(img)
+            viz.same_line()
+
+            self.burst_mode = viz.checkbox("Burst", self.burst_mode)
+            if self.burst_mode and self.image_source.mod():
+                self.save_image(img)
+
+            if self.writer_pool is not None:
+                self.error_msg = self.writer_pool.last_error
+                viz.text(f"queued: {self.writer_pool.pending()}, "
+                         + f"written: {self.writer_pool.written}, "
+                         + f"failed: {self.writer_pool.failed}, "
+                         + f"dropped: {self.writer_pool.dropped}")
 
             if self.error_msg is not None:
                 viz.text(self.error_msg, "red")
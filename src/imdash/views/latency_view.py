@@ -0,0 +1,104 @@
+import numpy as np
+import imviz as viz
+
+from imdash.utils import ViewBase, LATENCY, LATENCY_STAGES
+
+
+STAT_KEYS = ["last", "mean", "p50", "p95", "p99", "max"]
+
+
+class LatencyView(ViewBase):
+
+    def __init__(self):
+
+        super().__init__()
+
+        self.title = "Latency"
+        self.source_key = ""
+        self.stage = viz.Selection(LATENCY_STAGES)
+        self.stage.index = len(LATENCY_STAGES) - 1
+        self.bins = 50
+
+    def render_stats_table(self, stats):
+
+        flags = viz.TableFlags.BORDERS | viz.TableFlags.ROWBG
+
+        if viz.begin_table(f"stats###{self.uuid}", len(STAT_KEYS) + 1, flags):
+            viz.table_setup_column("stage")
+            for k in STAT_KEYS:
+                viz.table_setup_column(k)
+            viz.table_headers_row()
+            for stage in LATENCY_STAGES:
+                if stage not in stats:
+                    continue
+                viz.table_next_row()
+                viz.table_next_column()
+                viz.text(stage)
+                for k in STAT_KEYS:
+                    viz.table_next_column()
+                    viz.text(f"{stats[stage][k]*1000.0:.2f}")
+            viz.end_table()
+
+    def render_histogram(self, samples):
+
+        if len(samples) == 0:
+            viz.text("no samples for this stage")
+            return
+
+        counts, edges = np.histogram(samples * 1000.0, bins=max(1, self.bins))
+        centers = (edges[:-1] + edges[1:]) / 2.0
+
+        if viz.begin_plot(f"Histogram###{self.uuid}_hist",
+                          flags=viz.PlotFlags.NO_TITLE):
+            viz.setup_axes("latency in ms", "count")
+            viz.plot_bars(centers,
+                          counts.astype(float),
+                          label=self.stage.selected(),
+                          bar_size=edges[1] - edges[0])
+        viz.end_plot()
+
+    def render(self, sources):
+
+        if not self.show:
+            self.visible = False
+            return
+
+        window_open = viz.begin_window(f"{self.title}###{self.uuid}")
+        self.show = viz.get_window_open()
+        self.visible = window_open
+
+        if viz.begin_popup_context_item():
+            if viz.begin_menu("Edit"):
+                viz.autogui(self, "", sources=sources)
+                viz.end_menu()
+            if viz.menu_item("Reset statistics"):
+                LATENCY.reset()
+            if viz.menu_item("Delete"):
+                self.destroyed = True
+            viz.end_popup()
+
+        if window_open:
+            if not LATENCY.enabled:
+                viz.text("Latency tracking is disabled, "
+                         + "enable it in Settings > Latency tracking.")
+
+            keys = LATENCY.keys()
+            if len(keys) == 0:
+                viz.text("no latency samples yet")
+            else:
+                try:
+                    key_idx = keys.index(self.source_key)
+                except ValueError:
+                    key_idx = 0
+                self.source_key = keys[viz.combo("source", keys, key_idx)]
+                self.stage = viz.autogui(self.stage, "stage")
+
+                stats = LATENCY.stats(self.source_key)
+                viz.text(f"samples: {stats['count']}, "
+                         + f"dropped before render: {stats['dropped']}, "
+                         + "all times in ms")
+                self.render_stats_table(stats)
+                self.render_histogram(LATENCY.stage_samples(
+                    self.source_key, self.stage.selected()))
+
+        viz.end_window()
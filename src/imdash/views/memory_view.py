@@ -0,0 +1,67 @@
+import imviz as viz
+
+from imdash.utils import ViewBase, MEMORY
+
+
+class MemoryView(ViewBase):
+    """
+    Shows the estimated memory of sources and buffers against the budget.
+    """
+
+    def __init__(self):
+
+        super().__init__()
+
+        self.title = "Memory"
+        self.max_rows = 50
+
+    def render_table(self):
+
+        rows = MEMORY.usage()
+
+        flags = (viz.TableFlags.BORDERS
+                 | viz.TableFlags.ROWBG
+                 | viz.TableFlags.RESIZABLE
+                 | viz.TableFlags.SCROLL_Y)
+
+        if viz.begin_table(f"memory###{self.uuid}", 3, flags):
+            viz.table_setup_column("category")
+            viz.table_setup_column("name")
+            viz.table_setup_column("MB")
+            viz.table_setup_scroll_freeze(0, 1)
+            viz.table_headers_row()
+            for category, name, size in rows[:self.max_rows]:
+                viz.table_next_row()
+                viz.table_next_column()
+                viz.text(category)
+                viz.table_next_column()
+                viz.text(str(name))
+                viz.table_next_column()
+                viz.text(f"{size / 2**20:.2f}")
+            viz.end_table()
+
+    def render(self, sources):
+
+        if not self.show:
+            self.visible = False
+            return
+
+        window_open = viz.begin_window(f"{self.title}###{self.uuid}")
+        self.show = viz.get_window_open()
+        self.visible = window_open
+
+        if viz.begin_popup_context_item():
+            if viz.begin_menu("Edit"):
+                viz.autogui(self, "", sources=sources)
+                viz.end_menu()
+            if viz.menu_item("Delete"):
+                self.destroyed = True
+            viz.end_popup()
+
+        if window_open:
+            viz.text(f"{MEMORY.total / 2**20:.1f} MB of"
+                     + f" {MEMORY.budget / 2**20:.1f} MB budget")
+            viz.text("Set the budget in Settings > Memory budget (MB).")
+            self.render_table()
+
+        viz.end_window()
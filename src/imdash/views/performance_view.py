@@ -0,0 +1,108 @@
+import numpy as np
+import imviz as viz
+
+from imdash.utils import ViewBase, PROFILER
+
+
+PROFILER_CATEGORIES = ["components", "views", "connectors", "sources"]
+SORT_KEYS = ["mean", "p50", "p95", "p99", "max", "calls"]
+
+
+class PerformanceView(ViewBase):
+
+    def __init__(self):
+
+        super().__init__()
+
+        self.title = "Performance"
+        self.category = viz.Selection(PROFILER_CATEGORIES)
+        self.sort_by = viz.Selection(SORT_KEYS)
+        self.max_rows = 50
+        self.show_frame_plot = True
+
+    def render_frame_plot(self):
+
+        try:
+            samples = np.fromiter(PROFILER.samples[("frame", "total")], float)
+        except KeyError:
+            return
+
+        if viz.begin_plot(f"Frame time###{self.uuid}_frame",
+                          size=(-1, viz.get_global_font_size() * 8),
+                          flags=viz.PlotFlags.NO_TITLE):
+            viz.setup_axes("frame", "ms")
+            viz.setup_axis_limits(viz.Axis.X1, 0, PROFILER.window, viz.PlotCond.ALWAYS)
+            viz.plot(samples * 1000.0, label="frame time")
+            viz.plot(np.full(len(samples), samples.mean() * 1000.0),
+                     label="mean")
+        viz.end_plot()
+
+    def render_table(self):
+
+        category = self.category.selected()
+        sort_idx = self.sort_by.index
+
+        rows = []
+        for cat, key in PROFILER.keys(category):
+            stats = PROFILER.stats(cat, key)
+            if stats is not None:
+                rows.append((PROFILER.name(cat, key), stats))
+        rows.sort(key=lambda r: r[1][sort_idx], reverse=True)
+
+        total = sum(r[1][0] for r in rows)
+        viz.text(f"{len(rows)} entries, {total*1000.0:.3f} ms mean per frame")
+
+        flags = (viz.TableFlags.BORDERS
+                 | viz.TableFlags.ROWBG
+                 | viz.TableFlags.RESIZABLE
+                 | viz.TableFlags.SCROLL_Y)
+
+        if viz.begin_table(f"timings###{self.uuid}", 7, flags):
+            viz.table_setup_column("name")
+            for k in SORT_KEYS:
+                viz.table_setup_column(k)
+            viz.table_setup_scroll_freeze(0, 1)
+            viz.table_headers_row()
+            for name, stats in rows[:self.max_rows]:
+                viz.table_next_row()
+                viz.table_next_column()
+                viz.text(name)
+                for v in stats[:-1]:
+                    viz.table_next_column()
+                    viz.text(f"{v*1000.0:.3f}")
+                viz.table_next_column()
+                viz.text(str(stats[-1]))
+            viz.end_table()
+
+    def render(self, sources):
+
+        if not self.show:
+            self.visible = False
+            return
+
+        window_open = viz.begin_window(f"{self.title}###{self.uuid}")
+        self.show = viz.get_window_open()
+        self.visible = window_open
+
+        if viz.begin_popup_context_item():
+            if viz.begin_menu("Edit"):
+                viz.autogui(self, "", sources=sources)
+                viz.end_menu()
+            if viz.menu_item("Reset statistics"):
+                PROFILER.reset()
+            if viz.menu_item("Delete"):
+                self.destroyed = True
+            viz.end_popup()
+
+        if window_open:
+            if not PROFILER.enabled:
+                viz.text("Profiling is disabled, enable it in Settings > Profiling.")
+            else:
+                if self.show_frame_plot:
+                    self.render_frame_plot()
+                self.category = viz.autogui(self.category, "category")
+                self.sort_by = viz.autogui(self.sort_by, "sort by")
+                viz.text("all times in ms")
+                self.render_table()
+
+        viz.end_window()
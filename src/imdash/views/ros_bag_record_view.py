@@ -118,7 +118,7 @@ class RosBagRecordView(ViewBase):
 
     def __savestate__(self):
 
-        s = self.__dict__.copy()
+        s = super().__savestate__()
         s["record_topics"] = list(self.record_topics)
         s["record_and_remap_topics"] = list(self.record_and_remap_topics)
         del s["launch_service"]
@@ -260,10 +260,12 @@ class RosBagRecordView(ViewBase):
     def render(self, sources):
 
         if not self.show:
+            self.visible = False
             return
 
         window_open = viz.begin_window(f"{self.title}###{self.uuid}")
         self.show = viz.get_window_open()
+        self.visible = window_open
 
         if viz.begin_popup_context_item():
             if viz.begin_menu("Edit"):
@@ -0,0 +1,458 @@
+import math
+import array
+import numbers
+import traceback
+
+import numpy as np
+import imviz as viz
+
+from imdash.utils import ViewBase, DataSource
+from imdash.expressions import compile_expression
+
+
+# nesting depth of message fields, which are flattened into columns
+MAX_DEPTH = 3
+
+# imgui limits the number of table columns
+MAX_COLUMNS = 63
+
+SPARKLINE_POINTS = 64
+
+
+def get_fields(obj):
+    """
+    Returns the field names of a message, dict or object, else None.
+    """
+
+    if isinstance(obj, dict):
+        return list(obj.keys())
+    if hasattr(obj, "get_fields_and_field_types"):
+        # ros2 messages
+        return list(obj.get_fields_and_field_types().keys())
+    if hasattr(obj, "__dict__"):
+        return [k for k in vars(obj) if not k.startswith("_")]
+
+    return None
+
+
+def get_field(obj, key):
+
+    if isinstance(obj, dict):
+        return obj[key]
+
+    return getattr(obj, key)
+
+
+def get_leaf_paths(obj, prefix=(), depth=MAX_DEPTH):
+    """
+    Returns the paths of all scalar fields of obj.
+    """
+
+    if isinstance(obj, (numbers.Number, str, np.generic)):
+        return [prefix]
+    if depth == 0:
+        return []
+
+    fields = get_fields(obj)
+    if fields is None:
+        return []
+
+    paths = []
+    for k in fields:
+        paths += get_leaf_paths(get_field(obj, k), prefix + (k,), depth - 1)
+
+    return paths
+
+
+def get_by_path(obj, path):
+
+    for k in path:
+        obj = get_field(obj, k)
+
+    return obj
+
+
+def as_column(values):
+    """
+    Returns values as 1d array, which is numeric if possible, else of strings.
+    """
+
+    col = np.asarray(values)
+
+    if col.dtype.kind not in "biufU":
+        col = col.astype(str)
+
+    return col
+
+
+def split_columns(name, arr):
+    """
+    Splits an array with one row per element into 1d columns.
+    """
+
+    arr = np.asarray(arr)
+
+    if arr.dtype.names is not None:
+        cols = {}
+        for n in arr.dtype.names:
+            cols.update(split_columns(n if name == "" else f"{name}.{n}", arr[n]))
+        return cols
+
+    if arr.ndim <= 1:
+        return {"value" if name == "" else name: as_column(arr)}
+
+    arr = arr.reshape(len(arr), -1)
+    prefix = "" if name == "" else name + "."
+
+    return {f"{prefix}{j}": as_column(arr[:, j]) for j in range(arr.shape[1])}
+
+
+def to_columns(data):
+    """
+    Converts tabular data to a dict of equally long 1d columns.
+
+    Supported are 1d, 2d and structured arrays (e.g. csv files or point
+    clouds), dicts of equally long arrays and sequences of scalars,
+    messages, dicts or objects (e.g. ros2 array fields).
+    """
+
+    if data is None:
+        return {}
+
+    if isinstance(data, (bytes, bytearray, array.array)):
+        data = np.asarray(data)
+
+    if isinstance(data, np.ndarray):
+        if data.ndim == 0:
+            return {"value": as_column(data[np.newaxis])}
+        # e.g. the unparsed header of csv files
+        if (data.ndim == 2
+                and data.dtype.kind == "f"
+                and len(data) > 1
+                and np.isnan(data[0]).all()):
+            data = data[1:]
+        return split_columns("", data)
+
+    if isinstance(data, dict):
+        lens = {len(v) if hasattr(v, "__len__") and not isinstance(v, str) else None
+                for v in data.values()}
+        if len(lens) == 1 and None not in lens:
+            cols = {}
+            for k, v in data.items():
+                cols.update(split_columns(str(k), v))
+            return cols
+        rows = [data]
+    elif hasattr(data, "__len__") and hasattr(data, "__getitem__") \
+            and not isinstance(data, str):
+        rows = data
+    else:
+        rows = [data]
+
+    if len(rows) == 0:
+        return {}
+
+    if len(get_leaf_paths(rows[0], depth=0)) > 0:
+        return {"value": as_column(list(rows))}
+
+    cols = {}
+    for path in get_leaf_paths(rows[0]):
+        try:
+            cols[".".join(str(p) for p in path)] = as_column(
+                    [get_by_path(r, path) for r in rows])
+        except Exception:
+            # fields missing in some rows
+            pass
+
+    return cols
+
+
+def format_value(v):
+
+    if isinstance(v, (float, np.floating)):
+        return f"{v:.6g}"
+
+    return str(v)
+
+
+def get_stats(col):
+    """
+    Returns minimum, maximum, mean and a downsampled line of a numeric column.
+    """
+
+    if col.dtype.kind not in "biuf" or len(col) == 0:
+        return None
+
+    col = col.astype(np.float64)
+
+    finite = col[np.isfinite(col)]
+    if len(finite) == 0:
+        return None
+
+    n = len(col)
+    if n > SPARKLINE_POINTS:
+        # mean per bucket
+        starts = np.linspace(0, n, SPARKLINE_POINTS + 1).astype(int)[:-1]
+        line = np.add.reduceat(col, starts) / np.diff(np.append(starts, n))
+    else:
+        line = col
+
+    return finite.min(), finite.max(), finite.mean(), line
+
+
+class TableView(ViewBase):
+    """
+    Shows tabular data with sorting, filtering and column statistics.
+
+    Data is stored as one numpy array per column. Only rows in the visible
+    range are formatted, so large csv files or point clouds stay responsive.
+    """
+
+    def __init__(self):
+
+        super().__init__()
+
+        self.title = "Table"
+        self.source = DataSource()
+
+        # expression over the columns c and row indices i, e.g. c["x"] > 0
+        self.filter = ""
+        self.sort_column = ""
+        self.sort_descending = False
+        self.show_sparklines = True
+
+        self.columns = None
+        self.order = np.zeros(0, dtype=int)
+        self.order_key = None
+        self.stats = {}
+        self.first_row = 0
+        self.error = None
+        self.filter_error = None
+
+    def __savestate__(self):
+
+        s = super().__savestate__()
+        del s["columns"]
+        del s["order"]
+        del s["order_key"]
+        del s["stats"]
+        del s["first_row"]
+        del s["error"]
+        del s["filter_error"]
+
+        return s
+
+    def n_rows(self):
+
+        if not self.columns:
+            return 0
+
+        return len(next(iter(self.columns.values())))
+
+    def compute_filter(self, idx):
+
+        expr = DataSource.COMPILED.get(
+                ("table_filter", self.filter, DataSource.RESTRICTED),
+                lambda: compile_expression(
+                    self.filter,
+                    ["c", "i"],
+                    {"np": np, "math": math},
+                    DataSource.RESTRICTED))
+
+        if expr.error is not None:
+            self.filter_error = expr.error
+            return idx
+
+        try:
+            mask = np.broadcast_to(
+                    np.asarray(expr.func(self.columns, idx), dtype=bool), idx.shape)
+        except Exception as e:
+            self.filter_error = f"{type(e).__name__}: {e}"
+            return idx
+
+        return idx[mask]
+
+    def update_order(self):
+
+        idx = np.arange(self.n_rows())
+        self.filter_error = None
+
+        if self.filter.strip() != "":
+            idx = self.compute_filter(idx)
+
+        col = self.columns.get(self.sort_column)
+        if col is not None:
+            idx = idx[np.argsort(col[idx], kind="stable")]
+            if self.sort_descending:
+                idx = idx[::-1]
+
+        self.order = idx
+
+        # statistics follow the shown rows
+        self.stats = {k: get_stats(c[idx]) for k, c in self.columns.items()}
+
+    def update_data(self):
+
+        if self.columns is None or self.source.mod():
+            try:
+                self.columns = to_columns(self.source())
+                self.error = None
+            except Exception:
+                self.columns = {}
+                self.error = traceback.format_exc()
+            self.order_key = None
+
+        order_key = (self.filter, self.sort_column, self.sort_descending)
+        if order_key != self.order_key:
+            self.update_order()
+            self.order_key = order_key
+
+    def toggle_sort(self, name):
+
+        if self.sort_column != name:
+            self.sort_column = name
+            self.sort_descending = False
+        elif not self.sort_descending:
+            self.sort_descending = True
+        else:
+            self.sort_column = ""
+
+    def render_sparkline(self, name, height):
+
+        stats = self.stats.get(name)
+        if stats is None:
+            return
+
+        lo, hi, mean, line = stats
+
+        if viz.begin_plot(f"###spark_{name}",
+                          size=(-1, height),
+                          flags=viz.PlotFlags.CANVAS_ONLY | viz.PlotFlags.NO_INPUTS):
+            flags = viz.PlotAxisFlags.NO_DECORATIONS | viz.PlotAxisFlags.AUTO_FIT
+            viz.setup_axes("", "", flags, flags)
+            viz.plot(line, label=name)
+        viz.end_plot()
+
+        if viz.is_item_hovered():
+            viz.begin_tooltip()
+            viz.text(f"min {lo:.6g}\nmax {hi:.6g}\nmean {mean:.6g}")
+            viz.end_tooltip()
+
+    def render_table(self, n_visible, row_height, sparkline_height):
+
+        names = list(self.columns.keys())[:MAX_COLUMNS]
+
+        flags = (viz.TableFlags.BORDERS
+                 | viz.TableFlags.ROWBG
+                 | viz.TableFlags.RESIZABLE)
+
+        if not viz.begin_table(f"table###{self.uuid}", len(names) + 1, flags):
+            return
+
+        viz.table_setup_column("#")
+        for n in names:
+            viz.table_setup_column(n)
+
+        viz.table_next_row(min_row_height=row_height)
+        viz.table_next_column()
+        viz.text("#")
+        for n in names:
+            viz.table_next_column()
+            arrow = ""
+            if n == self.sort_column:
+                arrow = " (desc)" if self.sort_descending else " (asc)"
+            if viz.selectable(f"{n}{arrow}###sort_{n}", n == self.sort_column):
+                self.toggle_sort(n)
+
+        if self.show_sparklines:
+            viz.table_next_row(min_row_height=sparkline_height)
+            viz.table_next_column()
+            for n in names:
+                viz.table_next_column()
+                self.render_sparkline(n, sparkline_height)
+
+        # only the visible rows are formatted
+        rows = self.order[self.first_row:self.first_row + n_visible]
+        cols = [self.columns[n][rows] for n in names]
+
+        for r, i in enumerate(rows):
+            viz.table_next_row(min_row_height=row_height)
+            viz.table_next_column()
+            viz.text(str(i))
+            for c in cols:
+                viz.table_next_column()
+                viz.text(format_value(c[r]))
+
+        viz.end_table()
+
+    def render_content(self):
+
+        if self.error is not None:
+            viz.text(self.error, color=(1.0, 0.0, 0.0))
+            return
+
+        self.filter = viz.input("filter", self.filter)
+        if viz.is_item_hovered():
+            viz.begin_tooltip()
+            viz.text("expression over the columns c and row indices i,\n"
+                     + "e.g. (c[\"x\"] > 0) & (i % 10 == 0)")
+            viz.end_tooltip()
+        if self.filter_error is not None:
+            viz.text(self.filter_error, color=(1.0, 0.0, 0.0))
+
+        n_shown = len(self.order)
+        viz.text(f"{n_shown} of {self.n_rows()} rows, {len(self.columns)} columns")
+
+        font_size = viz.get_global_font_size()
+        row_height = font_size + 4.0
+        sparkline_height = font_size * 2.0
+        line_height = font_size + 10.0
+
+        header_height = row_height
+        if self.show_sparklines:
+            header_height += sparkline_height + 4.0
+
+        _, avail_height = viz.get_content_region_avail()
+        n_visible = max(1, int((avail_height - line_height - header_height)
+                               / (row_height + 1.0)))
+        max_first_row = max(0, n_shown - n_visible)
+
+        if viz.is_window_hovered():
+            for se in viz.get_scroll_events():
+                self.first_row -= int(round(se.yoffset * 3))
+
+        # scrolling is not a modification of the view
+        viz.push_mod_any()
+        self.first_row = viz.slider_int(
+                "first row", min(max(0, self.first_row), max_first_row),
+                0, max_first_row)
+        viz.clear_mod_any()
+        viz.pop_mod_any()
+
+        self.render_table(n_visible, row_height, sparkline_height)
+
+    def render(self, sources):
+
+        if not self.show:
+            self.visible = False
+            return
+
+        window_open = viz.begin_window(f"{self.title}###{self.uuid}")
+        self.show = viz.get_window_open()
+        self.visible = window_open
+
+        if viz.begin_popup_context_item():
+            if viz.begin_menu("Edit"):
+                self.title = viz.input("title", self.title)
+                viz.autogui(self.source, "source", sources=sources)
+                self.show_sparklines = viz.checkbox(
+                        "show sparklines", self.show_sparklines)
+                viz.end_menu()
+            if viz.menu_item("Delete"):
+                self.destroyed = True
+            viz.end_popup()
+
+        if window_open:
+            self.update_data()
+            self.render_content()
+
+        viz.end_window()
@@ -0,0 +1,75 @@
+import imviz as viz
+
+from imdash.utils import ViewBase
+from imdash.timeline import TIMELINE
+
+
+class TimelineView(ViewBase):
+    """
+    Scrubs all views back in time through the recorded timeline.
+    """
+
+    def __init__(self):
+
+        super().__init__()
+
+        self.title = "Timeline"
+
+    def render_controls(self):
+
+        oldest, newest = TIMELINE.time_range()
+        if oldest is None:
+            viz.text("nothing recorded yet")
+            return
+
+        if TIMELINE.live:
+            viz.text("live")
+        else:
+            if viz.button("Live"):
+                TIMELINE.go_live()
+            viz.same_line()
+            if viz.button("Pause" if TIMELINE.playing else "Play"):
+                TIMELINE.playing = not TIMELINE.playing
+            viz.same_line()
+            TIMELINE.speed = max(0.01, viz.drag("speed", TIMELINE.speed, 0.01))
+
+        cursor = newest if TIMELINE.live else TIMELINE.cursor
+        offset = viz.slider("time (s)", cursor - newest, oldest - newest, 0.0)
+
+        if viz.mod():
+            if offset >= 0.0:
+                TIMELINE.go_live()
+            else:
+                TIMELINE.cursor = newest + offset
+
+        viz.text(f"recorded: {newest - oldest:.1f} s, "
+                 + f"{len(TIMELINE.tracks)} sources, "
+                 + f"{TIMELINE.memory_usage / 2**20:.1f} of "
+                 + f"{TIMELINE.memory_budget / 2**20:.1f} MB")
+
+    def render(self, sources):
+
+        if not self.show:
+            self.visible = False
+            return
+
+        window_open = viz.begin_window(f"{self.title}###{self.uuid}")
+        self.show = viz.get_window_open()
+        self.visible = window_open
+
+        if viz.begin_popup_context_item():
+            if viz.begin_menu("Edit"):
+                self.title = viz.autogui(self.title, "title")
+                viz.end_menu()
+            if viz.menu_item("Delete"):
+                self.destroyed = True
+            viz.end_popup()
+
+        if window_open:
+            if not TIMELINE.enabled:
+                viz.text("Timeline recording is disabled, "
+                         + "enable it in Settings > Timeline recording.")
+            else:
+                self.render_controls()
+
+        viz.end_window()
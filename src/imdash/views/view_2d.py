@@ -1,4 +1,5 @@
 import copy
+import time
 import uuid
 import textwrap
 import traceback
@@ -11,7 +12,8 @@ from imdash.utils import (
     ViewBase,
     DataSource,
     ColorEdit,
-    to_menu_name
+    to_menu_name,
+    render_timing_stats
 )
 
 import imdash.utils as utils
@@ -27,14 +29,17 @@ class View2DComponent:
         self.hide_on_error = False
         self.no_fit = False
 
+        # if set, update is also called while the view is hidden
+        self.keep_warm = False
+
     def update(self, idx, view):
-        # called every frame
-        # implement logic here
+        # called every frame before rendering
+        # implement data processing here, must not use imgui/implot
         pass
 
     def render(self, idx, view):
         # called if component is visible
-        # implement rendering here
+        # implement drawing here
         pass
 
 
@@ -128,6 +133,16 @@ class View2D(ViewBase):
         self.plot_settings = PlotSettings()
         self.components = []
 
+        # tracebacks of failed component updates by uuid
+        self.update_errors = {}
+
+    def __savestate__(self):
+
+        d = super().__savestate__()
+        del d["update_errors"]
+
+        return d
+
     @property
     def title(self):
         return self.plot_settings.title
@@ -165,22 +180,40 @@ class View2D(ViewBase):
             if viz.menu_item("Delete"):
                 remove_item = i
 
+        prof = utils.PROFILER
+
         for i, c in enumerate(self.components):
             exc = None
             try:
-                c.render(c.uuid, self)
+                if prof.enabled:
+                    t = time.perf_counter()
+                    try:
+                        c.render(c.uuid, self)
+                    finally:
+                        prof.add("components", c.uuid,
+                                 time.perf_counter() - t, c.label)
+                else:
+                    c.render(c.uuid, self)
                 label_id = c.label + f"###{c.uuid}"
             except Exception as e:
                 label_id = c.label + f" {viz.Icon.TRIANGLE_EXCLAMATION}" + f"###{c.uuid}"
                 if not c.hide_on_error:
                     viz.plot_dummy(label_id, legend_color=(1.0, 0.0, 0.0))
                 exc = traceback.format_exc()
+            update_exc = self.update_errors.get(c.uuid)
+            if update_exc is not None:
+                exc = update_exc if exc is None else update_exc + "\n" + exc
             if viz.begin_legend_popup(label_id):
                 if viz.begin_menu("Edit"):
                     viz.autogui(c, name="", sources=sources)
                     viz.end_menu()
                 comp_menu_funcs(c, i)
 
+                if prof.enabled:
+                    if viz.begin_menu("Performance"):
+                        render_timing_stats(prof.stats("components", c.uuid))
+                        viz.end_menu()
+
                 if exc is not None:
                     if viz.begin_menu("Error"):
                         exc = "\n".join(["\n".join(textwrap.wrap(
@@ -244,6 +277,7 @@ class View2D(ViewBase):
                         viz.end_menu()
                 viz.end_menu()
             viz.separator()
+            self.render_record_menu()
             if viz.menu_item("Delete view"):
                 self.destroyed = True
             viz.separator()
@@ -369,9 +403,32 @@ class View2D(ViewBase):
                 ps.auto_fit_y = False
                 viz.set_mod(True)
 
+    def update(self, sources):
+
+        prof = utils.PROFILER
+
+        self.update_errors = {}
+
+        for c in self.components:
+            if not (self.visible or c.keep_warm):
+                continue
+            try:
+                if prof.enabled:
+                    t = time.perf_counter()
+                    try:
+                        c.update(c.uuid, self)
+                    finally:
+                        prof.add("components", c.uuid + "/update",
+                                 time.perf_counter() - t, c.label + " (update)")
+                else:
+                    c.update(c.uuid, self)
+            except Exception:
+                self.update_errors[c.uuid] = traceback.format_exc()
+
     def render(self, sources):
 
         if not self.show:
+            self.visible = False
             return
 
         viz.push_plot_style_var(
@@ -386,8 +443,11 @@ class View2D(ViewBase):
                 flags=figure_flags)
 
         self.show = viz.get_window_open()
+        self.visible = window_open
 
         if window_open:
+            self.update_record_region()
+
             vizex.PlotBuffer.current().export = self.plot_settings.export
 
             self.setup_axes()
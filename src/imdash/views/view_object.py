@@ -10,16 +10,63 @@ from imdash.utils import (
         DataSource,
         ViewBase
     )
+from imdash.object_browser import ObjectBrowserContext
 
 from pydoc import locate
 
 
-class ImdashAutoguiContext(viz.AutoguiContext):
+class RendererRegistry:
+    """
+    Resolves the "__renderer__" paths of objects to render functions.
+
+    Lookups are cached by type and path, so the import machinery is only
+    walked once. Paths, which cannot be resolved, are cached as failures
+    and reported once.
+    """
+
+    def __init__(self):
+
+        # (type, path) -> function or None
+        self.funcs = {}
+
+    def get(self, obj):
+
+        path = obj.__renderer__
+        key = (type(obj), path)
+
+        try:
+            return self.funcs[key]
+        except KeyError:
+            pass
+
+        try:
+            func = locate(path)
+            if func is None:
+                print(f"renderer \"{path}\" not found")
+            elif not callable(func):
+                print(f"renderer \"{path}\" is not callable")
+                func = None
+        except Exception:
+            traceback.print_exc()
+            func = None
+
+        self.funcs[key] = func
+
+        return func
+
+    def clear(self):
+
+        self.funcs = {}
+
+
+RENDERERS = RendererRegistry()
+
+
+class ImdashAutoguiContext(ObjectBrowserContext):
 
     def __init__(self, *args, **kwargs):
 
         super().__init__(*args, **kwargs)
-        self.func_cache = {}
 
         self.file_path_needed = False
         self.file_path_id = None
@@ -46,12 +93,15 @@ class ImdashAutoguiContext(viz.AutoguiContext):
     def render(self, obj, name=""):
 
         if hasattr(obj, "__renderer__") and not self.ignore_custom:
+            render_func = RENDERERS.get(obj)
+            if render_func is None:
+                return super().render(obj, name)
             viz.push_mod_any()
             try:
-                render_func = locate(obj.__renderer__)
                 res = render_func(obj, name, ctx=self, **self.params)
             except Exception as e:
                 traceback.print_exc()
+                viz.pop_mod_any()
                 return super().render(obj, name)
             if viz.pop_mod_any():
                 if self.path_of_mod_item == []:
@@ -79,7 +129,7 @@ class ViewObject(ViewBase):
 
     def __savestate__(self):
 
-        s = self.__dict__.copy()
+        s = super().__savestate__()
         del s["file_path_needed"]
         del s["file_action"]
         del s["file_path"]
@@ -112,6 +162,7 @@ class ViewObject(ViewBase):
     def render(self, sources):
 
         if not self.show:
+            self.visible = False
             return
 
         src_rw = self.source.readwrite()
@@ -132,6 +183,7 @@ class ViewObject(ViewBase):
                 self.destroyed = True
             viz.end_popup()
         self.show = viz.get_window_open()
+        self.visible = window_open
 
         agc = ImdashAutoguiContext()
         agc.post_header_hooks.append(self.context_menu_hook)
@@ -0,0 +1,165 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("imviz")
+
+from imdash.alignment import (
+        StampBuffer,
+        StampJoin,
+        join_nearest,
+        join_interpolate
+    )
+
+
+def test_buffer_keeps_newest_samples():
+
+    buf = StampBuffer(3)
+    for i in range(10):
+        buf.push(float(i), 10.0 * i)
+
+    assert buf.stamps.tolist() == [7.0, 8.0, 9.0]
+    assert buf.values.tolist() == [70.0, 80.0, 90.0]
+
+
+def test_buffer_restarts_on_stamps_going_backwards():
+
+    buf = StampBuffer(10)
+    for t in [1.0, 2.0, 3.0, 0.5]:
+        buf.push(t, t)
+
+    assert buf.stamps.tolist() == [0.5]
+
+
+def test_join_nearest_picks_closest_stamp():
+
+    stamps = np.array([0.0, 1.0, 2.0])
+    values = np.array([10.0, 11.0, 12.0])
+    ref = np.array([-0.01, 0.4, 0.6, 1.99, 2.02])
+
+    joined, valid = join_nearest(ref, stamps, values, 0.05)
+
+    assert joined.tolist() == [10.0, 10.0, 11.0, 12.0, 12.0]
+    assert valid.tolist() == [True, False, False, True, True]
+
+
+def test_join_nearest_without_samples():
+
+    joined, valid = join_nearest(np.array([1.0, 2.0]), np.zeros(0), np.zeros(0), 1.0)
+
+    assert np.all(np.isnan(joined))
+    assert not valid.any()
+
+
+def test_join_interpolate_within_tolerance():
+
+    stamps = np.array([0.0, 0.1, 0.2, 1.0])
+    values = np.array([0.0, 1.0, 2.0, 10.0])
+    ref = np.array([0.05, 0.1, 0.15, 0.5, 1.0, 1.01, -0.01])
+
+    joined, valid = join_interpolate(ref, stamps, values, 0.1)
+
+    assert joined[:3] == pytest.approx([0.5, 1.0, 1.5])
+    # neighbors too far apart, past the end and before the start
+    assert valid.tolist() == [True, True, True, False, True, False, False]
+
+
+def test_reference_is_held_back_until_other_catches_up():
+
+    join = StampJoin("nearest", tolerance=0.05)
+
+    join.push_other(0.0, 100.0)
+    join.push_ref(0.0, 1.0)
+    join.push_ref(0.04, 2.0)
+
+    # a later sample of the other source could still be closer to 0.04
+    stamps, other, ref = join.pop_joined()
+    assert stamps.tolist() == [0.0]
+    assert other.tolist() == [100.0]
+    assert ref.tolist() == [1.0]
+
+    join.push_other(0.05, 105.0)
+    stamps, other, ref = join.pop_joined()
+    assert stamps.tolist() == [0.04]
+    assert other.tolist() == [105.0]
+    assert ref.tolist() == [2.0]
+
+
+def test_samples_outside_tolerance_are_dropped():
+
+    join = StampJoin("nearest", tolerance=0.01)
+
+    join.push_ref(0.5, 1.0)
+    join.push_other(0.0, 0.0)
+    join.push_other(1.0, 1.0)
+
+    stamps, _, _ = join.pop_joined()
+
+    assert len(stamps) == 0
+    # undecidable samples are not kept either
+    assert len(join.ref) == 0
+
+
+def test_interpolate_join():
+
+    join = StampJoin("interpolate", tolerance=0.2)
+
+    join.push_other(0.0, 0.0)
+    join.push_ref(0.05, 1.0)
+    join.push_ref(0.15, 2.0)
+    join.push_other(0.1, 10.0)
+    join.push_other(0.2, 20.0)
+
+    stamps, other, ref = join.pop_joined()
+
+    assert stamps.tolist() == [0.05, 0.15]
+    assert other == pytest.approx([5.0, 15.0])
+    assert ref.tolist() == [1.0, 2.0]
+
+
+def test_other_going_backwards_drops_pending_reference():
+
+    join = StampJoin("nearest", tolerance=0.05)
+
+    join.push_other(10.0, 0.0)
+    join.push_ref(10.5, 1.0)
+    join.push_other(1.0, 0.0)
+
+    assert len(join.ref) == 0
+    assert join.other.stamps.tolist() == [1.0]
+
+
+def test_other_is_trimmed_to_pending_reference():
+
+    join = StampJoin("interpolate", tolerance=0.05)
+
+    for i in range(100):
+        join.push_other(i * 0.01, float(i))
+    join.push_ref(0.5, 1.0)
+    join.push_ref(1.0, 2.0)
+
+    join.pop_joined()
+
+    # one sample before the pending stamp minus tolerance is kept
+    assert len(join.ref) == 1
+    assert join.other.stamps[0] == pytest.approx(0.94)
+    assert join.other.stamps[-1] == pytest.approx(0.99)
+
+    join.push_other(1.0, 100.0)
+    stamps, other, _ = join.pop_joined()
+    assert stamps.tolist() == [1.0]
+    assert other.tolist() == [100.0]
+
+
+def test_other_is_trimmed_without_pending_reference():
+
+    join = StampJoin("nearest", tolerance=0.05)
+
+    for i in range(100):
+        join.push_other(i * 0.01, float(i))
+    join.push_ref(0.5, 1.0)
+
+    join.pop_joined()
+
+    assert len(join.ref) == 0
+    assert join.other.stamps[0] >= 0.99 - 0.05 - 0.01 - 1e-9
+    assert len(join.other) < 10
@@ -0,0 +1,83 @@
+import os
+import json
+
+import numpy as np
+import objtoolbox as otb
+import pytest
+
+pytest.importorskip("imviz")
+
+from imdash.utils import (
+        ConfigWriter,
+        view_record_to_json,
+        write_file_atomic)
+
+
+class Obj:
+
+    def __init__(self):
+
+        self.small = np.zeros(3)
+        self.large = np.zeros(0)
+
+
+def make_record(obj):
+
+    return (otb.saves(obj), None)
+
+
+def test_large_arrays_are_externalized(tmp_path):
+
+    obj = Obj()
+    obj.large = np.arange(100.0)
+
+    ext_dir = str(tmp_path / "extern")
+    view_json = json.loads(view_record_to_json(make_record(obj), ext_dir, "v"))
+
+    assert view_json["large"]["__class__"] == "__extern__"
+    assert view_json["small"]["__class__"] == "numpy.ndarray"
+    assert os.listdir(ext_dir) == ["v.large.npy"]
+
+    loaded = otb.Loader(str(tmp_path), mmap_arrays=False).load(Obj(), view_json)
+    assert np.array_equal(loaded.large, obj.large)
+
+
+def test_unused_arrays_are_removed(tmp_path):
+
+    obj = Obj()
+    obj.large = np.arange(100.0)
+
+    ext_dir = str(tmp_path / "extern")
+    view_record_to_json(make_record(obj), ext_dir, "v")
+    view_record_to_json(make_record(obj), ext_dir, "w")
+
+    obj.large = np.zeros(0)
+    view_record_to_json(make_record(obj), ext_dir, "v")
+
+    assert os.listdir(ext_dir) == ["w.large.npy"]
+
+
+def test_write_replaces_locked_file(tmp_path):
+
+    path = str(tmp_path / "state.json")
+
+    write_file_atomic(path, "a")
+    write_file_atomic(path, "b")
+
+    with open(path) as fd:
+        assert fd.read() == "b"
+    assert os.listdir(tmp_path) == ["state.json"]
+
+
+def test_functions_returning_none_remove_files(tmp_path):
+
+    path = str(tmp_path / "v.json")
+
+    writer = ConfigWriter()
+    writer.write(path, lambda: "{}")
+    writer.flush()
+    assert os.path.exists(path)
+
+    writer.write(path, lambda: None)
+    writer.flush()
+    assert not os.path.exists(path)
@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("imviz")
+
+from imdash.utils import DataSource
+
+
+class Source:
+
+    def __init__(self, data):
+
+        self.data = data
+        self.mod = False
+
+
+def test_set_mod_flags_all_used_sources(monkeypatch):
+
+    srcs = {"/a": Source(1.0), "/b": Source(2.0), "/c": Source(3.0)}
+    monkeypatch.setattr(DataSource, "SOURCES", srcs)
+
+    ds = DataSource(path="{/a} + {/b}")
+    ds.set_mod()
+
+    assert srcs["/a"].mod_requested
+    assert srcs["/b"].mod_requested
+    assert not hasattr(srcs["/c"], "mod_requested")
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("imviz")
+
+from imdash.expressions import compile_expression, ExpressionError
+
+
+ARGS = ["__alt__", "__src0__"]
+
+
+def compile_restricted(expr):
+
+    return compile_expression(expr, ARGS, {}, restricted=True)
+
+
+@pytest.mark.parametrize("expr", [
+    # shadowed module names in comprehensions
+    "[math.getpid() for math in [math.CDLL(None)"
+    + " for math in [m.ctypeslib.ctypes for m in [np]]]]",
+    "[math for math in [1]]",
+    "[len(x) for len in [1]]",
+    "[1 for __src0__ in [1]]",
+    # aliased modules
+    "[m.ctypeslib for m in [np]]",
+    "np",
+    "len(np)",
+    "[t for t in [time]]",
+    # attributes outside the whitelists
+    "np.ctypeslib",
+    "math.getpid()",
+    "time.sleep(1)",
+    "stream.states",
+    "__src0__.__class__",
+    # assignments to attributes
+    "[1 for __alt__.x in [1]]",
+])
+def test_escapes_are_rejected(expr):
+
+    res = compile_restricted(expr)
+
+    assert res.func is None
+    assert res.error is not None
+
+
+@pytest.mark.parametrize("expr", [
+    "np.linalg.norm(__src0__)",
+    "np.mean(__src0__).item()",
+    "math.sqrt(2.0) * math.pi",
+    "[v * 2 for v in __src0__]",
+    "sum(x for x in range(3))",
+    "stream.ema(__src0__, 0.1)",
+])
+def test_allowed_expressions_compile(expr):
+
+    res = compile_restricted(expr)
+
+    assert res.error is None
+    assert res.func is not None
+
+
+def test_subscripts_compile():
+
+    for expr in ["__src0__[0]", "__src0__[:, 0]", "__src0__[1:, ::2]"]:
+        res = compile_restricted(expr)
+        assert res.error is None
+
+    x = np.arange(6).reshape(3, 2)
+    assert compile_restricted("__src0__[:, 0]").func(None, x).tolist() == [0, 2, 4]
+    assert compile_restricted("__src0__[1][0]").func(None, x) == 2
+
+
+@pytest.mark.parametrize("expr", [
+    "max([1], key=__alt__.append)",
+    "sorted([1], key=__src0__.append)",
+    "max([__alt__.append])(1)",
+    "sorted([2, 1], key=np.zeros(1).tofile)",
+])
+def test_bound_methods_cannot_be_passed(expr):
+
+    alt = []
+    res = compile_restricted(expr)
+
+    if res.func is not None:
+        with pytest.raises(ExpressionError):
+            res.func(alt, alt)
+
+    assert alt == []
+
+
+def test_fields_and_direct_method_calls_are_allowed():
+
+    class Msg:
+        def __init__(self):
+            self.data = np.arange(4.0)
+            self.count = 3
+
+    res = compile_restricted("__src0__.data.mean() + __src0__.count")
+
+    assert res.func(None, Msg()) == 4.5
@@ -0,0 +1,65 @@
+import time
+import threading
+
+import pytest
+
+pytest.importorskip("imviz")
+
+from imdash import utils
+
+
+@pytest.fixture
+def no_input(monkeypatch):
+    """
+    Replaces waiting and input of imviz, wait never blocks like during
+    the first frames of its powersave mode.
+    """
+
+    monkeypatch.setattr(utils.viz, "wait", lambda **kwargs: True)
+    monkeypatch.setattr(utils.viz, "trigger", lambda: None)
+    monkeypatch.setattr(utils.viz, "get_mouse_pos", lambda: (0.0, 0.0))
+    for name in ["get_key_events",
+                 "get_char_events",
+                 "get_scroll_events",
+                 "get_mouse_button_events"]:
+        monkeypatch.setattr(utils.viz, name, lambda: [])
+
+
+def make_idle_pacer(idle_rate):
+
+    pacer = utils.FramePacer()
+    pacer.enabled = True
+    pacer.idle_rate = idle_rate
+    pacer.last_activity = 0.0
+
+    return pacer
+
+
+def test_idle_frames_are_throttled(no_input):
+
+    pacer = make_idle_pacer(20.0)
+    # the first frame sees the mouse position as new input
+    pacer.wait(True, True)
+    pacer.last_activity = 0.0
+
+    t = time.perf_counter()
+    for _ in range(5):
+        pacer.wait(True, True)
+
+    assert time.perf_counter() - t >= 5 * 0.05 * 0.9
+
+
+def test_wake_ends_idle_sleep(no_input):
+
+    pacer = make_idle_pacer(0.2)
+    pacer.wait(True, True)
+    pacer.last_activity = 0.0
+
+    timer = threading.Timer(0.1, pacer.wake)
+    timer.start()
+
+    t = time.perf_counter()
+    pacer.wait(True, True)
+
+    assert time.perf_counter() - t < 2.0
+    timer.join()
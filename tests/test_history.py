@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip("imviz")
+
+from imdash.utils import MemoryAccountant
+from imdash.components.view_2d.history import History2DComp
+
+
+def make_history(n):
+
+    comp = History2DComp()
+    for i in range(n):
+        comp.history.append((float(i), float(i)))
+
+    return comp
+
+
+def test_shrink_accepts_float_sizes():
+
+    comp = make_history(100)
+    entry_size = comp.entry_size()
+
+    freed = comp.shrink(10.5 * entry_size)
+
+    assert freed > 0
+    assert len(comp.history) == 100 - 11
+    # the newest entries are kept at full resolution
+    assert comp.history[-1] == (99.0, 99.0)
+    assert [x for x, _ in comp.history] == sorted(x for x, _ in comp.history)
+
+
+def test_accountant_shrinks_over_float_budget():
+
+    comp = make_history(100)
+    size = len(comp.history) * comp.entry_size()
+
+    memory = MemoryAccountant()
+    memory.budget = size / 2.0
+    memory.report("components", comp.uuid, size, "history", comp.shrink)
+    memory.end_frame()
+
+    assert memory.total <= memory.budget
+    assert len(comp.history) == 50
@@ -0,0 +1,57 @@
+import itertools
+
+import pytest
+
+pytest.importorskip("imviz")
+
+from imdash.components.view_2d.image import (
+        visible_index_range,
+        index_range_origin
+    )
+
+
+def index_center(n, i, offset, scale, reverse):
+    """
+    Plot coordinate of the center of index i of an axis drawn from offset.
+    """
+
+    if reverse:
+        return offset + (n - i - 0.5) * scale
+
+    return offset + (i + 0.5) * scale
+
+
+@pytest.mark.parametrize("reverse,limits", itertools.product(
+    [False, True], [(10.0, 60.0), (-20.0, 35.5), (130.0, 250.0), (0.0, 200.0)]))
+def test_cropped_region_matches_full_image(reverse, limits):
+
+    n = 200
+    offset = 5.0
+    scale = 1.5
+
+    lo, hi = visible_index_range(n, offset, scale, reverse, *limits, 16)
+    origin = index_range_origin(n, lo, hi, offset, scale, reverse)
+
+    assert 0 <= lo <= hi <= n
+
+    # every index of the crop is drawn where it is in the full image
+    for i in range(lo, hi):
+        assert index_center(hi - lo, i - lo, origin, scale, reverse) \
+                == pytest.approx(index_center(n, i, offset, scale, reverse))
+
+    # all visible indices are part of the crop
+    for i in range(n):
+        c = index_center(n, i, offset, scale, reverse)
+        if limits[0] <= c <= limits[1]:
+            assert lo <= i < hi
+
+
+def test_unflipped_rows_start_at_the_top():
+
+    n = 100
+
+    # the upper quarter of an unflipped image shows its first rows
+    lo, hi = visible_index_range(n, 0.0, 1.0, True, 75.0, 100.0, 1)
+
+    assert (lo, hi) == (0, 25)
+    assert index_range_origin(n, lo, hi, 0.0, 1.0, True) == 75.0
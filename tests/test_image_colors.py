@@ -0,0 +1,161 @@
+import numpy as np
+import pytest
+
+imviz = pytest.importorskip("imviz")
+
+from imdash.components.view_2d.image import (
+        Image2DComp,
+        NORMALIZATIONS,
+        COLORMAPS,
+        estimate_value_range,
+        normalize_image,
+        get_colormap_lut
+    )
+
+
+def make_comp(norm, cmap):
+
+    comp = Image2DComp()
+    comp.normalization.index = NORMALIZATIONS.index(norm)
+    comp.colormap.index = COLORMAPS.index(cmap)
+
+    return comp
+
+
+def test_value_range_of_constant_image():
+
+    img = np.full((20, 30), 7.0)
+
+    assert estimate_value_range(img, "auto") == (7.0, 7.0)
+    assert estimate_value_range(img, "percentile") == (7.0, 7.0)
+
+
+def test_value_range_ignores_non_finite_values():
+
+    img = np.arange(100.0).reshape(10, 10)
+    img[0, 0] = np.nan
+    img[1, 1] = np.inf
+    img[2, 2] = -np.inf
+
+    lo, hi = estimate_value_range(img, "auto")
+
+    assert lo == 1.0
+    assert hi == 99.0
+
+
+def test_value_range_without_finite_values():
+
+    img = np.full((4, 4), np.nan)
+
+    assert estimate_value_range(img, "auto") == (0.0, 1.0)
+
+
+def test_value_range_percentiles():
+
+    img = np.arange(10000.0).reshape(100, 100)
+
+    lo, hi = estimate_value_range(img, "percentile", (10.0, 90.0))
+
+    assert lo == pytest.approx(999.9)
+    assert hi == pytest.approx(8999.1)
+
+
+def test_normalize_constant_image_is_black():
+
+    img = np.full((4, 4), 3.0)
+
+    _, out = normalize_image(img, 3.0, 3.0)
+
+    assert out.dtype == np.uint8
+    assert np.all(out == 0)
+
+
+def test_normalize_maps_range_and_clips():
+
+    img = np.array([[-1.0, 0.0, 0.5, 1.0, 2.0]])
+
+    _, out = normalize_image(img, 0.0, 1.0)
+
+    assert out.tolist() == [[0, 0, 127, 255, 255]]
+
+
+def test_normalize_non_finite_values():
+
+    img = np.array([[np.nan, np.inf, -np.inf]], dtype=np.float32)
+
+    _, out = normalize_image(img, 0.0, 1.0)
+
+    assert out.tolist() == [[0, 255, 0]]
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.uint16, np.int16, np.int32])
+def test_normalize_integer_images(dtype):
+
+    info = np.iinfo(dtype)
+    img = np.array([[info.min, info.max]], dtype=dtype)
+
+    _, out = normalize_image(img, float(info.min), float(info.max))
+
+    assert out.tolist() == [[0, 255]]
+
+
+def test_normalize_reuses_buffers():
+
+    img = np.zeros((4, 4))
+    tmp, out = normalize_image(img, 0.0, 1.0)
+
+    tmp2, out2 = normalize_image(img + 1.0, 0.0, 1.0, tmp, out)
+
+    assert tmp2 is tmp
+    assert out2 is out
+    assert np.all(out == 255)
+
+
+def test_colormap_lut_covers_max_value():
+
+    pytest.importorskip("matplotlib")
+
+    lut = get_colormap_lut("viridis")
+
+    assert lut.shape == (256, 4)
+    assert lut.dtype == np.uint8
+    assert get_colormap_lut("viridis") is lut
+
+    # the maximum normalized value is a valid index
+    _, out = normalize_image(np.array([[0.0, 1.0]]), 0.0, 1.0)
+    colors = np.take(lut, out, axis=0)
+    assert colors.shape == (1, 2, 4)
+    assert np.array_equal(colors[0, 1], lut[255])
+
+
+def test_map_colors_passes_through_without_mapping():
+
+    comp = make_comp("none", "none")
+    img = np.zeros((4, 4), dtype=np.float32)
+
+    assert comp.map_colors(img) is img
+
+
+def test_map_colors_fixed_range_to_gray():
+
+    pytest.importorskip("matplotlib")
+
+    comp = make_comp("fixed", "gray")
+    comp.range_min = 0.0
+    comp.range_max = 10.0
+
+    img = np.array([[0.0, 10.0, 20.0]])
+    out = comp.map_colors(img)
+
+    assert out.shape == (1, 3, 4)
+    assert out[0, 0, 0] == 0
+    assert out[0, 1, 0] == 255
+    assert out[0, 2, 0] == 255
+
+
+def test_map_colors_skips_colormap_of_rgb_images():
+
+    comp = make_comp("fixed", "viridis")
+    img = np.zeros((4, 4, 3), dtype=np.uint8)
+
+    assert comp.map_colors(img) is img
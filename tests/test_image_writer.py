@@ -0,0 +1,41 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("imviz")
+
+from imdash.utils import ImageWriterPool
+
+
+def test_only_successful_writes_are_counted(tmp_path):
+
+    # a single worker, so the failed write sets the last error
+    pool = ImageWriterPool(1, 16)
+
+    img = np.zeros((4, 4), dtype=np.uint8)
+    pool.submit(img, str(tmp_path / "a.npy"), fmt="npy")
+    pool.submit(img, str(tmp_path / "missing" / "b.npy"), fmt="npy")
+    pool.flush()
+
+    assert pool.written == 1
+    assert pool.failed == 1
+    assert pool.last_error is not None
+    assert os.path.exists(tmp_path / "a.npy")
+
+    pool.close()
+
+
+def test_close_writes_pending_images_and_stops_workers(tmp_path):
+
+    pool = ImageWriterPool(2, 16)
+    workers = list(pool.workers)
+
+    img = np.zeros((4, 4), dtype=np.uint8)
+    for i in range(8):
+        pool.submit(img, str(tmp_path / f"{i}.npy"), fmt="npy")
+    pool.close()
+
+    assert pool.written == 8
+    assert pool.pending() == 0
+    assert not any(t.is_alive() for t in workers)
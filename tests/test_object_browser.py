@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("imviz")
+
+import imdash.object_browser as ob
+from imdash.utils import DataSource
+
+
+@pytest.fixture(autouse=True)
+def caches(monkeypatch):
+
+    monkeypatch.setattr(ob, "PAGES", {})
+    monkeypatch.setattr(ob, "SUMMARIES", {})
+    monkeypatch.setattr(ob, "PRUNE_FRAME", -1)
+    monkeypatch.setattr(DataSource, "FRAME", 0)
+
+
+def test_summary_of_new_objects_is_throttled(monkeypatch):
+
+    now = [100.0]
+    monkeypatch.setattr(ob.time, "time", lambda: now[0])
+
+    text = ob.get_summary(1, np.zeros(1000))
+    # e.g. the next message of a streamed topic
+    assert ob.get_summary(1, np.ones(1000)) == text
+
+    now[0] += ob.SUMMARY_INTERVAL
+    assert ob.get_summary(1, np.ones(1000)) != text
+
+
+def test_summary_is_recomputed_on_shape_change():
+
+    text = ob.get_summary(1, np.zeros(1000))
+
+    assert ob.get_summary(1, np.zeros(2000)) != text
+
+
+def test_summaries_do_not_keep_objects():
+
+    buf = bytes(1000)
+    ob.get_summary(1, ob.as_array(buf))
+
+    _, _, shape, text = ob.SUMMARIES[1]
+    assert shape == (1000,)
+    assert isinstance(text, str)
+
+
+def test_untouched_nodes_are_pruned():
+
+    DataSource.FRAME = 1
+    ob.get_summary(1, np.zeros(1000))
+    ob.get_summary(2, np.zeros(1000))
+
+    DataSource.FRAME = 2
+    ob.get_summary(1, np.zeros(1000))
+
+    DataSource.FRAME = 3
+    ob.get_summary(1, np.zeros(1000))
+
+    assert list(ob.SUMMARIES.keys()) == [1]
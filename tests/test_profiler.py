@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+pytest.importorskip("imviz")
+
+from imdash.utils import Profiler, LatencyTracker
+
+
+def test_concurrent_adds_are_not_lost():
+
+    prof = Profiler(window=100000)
+    n_threads = 4
+    n_adds = 20000
+
+    def add():
+        for _ in range(n_adds):
+            prof.add("connectors", "test", 1.0)
+
+    threads = [threading.Thread(target=add) for _ in range(n_threads)]
+    for t in threads:
+        t.start()
+    while any(t.is_alive() for t in threads):
+        prof.end_frame()
+    for t in threads:
+        t.join()
+    prof.end_frame()
+
+    assert sum(prof.samples[("connectors", "test")]) == n_threads * n_adds
+
+
+def test_concurrent_ingests_while_rendering():
+
+    latency = LatencyTracker()
+    latency.enabled = True
+    n_ingests = 20000
+
+    def ingest():
+        for i in range(n_ingests):
+            latency.mark_ingest(f"/k{i % 16}", None, 0.0, 0.0)
+
+    thread = threading.Thread(target=ingest)
+    thread.start()
+    while thread.is_alive():
+        for i in range(16):
+            latency.mark_render(f"/k{i}")
+        latency.mark_swap()
+    thread.join()
+
+    counts = sum(latency.counts.values())
+    dropped = sum(latency.dropped.values())
+    pending = len(latency.ingested)
+
+    assert counts + dropped + pending == n_ingests
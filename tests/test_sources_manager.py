@@ -0,0 +1,62 @@
+import pytest
+
+pytest.importorskip("imviz")
+
+from imdash.main import SourcesManager
+
+
+def test_update_runs_all_connectors():
+
+    sm = SourcesManager()
+    try:
+        sm.update()
+        sm.update()
+    finally:
+        sm.reinit()
+
+
+def test_main_thread_is_declared_for_all_connectors():
+
+    sm = SourcesManager()
+    try:
+        for con in sm.connectors:
+            assert isinstance(con.main_thread, bool)
+    finally:
+        sm.reinit()
+
+
+class Source:
+
+    def __init__(self):
+
+        self.data = 1.0
+        self.mod = True
+
+
+def test_render_loop_never_shares_sources_with_update_thread():
+
+    sm = SourcesManager()
+    src = Source()
+    computed = Source()
+    sm.sources["/test/x"] = src
+    sm.sources["/computed/y"] = computed
+
+    try:
+        sm.set_threaded(True, 1.0)
+
+        assert sm.back_sources["/test/x"] is src
+        assert sm.sources["/test/x"] is not src
+        assert sm.sources["/test/x"].data == 1.0
+
+        # sources of main thread connectors stay with the render loop
+        assert sm.back_sources["/computed/y"] is None
+        assert sm.sources["/computed/y"] is computed
+
+        sm.swap()
+        assert src.mod
+
+        sm.set_threaded(False, 1.0)
+        assert sm.sources["/test/x"] is src
+        assert sm.sources["/computed/y"] is computed
+    finally:
+        sm.reinit()
@@ -0,0 +1,68 @@
+import pytest
+
+pytest.importorskip("imviz")
+
+from imdash.utils import DataSource
+from imdash.streaming import Streams
+
+
+class Source:
+
+    def __init__(self, data, mod=True):
+
+        self.data = data
+        self.mod = mod
+
+
+@pytest.fixture
+def sources(monkeypatch):
+
+    srcs = {"/x": Source(1.0)}
+    monkeypatch.setattr(DataSource, "SOURCES", srcs)
+    monkeypatch.setattr(DataSource, "FRAME", 0)
+
+    return srcs
+
+
+def test_evaluating_twice_in_one_frame_advances_once(sources):
+
+    ds = DataSource(path="stream.rolling({/x}, 10).count")
+
+    DataSource.FRAME = 1
+    assert ds() == 1
+    assert ds() == 1
+
+    DataSource.FRAME = 2
+    assert ds() == 2
+    assert ds() == 2
+
+
+def test_unmodified_source_does_not_advance(sources):
+
+    ds = DataSource(path="stream.rolling({/x}, 10).count")
+
+    DataSource.FRAME = 1
+    assert ds() == 1
+
+    sources["/x"].mod = False
+    DataSource.FRAME = 2
+    assert ds() == 1
+
+
+def test_sources_without_mod_advance_once_per_frame():
+
+    class Unmodded:
+
+        def mod(self):
+            return True
+
+    streams = Streams()
+    states = []
+    src = Unmodded()
+
+    for frame in [1, 1, 1, 2, 2]:
+        prev = streams.begin(src, states, frame)
+        res = streams.rolling(1.0, 10)
+        streams.end(prev)
+
+    assert res.count == 2
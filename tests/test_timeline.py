@@ -0,0 +1,134 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("imviz")
+
+from imdash.timeline import Timeline
+
+
+class Msg:
+
+    def __init__(self, stamp):
+
+        self.stamp_time = stamp
+        self.recv_time = None
+
+
+class Source:
+
+    def __init__(self, data, stamp=None):
+
+        self.data = data
+        self.last_msg = None if stamp is None else Msg(stamp)
+        self.mod = True
+
+
+def make_timeline():
+
+    timeline = Timeline()
+    timeline.enabled = True
+
+    return timeline
+
+
+def test_samples_do_not_share_source_data():
+
+    timeline = make_timeline()
+    src = Source(np.zeros(4), 1.0)
+
+    timeline.record({"/a": src})
+    src.data[:] = 1.0
+
+    sample = timeline.tracks["/a"].find(1.0)
+    assert np.all(sample.data == 0.0)
+
+
+def test_stamp_jump_drops_stale_order_entries():
+
+    timeline = make_timeline()
+    a = Source(np.zeros(128), 10.0)
+    b = Source(np.zeros(128), 10.0)
+
+    for t in [10.0, 11.0, 12.0]:
+        a.last_msg.stamp_time = t
+        b.last_msg.stamp_time = t
+        timeline.record({"/a": a, "/b": b})
+
+    # restarted bag for /a only
+    a.last_msg.stamp_time = 1.0
+    timeline.record({"/a": a})
+    assert list(timeline.order).count("/a") == 1
+
+    # evicting one sample drops the oldest of /b, not the new one of /a
+    timeline.evict(timeline.memory_usage - 1)
+    assert timeline.tracks["/a"].stamps[timeline.tracks["/a"].start:] == [1.0]
+    assert len(timeline.tracks["/b"]) == 2
+
+
+def test_overlay_skips_sources_without_sample():
+
+    timeline = make_timeline()
+    timeline.record({"/a": Source(1.0, 10.0)})
+    timeline.record({"/b": Source(2.0, 20.0)})
+
+    timeline.cursor = 15.0
+    overlay = timeline.get_overlay()
+
+    assert overlay["/a"].data == 1.0
+    assert "/b" not in overlay
+
+
+def test_unstamped_sources_use_message_clock():
+
+    timeline = make_timeline()
+    timeline.record({"/a": Source(1.0, 100.0), "/b": Source(2.0)})
+
+    stamp_b = timeline.tracks["/b"].stamps[-1]
+    assert abs(stamp_b - 100.0) < 1.0
+
+
+def test_unstamped_sources_keep_their_history():
+
+    timeline = make_timeline()
+    odom = Source(0.0, 0.0)
+    lidar = Source(0.0, 0.0)
+    other = Source(0.0)
+
+    for i in range(20):
+        t = 100.0 + i * 0.05
+        odom.mod = i % 2 == 0
+        if odom.mod:
+            odom.last_msg.stamp_time = t
+        lidar.last_msg.stamp_time = t - 0.2
+        timeline.record({"/odom": odom, "/lidar": lidar, "/other": other})
+
+    assert len(timeline.tracks["/other"]) == 20
+    stamps = timeline.tracks["/other"].stamps
+    assert stamps == sorted(stamps)
+
+
+class TopicSource:
+
+    def __init__(self, stamp):
+
+        self.last_msg = Msg(stamp)
+        self.last_msg.msg = {"points": np.zeros(100)}
+        self.mod = True
+
+    @property
+    def data(self):
+
+        return self.last_msg.msg["points"]
+
+
+def test_message_data_is_copied_once():
+
+    timeline = make_timeline()
+    src = TopicSource(1.0)
+
+    timeline.record({"/a": src})
+    src.last_msg.msg["points"][:] = 1.0
+
+    sample = timeline.tracks["/a"].find(1.0)
+    assert np.all(sample.data == 0.0)
+    assert sample.data is sample.last_msg.msg["points"]
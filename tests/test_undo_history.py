@@ -0,0 +1,68 @@
+import pytest
+
+pytest.importorskip("imviz")
+
+import imdash.utils as utils
+from imdash.main import UndoHistory
+
+
+class View:
+
+    def __init__(self, value):
+
+        self.value = value
+
+
+def recount(history):
+
+    strs = {}
+    for snap in history.snapshots:
+        for view_str, comp_strs in snap.values():
+            strs[id(view_str)] = len(view_str)
+            for _, c_str in comp_strs or ():
+                strs[id(c_str)] = len(c_str)
+
+    return sum(strs.values())
+
+
+def test_only_changed_views_are_serialized(monkeypatch):
+
+    views = {"a": View(1), "b": View(2)}
+    history = UndoHistory(views)
+
+    serialized = []
+    serialize_view = utils.serialize_view
+    def count(v):
+        serialized.append(v)
+        return serialize_view(v)
+    monkeypatch.setattr(utils, "serialize_view", count)
+
+    views["a"].value = 3
+    history.push(views, {"a"})
+
+    assert serialized == [views["a"]]
+    assert history.current()["b"] is history.snapshots[0]["b"]
+
+
+def test_memory_usage_is_kept_up_to_date():
+
+    views = {"a": View(1), "b": View(2)}
+    history = UndoHistory(views)
+
+    for i in range(5):
+        views["a"].value = [i] * (i + 1)
+        history.push(views, {"a"})
+        assert history.memory_usage() == recount(history)
+
+    # pushing after undo drops the redo branch
+    history.undo(views)
+    history.undo(views)
+    views["b"].value = "x" * 100
+    history.push(views, {"b"})
+    assert history.memory_usage() == recount(history)
+
+    # evicting the oldest snapshots
+    history.memory_budget = 0
+    history.push(views)
+    assert len(history.snapshots) == 2
+    assert history.memory_usage() == recount(history)